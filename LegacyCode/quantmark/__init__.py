@@ -8,3 +8,5 @@ import quantmark.molecule as molecule
 import quantmark.circuit as circuit
 from quantmark.circuit import CircuitInfo
 from quantmark.save import save
+from quantmark.cache import MoleculeCache
+from quantmark.reference_energies import ReferenceEnergies
@@ -0,0 +1,348 @@
+import os
+import hashlib
+import tempfile
+import typing
+import numpy as np
+import tequila as tq
+from tequila.hamiltonian import PauliString
+from tequila.quantumchemistry.qc_base import QuantumChemistryBase
+from tequila.quantumchemistry.encodings import known_encodings
+
+# Bump when the layout of the cache entries changes.
+CACHE_VERSION = 1
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'quantmark')
+DEFAULT_MAX_BYTES = 512 * 1024**2
+
+# Pauli matrices are stored as small integers, 0 is the identity.
+PAULI_CODES = {'X': 1, 'Y': 2, 'Z': 3}
+PAULI_NAMES = {code: name for name, code in PAULI_CODES.items()}
+
+# Arguments of molecule.create that do not change the molecule.
+UNKEYED_ARGUMENTS = ['backend', 'guess_wfn']
+
+
+class MoleculeCache:
+	"""
+	A content-addressed on-disk cache for molecular integrals and qubit hamiltonians.
+
+	Entries are keyed by the geometry, basis set, transformation and active orbitals and stored
+	as compressed numpy archives. On a hit the molecule is rebuilt from the stored integrals and
+	the hamiltonian from its Pauli string table, so no quantum chemistry is run.
+
+	Attributes
+	----------
+		directory : str
+			The directory where the entries are stored.
+		max_bytes : int
+			When the entries take more space than this the least recently used ones are removed.
+		hits : int
+			The amount of lookups (in this process) that were found in the cache.
+		misses : int
+			The amount of lookups (in this process) that had to be computed.
+
+	Methods
+	-------
+		get(geometry, basis_set, transformation, **kwargs):
+			Returns a molecule and its hamiltonian.
+		hamiltonian(molecule):
+			Returns the hamiltonian of an existing molecule.
+		stats():
+			Returns the hit and miss counts and the size of the cache.
+		clear():
+			Removes all entries.
+	"""
+	def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+		"""
+		Creates a MoleculeCache object.
+
+		Parameters
+		----------
+			directory : str, optional
+				The directory where the entries are stored. Defaults to $QUANTMARK_CACHE_DIR or
+				~/.cache/quantmark.
+			max_bytes : int
+				When the entries take more space than this the least recently used ones are
+				removed.
+		"""
+		if directory is None:
+			directory = os.environ.get('QUANTMARK_CACHE_DIR', DEFAULT_DIRECTORY)
+		os.makedirs(directory, exist_ok=True)
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self.hits = 0
+		self.misses = 0
+
+	def key(
+		self,
+		geometry: str,
+		basis_set: str,
+		transformation,
+		active_orbitals=None,
+		**kwargs
+	) -> str:
+		"""
+		Creates the content hash of the inputs that define a molecule.
+
+		Both get and hamiltonian use it, so a molecule made by get (or molecule.create with a
+		cache) has the same key as the same molecule given to hamiltonian.
+
+		Parameters
+		----------
+			geometry : str
+				The geometry of the molecule.
+			basis_set : str
+				The basis set of the molecule.
+			transformation : str, Callable
+				The fermion to qubit transformation as given to tequila.chemistry.Molecule or the
+				transformation object of a molecule. None is tequila's default, JordanWigner.
+			active_orbitals : list, dict, optional
+				The active orbitals as given to tequila.chemistry.Molecule or
+				molecule.active_space.active_orbitals.
+			**kwargs :
+				The other key arguments given to tequila.chemistry.Molecule.
+
+		Returns
+		----------
+		A hexadecimal sha256 digest.
+		"""
+		lines = [line.strip() for line in geometry.strip().splitlines()]
+		parts = [
+			str(CACHE_VERSION),
+			tq.__version__,
+			'\n'.join(lines),
+			str(basis_set).lower(),
+			_transformation_name(transformation),
+			f'active_orbitals={_active_orbitals(active_orbitals)!r}'
+		]
+		parts += [f'{k}={kwargs[k]!r}' for k in sorted(kwargs) if k not in UNKEYED_ARGUMENTS]
+		return hashlib.sha256('\0'.join(parts).encode('UTF-8')).hexdigest()
+
+	def get(
+		self,
+		geometry: str,
+		basis_set: str = None,
+		transformation: typing.Union[str, typing.Callable] = None,
+		**kwargs
+	) -> typing.Tuple[QuantumChemistryBase, tq.QubitHamiltonian]:
+		"""
+		Gets a molecule and its hamiltonian. They are computed and stored on a miss.
+
+		Parameters
+		----------
+			geometry : str
+				The geometry of the molecule.
+			basis_set : str
+				The basis set of the molecule.
+			transformation : str, Callable
+				The fermion to qubit transformation.
+			**kwargs :
+				Additional key arguments to be passed to tequila.chemistry.Molecule.
+
+		Returns
+		----------
+		A tuple with the molecule and the hamiltonian.
+		"""
+		path = self._path(self.key(geometry, basis_set, transformation, **kwargs))
+		entry = self._load(path)
+		if entry is not None and self._touch(path):
+			self.hits += 1
+			kwargs = {k: v for k, v in kwargs.items() if k not in UNKEYED_ARGUMENTS}
+			molecule = tq.chemistry.Molecule(
+				geometry=geometry,
+				basis_set=basis_set,
+				transformation=transformation,
+				backend='base',
+				one_body_integrals=entry['one_body_integrals'],
+				two_body_integrals=entry['two_body_integrals'],
+				nuclear_repulsion=float(entry['nuclear_repulsion']),
+				n_electrons=int(entry['n_electrons']),
+				**kwargs
+			)
+			return molecule, decode_hamiltonian(entry['paulis'], entry['coefficients'])
+
+		self.misses += 1
+		molecule = tq.chemistry.Molecule(
+			geometry=geometry,
+			basis_set=basis_set,
+			transformation=transformation,
+			**kwargs
+		)
+		hamiltonian = molecule.make_hamiltonian()
+		self._store(path, molecule, hamiltonian)
+		return molecule, hamiltonian
+
+	def hamiltonian(self, molecule: QuantumChemistryBase) -> tq.QubitHamiltonian:
+		"""
+		Gets the hamiltonian of a molecule. It is computed and stored on a miss.
+
+		Parameters
+		----------
+			molecule : QuantumChemistryBase
+				A molecule made with tequila.chemistry.Molecule or quantmark.molecule.create.
+
+		Returns
+		----------
+		The hamiltonian returned by molecule.make_hamiltonian().
+		"""
+		active_orbitals = None
+		if molecule.active_space is not None:
+			active_orbitals = molecule.active_space.active_orbitals
+		path = self._path(self.key(
+			molecule.parameters.geometry,
+			molecule.parameters.basis_set,
+			molecule.transformation,
+			active_orbitals
+		))
+		entry = self._load(path)
+		if entry is not None and self._touch(path):
+			self.hits += 1
+			return decode_hamiltonian(entry['paulis'], entry['coefficients'])
+
+		self.misses += 1
+		hamiltonian = molecule.make_hamiltonian()
+		self._store(path, molecule, hamiltonian)
+		return hamiltonian
+
+	def stats(self) -> dict:
+		"""
+		Returns
+		----------
+		A dict with the hit and miss counts of this process and the amount and size of the entries.
+		"""
+		entries = self._entries()
+		return {
+			'hits': self.hits,
+			'misses': self.misses,
+			'entries': len(entries),
+			'bytes': sum(size for _, _, size in entries)
+		}
+
+	def clear(self) -> None:
+		"""Removes all entries."""
+		for path, _, _ in self._entries():
+			os.remove(path)
+
+	def _path(self, key: str) -> str:
+		return os.path.join(self.directory, key + '.npz')
+
+	def _load(self, path: str) -> dict:
+		try:
+			with np.load(path) as data:
+				return {name: data[name] for name in data.files}
+		except (OSError, ValueError, KeyError):
+			# Missing, evicted by another process or partially written.
+			return None
+
+	def _touch(self, path: str) -> bool:
+		# Marks the entry as recently used for eviction. False if another process evicted it since
+		# it was loaded, which is taken as a miss.
+		try:
+			os.utime(path)
+		except FileNotFoundError:
+			return False
+		return True
+
+	def _store(self, path: str, molecule: QuantumChemistryBase, hamiltonian) -> None:
+		paulis, coefficients = encode_hamiltonian(hamiltonian)
+		# A temporary file is used so that readers never see a half written entry.
+		fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+		with os.fdopen(fd, 'wb') as file:
+			np.savez_compressed(
+				file,
+				one_body_integrals=molecule.molecule.one_body_integrals,
+				two_body_integrals=molecule.molecule.two_body_integrals,
+				nuclear_repulsion=molecule.molecule.nuclear_repulsion,
+				n_electrons=molecule.molecule.n_electrons,
+				paulis=paulis,
+				coefficients=coefficients
+			)
+		os.replace(tmp, path)
+		self._evict(keep=path)
+
+	def _entries(self) -> list:
+		entries = []
+		for name in os.listdir(self.directory):
+			if not name.endswith('.npz'):
+				continue
+			path = os.path.join(self.directory, name)
+			try:
+				stat = os.stat(path)
+			except OSError:
+				continue
+			entries.append((path, stat.st_mtime, stat.st_size))
+		return entries
+
+	def _evict(self, keep: str = None) -> None:
+		entries = sorted(self._entries(), key=lambda entry: entry[1])
+		total = sum(size for _, _, size in entries)
+		for path, _, size in entries:
+			if total <= self.max_bytes:
+				break
+			if path == keep:
+				continue
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+			total -= size
+
+
+def _transformation_name(transformation) -> str:
+	# The name tequila.chemistry.Molecule looks the transformation up by, e.g. 'jordanwigner' for
+	# 'jordan-wigner', None and the JordanWigner object of a molecule.
+	if transformation is None:
+		transformation = 'JordanWigner'
+	if not isinstance(transformation, str):
+		names = [name for name, encoding in known_encodings().items() if type(transformation) is encoding]
+		transformation = names[0] if names else getattr(transformation, 'name', str(transformation))
+	return transformation.lower().replace('-', '').replace('_', '')
+
+
+def _active_orbitals(active_orbitals) -> list:
+	# The orbitals the way molecule.active_space.active_orbitals lists them.
+	if active_orbitals is None:
+		return None
+	return list(active_orbitals)
+
+
+def encode_hamiltonian(hamiltonian: tq.QubitHamiltonian) -> typing.Tuple[np.ndarray, np.ndarray]:
+	"""
+	Encodes a hamiltonian as a table of Pauli codes.
+
+	Parameters
+	----------
+		hamiltonian : QubitHamiltonian
+			The hamiltonian to be encoded.
+
+	Returns
+	----------
+	A uint8 array with a row per term and a column per qubit and an array with the coefficients
+	(float64, or complex128 if any of them is complex).
+	"""
+	strings = hamiltonian.paulistrings
+	n_qubits = max(hamiltonian.qubits) + 1 if hamiltonian.qubits else 0
+	paulis = np.zeros((len(strings), n_qubits), dtype=np.uint8)
+	coefficients = np.empty(len(strings), dtype=np.complex128)
+	for i, string in enumerate(strings):
+		for qubit, pauli in string.items():
+			paulis[i, qubit] = PAULI_CODES[pauli.upper()]
+		coefficients[i] = string.coeff
+	if not np.any(coefficients.imag):
+		coefficients = coefficients.real
+	return paulis, coefficients
+
+
+def decode_hamiltonian(paulis: np.ndarray, coefficients: np.ndarray) -> tq.QubitHamiltonian:
+	"""
+	Decodes a hamiltonian encoded with encode_hamiltonian.
+
+	Returns
+	----------
+	A QubitHamiltonian.
+	"""
+	strings = []
+	for row, coeff in zip(paulis, coefficients.tolist()):
+		data = {int(q): PAULI_NAMES[int(row[q])] for q in np.nonzero(row)[0]}
+		strings.append(PauliString(data=data, coeff=coeff))
+	return tq.QubitHamiltonian.from_paulistrings(strings)
@@ -17,6 +17,21 @@ P_ONEQ_GATES_REGEX = r"(Phase|Rx|Ry|Rz)\(target=\(\d+,\)(, control=\((\d+,|\d+(,
 # Regex for the SWAP gate.
 SWAP_GATE_REGEX = r"SWAP\(target=\(\d*, \d*\)(, control=\((\d+,|\d+(, \d+)+|)\))?\)"
 
+# Regex for a gate parameter: a number or a variable name. Variable names may carry an argument
+# list, e.g. f([(1, 0, 1, 0)]).
+PARAMETER_REGEX = r"[-+]?\d+(\.\d*)?([eE][-+]?\d+)?|[A-Za-z_]\w*(\([\w\s,.+\-()\[\]]*\))?"
+
+# Regex for one line of QCircuit.__str__, compiled once and used by parse_gates.
+GATE_LINE_PATTERN = re.compile(
+	r"\s*(?P<name>\w+)\("
+	r"target=\((?P<target>(\d+(, \d+)*,?)?)\)"
+	r"(, control=\((?P<control>(\d+(, \d+)*,?)?)\))?"
+	r"(, parameter=(?P<parameter>" + PARAMETER_REGEX + r"))?"
+	r"\)\s*$"
+)
+NP_ONEQ_GATES = ['X', 'Y', 'Z', 'H']
+P_ONEQ_GATES = ['Phase', 'Rx', 'Ry', 'Rz']
+
 
 @dataclass
 class GateDict:
@@ -121,7 +136,92 @@ def validate_circuit_syntax(circuit: str) -> bool:
 	----------
 	True when the circuit syntax is valid and false otherwise.
 	"""
-	return bool(circuit_pattern().match(circuit))
+	try:
+		for _ in parse_gates(circuit):
+			pass
+	except InvalidSyntaxError:
+		return False
+	return True
+
+
+def parse_gates(circuit: typing.Union[str, typing.Iterable[str]]) -> typing.Iterator[GateDict]:
+	"""
+	Parses the gates of a circuit in a single pass.
+
+	Every line is matched once against a precompiled pattern, so long circuits are parsed in
+	linear time and the gates can be consumed while the rest of the string is being parsed.
+
+	Parameters
+	----------
+		circuit : str, Iterable[str]
+			A string in the format that QCircuit.__str__ prints it, or its lines. The first
+			non-empty line has to be 'circuit:' and at least one gate has to follow it.
+
+	Returns
+	----------
+	An iterator of GateDict dataclasses, one per gate.
+
+	Raises
+	----------
+		InvalidSyntaxError
+			If a line is not a supported gate. The message tells the line number.
+	"""
+	if isinstance(circuit, str):
+		circuit = circuit.splitlines()
+	header = False
+	gates = 0
+	match_gate = GATE_LINE_PATTERN.match
+	for number, line in enumerate(circuit, 1):
+		if not header:
+			if line.strip() == 'circuit:':
+				header = True
+			elif line.strip():
+				raise InvalidSyntaxError(f'Line {number}: expected "circuit:", got {line!r}')
+			continue
+		match = match_gate(line)
+		if match is None:
+			if not line.strip():
+				continue
+			raise InvalidSyntaxError(f'Line {number}: invalid gate {line!r}')
+		gate = GateDict(
+			name=match['name'],
+			target=_qubits(match['target']),
+			control=_qubits(match['control']),
+			parameter=_parameter(match['parameter'])
+		)
+		if not _valid_gate(gate):
+			raise InvalidSyntaxError(f'Line {number}: unsupported gate {line!r}')
+		gates += 1
+		yield gate
+	if not gates:
+		raise InvalidSyntaxError('The circuit has no gates')
+
+
+def _qubits(values: str) -> typing.List[int]:
+	if values is None:
+		return None
+	return [int(n) for n in values.split(',') if n]
+
+
+def _parameter(parameter: str) -> typing.Union[str, float]:
+	if parameter is None:
+		return None
+	try:
+		return float(parameter)
+	except ValueError:
+		return parameter
+
+
+def _valid_gate(gate: GateDict) -> bool:
+	if gate.name == 'SWAP':
+		return len(gate.target) == 2 and gate.parameter is None
+	if gate.control == [] or len(gate.target) != 1:
+		return False
+	if gate.name in NP_ONEQ_GATES:
+		return gate.parameter is None
+	if gate.name in P_ONEQ_GATES:
+		return gate.parameter is not None
+	return False
 
 
 def get_one_gate_data_from_string(string: str, data: str) -> typing.List[int]:
@@ -234,18 +334,14 @@ def circuit_from_string(circuit: str) -> QCircuit:
 	Returns
 	----------
 	A QCircuit object representing a circuit.
+
+	Raises
+	----------
+		InvalidSyntaxError
+			If the string is not a valid circuit. The message tells the line number.
 	"""
-	if not validate_circuit_syntax(circuit):
-		raise InvalidSyntaxError
-	gate_regex = re.compile(
-		f'({NP_ONEQ_GATES_REGEX}|{P_ONEQ_GATES_REGEX}|{SWAP_GATE_REGEX})'
-	)
-	# Finds all invidual gates.
-	gates = gate_regex.findall(circuit)
-	gates = [gate_string_to_dict(g[0]) for g in gates]
-	if not gates:
-		return None
-	circuit = gate_from_gate_dict(gates[0])
-	for gate in gates[1:]:
-		circuit += gate_from_gate_dict(gate)
-	return circuit
+	gates = []
+	for gate in parse_gates(circuit):
+		gates += gate_from_gate_dict(gate).gates
+	# Creating the circuit once is faster than adding the gates to it one by one.
+	return QCircuit(gates=gates)
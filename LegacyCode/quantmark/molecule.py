@@ -5,6 +5,7 @@ from tequila.quantumchemistry.qc_base import QuantumChemistryBase
 from quantmark.exceptions import InvalidSyntaxError, DuplicateValueError
 from quantmark.create_multiline_regex import create_multiline_regex
 from quantmark.decorators.cached import cached
+from quantmark.cache import MoleculeCache
 
 SUPPORTED_ATOMS = [
 	"H", "He", "Li", "Be", "B", "C", "N", "O", "F", "Ne", "Na", "Mg", "Al",
@@ -150,6 +151,7 @@ def create(
 	transformation: typing.Union[str, typing.Callable] = None,
 	backend: str = None,
 	guess_wfn=None,
+	cache: MoleculeCache = None,
 	*args,
 	**kwargs
 ) -> QuantumChemistryBase:
@@ -157,9 +159,23 @@ def create(
 	Uses the tequila.chemistry.Molecule function to create molecule
 	object. Only difference is that active orbitals can be given as
 	string.
+
+	When a MoleculeCache is given the molecule is rebuilt from the cached integrals if the same
+	molecule has been created before.
 	"""
 	if isinstance(active_orbitals, str):
 		active_orbitals = orbitals_from_string(active_orbitals)
+	if cache is not None:
+		molecule, _ = cache.get(
+			geometry=geometry,
+			basis_set=basis_set,
+			transformation=transformation,
+			active_orbitals=active_orbitals,
+			backend=backend,
+			guess_wfn=guess_wfn,
+			**kwargs
+		)
+		return molecule
 	return tq.chemistry.Molecule(
 		geometry=geometry,
 		basis_set=basis_set,
@@ -1,5 +1,96 @@
 
 
+import tequila as tq
+from tequila.objective.objective import format_variable_dictionary, assign_variable
+from tequila.optimizers.optimizer_gd import OptimizerGD
+from tequila.optimizers.optimizer_scipy import OptimizerSciPy
+
+
+class CompiledObjective:
+	"""
+	An objective compiled for a backend together with its gradients, so that it can be minimized
+	many times while paying only for the simulation.
+
+	Attributes
+	----------
+		objective : Objective
+			The objective that was compiled.
+		compiled : Objective
+			The objective compiled for the backend.
+		gradients : dict
+			The gradient objectives of the variables, as tuples (gradient, compiled gradient). Empty
+			if the gradients were not compiled.
+		backend : str
+			The backend the objective was compiled for.
+	"""
+	def __init__(
+		self,
+		objective,
+		backend: str = None,
+		gradients: bool = True,
+		samples: int = None,
+		device=None,
+		noise=None
+	):
+		"""
+		Compiles an objective and, optionally, its gradients.
+
+		Parameters
+		----------
+			objective :
+				The objective to be compiled.
+			backend : str
+				The backend (simulator) to compile for.
+			gradients : bool
+				If True the gradients with respect to every variable are compiled as well.
+			samples : int
+				The samples the objective is going to be evaluated with.
+			device :
+				The device the objective is going to be evaluated on.
+			noise :
+				The noise model the objective is going to be evaluated with.
+		"""
+		self.objective = objective
+		self.backend = tq.pick_backend(backend, samples=samples, noise=noise, device=device)
+		options = {'backend': self.backend, 'samples': samples, 'device': device, 'noise': noise}
+		self.compiled = tq.compile(objective, **options)
+		self.gradients = {}
+		if gradients:
+			for variable in objective.extract_variables():
+				gradient = tq.grad(objective, variable)
+				self.gradients[variable] = (gradient, tq.compile(gradient, **options))
+
+
+class _Precompiled:
+	"""
+	Mixin for the tequila optimizer classes that makes them use the objective and gradients of a
+	CompiledObjective instead of compiling them.
+	"""
+	def __init__(self, precompiled: CompiledObjective, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.precompiled = precompiled
+
+	def compile_objective(self, objective, *args, **kwargs):
+		if objective is self.precompiled.objective:
+			return self.precompiled.compiled
+		return super().compile_objective(objective, *args, **kwargs)
+
+	def compile_gradient(self, objective, variables, gradient=None, *args, **kwargs):
+		gradients = self.precompiled.gradients
+		precompiled = objective is self.precompiled.objective and gradient is None
+		if not precompiled or any(k not in gradients for k in variables):
+			return super().compile_gradient(objective, variables, gradient, *args, **kwargs)
+		return {k: gradients[k][0] for k in variables}, {k: gradients[k][1] for k in variables}
+
+
+class _PrecompiledSciPy(_Precompiled, OptimizerSciPy):
+	pass
+
+
+class _PrecompiledGD(_Precompiled, OptimizerGD):
+	pass
+
+
 class QMOptimizer:
 	"""
 	A class that holds information about a optimizer and can be given as a parameter to an
@@ -9,7 +100,9 @@ class QMOptimizer:
 
 	Methods
 	-------
-		minimize(objective, backend=None, silent=True):
+		compile(objective, backend=None) -> CompiledObjective:
+			Compiles an objective and the gradients the optimizer needs once for a backend.
+		minimize(objective, backend=None, silent=True, maxiter=None, initial_values=None):
 			Runs the optimizer on a given objective.
 	"""
 	def __init__(
@@ -65,12 +158,59 @@ class QMOptimizer:
 	def method(self):
 		return self._method
 
+	@property
+	def uses_gradient(self) -> bool:
+		"""True if the method evaluates the gradient of the objective."""
+		if self._module == 'gd':
+			return True
+		if self._module == 'scipy':
+			methods = OptimizerSciPy.gradient_based_methods + OptimizerSciPy.hessian_based_methods
+			return self._method.upper() in [m.upper() for m in methods]
+		return False
+
+	@property
+	def deterministic(self) -> bool:
+		"""
+		True if the optimizer always takes the same steps from the same initial values. The scipy
+		and gradient descent methods do when the objective is simulated exactly, without samples
+		or noise.
+		"""
+		if self._module not in ['scipy', 'gd']:
+			return False
+		return self._kwarks.get('samples') is None and self._kwarks.get('noise') is None
+
+	def compile(self, objective, backend: str = None) -> CompiledObjective:
+		"""
+		Compiles an objective, and its gradients if the method uses them, once for a backend. The
+		result can be given to minimize in place of the objective any number of times.
+
+		Parameters
+		----------
+			objective :
+				The objective to be compiled.
+			backend : str
+				The backend (simulator) to be used.
+
+		Returns
+		----------
+		A CompiledObjective.
+		"""
+		return CompiledObjective(
+			objective,
+			backend=backend,
+			gradients=self.uses_gradient,
+			samples=self._kwarks.get('samples'),
+			device=self._kwarks.get('device'),
+			noise=self._kwarks.get('noise')
+		)
+
 	def minimize(
 		self,
 		objective,
 		backend: str = None,
 		silent: bool = True,
 		maxiter: int = None,
+		initial_values=None
 	):
 		"""
 			Runs the optimizer on a given objective.
@@ -78,26 +218,43 @@ class QMOptimizer:
 		Parameters
 		----------
 			objective :
-				The objective to be minimized.
+				The objective to be minimized, or a CompiledObjective returned by compile.
 			backend : str
-				The backend (simulator) to be used.
+				The backend (simulator) to be used. A CompiledObjective is run on the backend it was
+				compiled for.
 			silent : bool
 				If True the minimizing process will not print information while it is running.
 			maxiter : int
 				The maximum amount of iterations, before the optimizer is stopped.
+			initial_values : dict, float or str, optional
+				The values the variables start from: a value for each variable, a value for all of
+				them or 'zero'. If None, each variable starts from a random value between 0 and 2pi.
 
 		Returns
 		----------
 		The result from the minimizing process.
+
+		Raises
+		----------
+			ValueError
+				If the initial values are not valid, or if a CompiledObjective is run by a scipy
+				or gd optimizer that was given positional arguments.
 		"""
 		if not maxiter:
 			maxiter = self.maxiter
+		if isinstance(objective, CompiledObjective):
+			variables = objective.objective.extract_variables()
+		else:
+			variables = objective.extract_variables()
+		initial_values = _format_initial_values(initial_values, variables)
+		if isinstance(objective, CompiledObjective):
+			return self._minimize_compiled(objective, silent, maxiter, initial_values)
 		return self._minimize(
 			objective=objective,
 			method=self._method,
 			gradient=None,
 			hessian=None,
-			initial_values=None,
+			initial_values=initial_values,
 			variables=None,
 			backend=backend,
 			silent=silent,
@@ -106,3 +263,54 @@ class QMOptimizer:
 			*self._args,
 			**self._kwarks
 		)
+
+	def _minimize_compiled(
+		self,
+		objective: CompiledObjective,
+		silent: bool,
+		maxiter: int,
+		initial_values: dict
+	):
+		if self._args and self._module in ['scipy', 'gd']:
+			# The optimizer classes take keyword arguments only
+			raise ValueError(
+				'Positional arguments cannot be passed to a compiled '
+				f'{self._module} optimizer, give them as keyword arguments.'
+			)
+		options = dict(
+			self._kwarks, backend=objective.backend, silent=silent, maxiter=maxiter, tol=1.e-13
+		)
+		if self._module == 'scipy':
+			if options.get('method_bounds') is not None:
+				options['method_bounds'] = format_variable_dictionary(options['method_bounds'])
+			optimizer = _PrecompiledSciPy(objective, method=self._method, **options)
+		elif self._module == 'gd':
+			optimizer = _PrecompiledGD(objective, method=self._method, **options)
+		else:
+			# The other modules do not use a gradient and keep an objective that is already compiled
+			return self._minimize(
+				objective=objective.compiled,
+				method=self._method,
+				initial_values=initial_values,
+				variables=None,
+				backend=objective.backend,
+				silent=silent,
+				tol=1.e-13,
+				maxiter=maxiter,
+				*self._args,
+				**self._kwarks
+			)
+		return optimizer(objective=objective.objective, initial_values=initial_values)
+
+
+def _format_initial_values(initial_values, variables) -> dict:
+	"""Turns the initial values accepted by QMOptimizer.minimize into a dictionary or None."""
+	if initial_values is None:
+		return None
+	if isinstance(initial_values, str):
+		if initial_values.lower() != 'zero':
+			raise ValueError(f'Unknown initial values {initial_values}, use \'zero\'.')
+		initial_values = 0.0
+	if hasattr(initial_values, 'items'):
+		return {assign_variable(k): v for k, v in initial_values.items()}
+	return {k: float(initial_values) for k in variables}
@@ -0,0 +1,175 @@
+import os
+import json
+import tempfile
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from tequila.quantumchemistry.qc_base import QuantumChemistryBase
+import quantmark.molecule
+
+DEFAULT_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'quantmark', 'fci.json')
+
+
+class ReferenceEnergies:
+	"""
+	A local store of FCI reference energies.
+
+	The energies are keyed by the geometry, basis set and active space and kept in a JSON file so
+	that each reference energy is computed only once. The file has the same layout as the one used
+	by libmark.ReferenceEnergies, so a store filled from the QuantMark server can be read here.
+
+	Attributes
+	----------
+		file : str
+			The JSON file where the energies are kept.
+
+	Methods
+	-------
+		get(geometry, basis_set, active_orbitals=None):
+			Returns a stored energy or None.
+		fci(molecule):
+			Returns the FCI energy of a molecule, computing it if it is not stored.
+		compute(geometries, basis_set, active_orbitals=None, workers=None):
+			Computes the FCI energies of many molecules, optionally in parallel.
+	"""
+	def __init__(self, file: str = None):
+		"""
+		Creates a ReferenceEnergies object.
+
+		Parameters
+		----------
+			file : str, optional
+				The JSON file where the energies are kept. Defaults to $QUANTMARK_FCI_FILE or
+				~/.cache/quantmark/fci.json.
+		"""
+		if file is None:
+			file = os.environ.get('QUANTMARK_FCI_FILE', DEFAULT_FILE)
+		self.file = file
+		self._energies = {}
+		self._tables = {}
+		if os.path.isfile(file):
+			with open(file, 'r') as f:
+				data = json.load(f)
+			self._energies = data['energies']
+			self._tables = data['tables']
+
+	def get(self, geometry: str, basis_set: str, active_orbitals: list = None) -> float:
+		"""
+		Returns
+		----------
+		The stored energy or None if it has not been computed.
+		"""
+		return self._energies.get(energy_key(geometry, basis_set, active_orbitals))
+
+	def fci(self, molecule: QuantumChemistryBase) -> float:
+		"""
+		Returns the FCI energy of a molecule. It is computed and stored if it is not in the store.
+
+		Parameters
+		----------
+			molecule : QuantumChemistryBase
+				A molecule made with tequila.chemistry.Molecule or quantmark.molecule.create.
+
+		Returns
+		----------
+		The FCI energy.
+		"""
+		key = molecule_key(molecule)
+		if key not in self._energies:
+			self._energies[key] = molecule.compute_energy(method='fci')
+			self.save()
+		return self._energies[key]
+
+	def compute(
+		self,
+		geometries: typing.List[str],
+		basis_set: str,
+		active_orbitals: typing.Union[dict, list, str] = None,
+		workers: int = None
+	) -> typing.List[float]:
+		"""
+		Computes the FCI energies that are not yet stored for a list of molecules.
+
+		Parameters
+		----------
+			geometries : List[str]
+				The geometries of the molecules, for example the points of a dissociation curve.
+			basis_set : str
+				The basis set of the molecules.
+			active_orbitals : dict, list, str, optional
+				The active orbitals, as accepted by quantmark.molecule.create.
+			workers : int, optional
+				The amount of processes used to compute the energies in parallel.
+
+		Returns
+		----------
+		A list with the FCI energies in the order of the geometries.
+		"""
+		# The keys come from the inputs, molecules are created only for the missing energies
+		if isinstance(active_orbitals, str):
+			active_orbitals = quantmark.molecule.orbitals_from_string(active_orbitals)
+		orbitals = None if active_orbitals is None else list(active_orbitals)
+		keys = [energy_key(g, basis_set, orbitals) for g in geometries]
+		missing = {}
+		for key, geometry in zip(keys, geometries):
+			if key not in self._energies:
+				missing.setdefault(key, geometry)
+		arguments = [(g, basis_set, active_orbitals) for g in missing.values()]
+		if workers is not None and workers > 1 and len(arguments) > 1:
+			with ProcessPoolExecutor(max_workers=workers) as executor:
+				computed = list(executor.map(_compute_fci, *zip(*arguments)))
+		else:
+			computed = [_compute_fci(*a) for a in arguments]
+		for key, (key_of_molecule, energy) in zip(missing, computed):
+			# Also under the key of the molecule, which fci(molecule) looks up
+			self._energies[key] = energy
+			self._energies[key_of_molecule] = energy
+		if missing:
+			self.save()
+		return [self._energies[key] for key in keys]
+
+	def save(self) -> None:
+		"""Writes the energies to the file."""
+		directory = os.path.dirname(os.path.abspath(self.file))
+		os.makedirs(directory, exist_ok=True)
+		fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+		with os.fdopen(fd, 'w') as f:
+			json.dump({'energies': self._energies, 'tables': self._tables}, f)
+		os.replace(tmp, self.file)
+
+
+def energy_key(geometry: str, basis_set: str, active_orbitals: list = None) -> str:
+	"""
+	Creates the key of a reference energy. Coordinates are compared as numbers.
+
+	Returns
+	----------
+	A string identifying the geometry, basis set and active space.
+	"""
+	atoms = []
+	for line in geometry.strip().splitlines():
+		atom, *coordinates = line.split()
+		atoms.append(' '.join([atom] + [repr(float(c)) for c in coordinates]))
+	return '|'.join([
+		str(basis_set).lower(),
+		json.dumps(active_orbitals, sort_keys=True),
+		';'.join(atoms)
+	])
+
+
+def molecule_key(molecule: QuantumChemistryBase) -> str:
+	"""
+	Creates the key of the reference energy of a molecule.
+
+	Returns
+	----------
+	A string identifying the geometry, basis set and active space of the molecule.
+	"""
+	active_orbitals = None
+	if molecule.active_space is not None:
+		active_orbitals = list(molecule.active_space.active_orbitals)
+	return energy_key(molecule.parameters.geometry, molecule.parameters.basis_set, active_orbitals)
+
+
+def _compute_fci(geometry, basis_set, active_orbitals) -> typing.Tuple[str, float]:
+	molecule = quantmark.molecule.create(geometry, basis_set, active_orbitals=active_orbitals)
+	return molecule_key(molecule), molecule.compute_energy(method='fci')
@@ -0,0 +1,93 @@
+import time
+from contextlib import contextmanager
+
+
+class Timings:
+	"""
+	Wall time spent in the named phases of the algorithm.
+
+	A phase is timed with time.perf_counter each time it is entered and the seconds and the
+	number of calls are summed per name. Timing a phase costs about a microsecond, so the timings
+	are always recorded.
+
+	Attributes
+	----------
+		seconds : dict
+			The total seconds spent in each phase.
+		counts : dict
+			How many times each phase was entered.
+
+	Methods
+	-------
+		phase(name):
+			A context manager that adds the time spent in it to the phase.
+		add(name, seconds, count=1):
+			Adds time to a phase.
+		update(timings):
+			Adds the phases of another Timings object or of a dictionary from as_dict.
+		as_dict() -> dict:
+			Returns the phases as a dictionary.
+	"""
+	def __init__(self):
+		"""Creates an empty Timings object."""
+		self.seconds = {}
+		self.counts = {}
+
+	@contextmanager
+	def phase(self, name: str):
+		"""
+		Times the code run inside the with statement.
+
+		Parameters
+		----------
+			name : str
+				The name of the phase, e.g. 'minimize'.
+		"""
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.add(name, time.perf_counter() - start)
+
+	def add(self, name: str, seconds: float, count: int = 1):
+		"""
+		Adds time to a phase.
+
+		Parameters
+		----------
+			name : str
+				The name of the phase.
+			seconds : float
+				The time spent in the phase.
+			count : int
+				How many times the phase was entered during that time.
+		"""
+		self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+		self.counts[name] = self.counts.get(name, 0) + count
+
+	def update(self, timings):
+		"""
+		Adds the phases of another Timings object or of a dictionary returned by as_dict.
+
+		Parameters
+		----------
+			timings : Timings or dict
+				The timings to be added.
+		"""
+		if isinstance(timings, Timings):
+			timings = timings.as_dict()
+		for name, phase in timings.items():
+			self.add(name, phase['seconds'], phase['count'])
+
+	def as_dict(self) -> dict:
+		"""
+		Returns the phases as a dictionary.
+
+		Returns
+		----------
+		A dictionary {name: {'seconds': float, 'count': int}}.
+		"""
+		return {
+			name: {'seconds': self.seconds[name], 'count': self.counts[name]}
+			for name in self.seconds
+		}
@@ -1,11 +1,19 @@
+import numpy as np
 import tequila as tq
+from concurrent.futures import ProcessPoolExecutor
 
 from tequila.circuit import QCircuit as Circuit
 from tequila import QubitHamiltonian
 from quantmark.qm_backend import QMBackend as Backend
 from quantmark.qm_optimizer import QMOptimizer as Optimizer
 from quantmark.vqe.vqe_result import VQEResult as Result
+from quantmark.vqe.vqe_result import (
+	CHEMICAL_ACCURACY, find_target_value, mean_interval, success_rate_interval
+)
 from quantmark.circuit import CircuitInfo, circuit_from_string
+from quantmark.cache import MoleculeCache
+from quantmark.reference_energies import ReferenceEnergies
+from quantmark.timing import Timings
 
 
 class VQEAlgorithm:
@@ -35,13 +43,19 @@ class VQEAlgorithm:
 		max_iterations : int
 			The maximum iterations for the minimizing process. After this the algorithm is
 			forced to stop.
+		cache : MoleculeCache
+			If given, the hamiltonian of the molecule is read from this cache.
+		reference_energies : ReferenceEnergies
+			If given, the FCI target value of the molecule is read from this store.
+		initial_values : dict, float, str or callable
+			The values the variables start from in every repetition. See __init__.
 	Methods
 	-------
 		analyze_circuit() -> CircuitInfo:
 			Analyzes only the circuit without running the algorithm.
-		analyze(self) -> VQEResult:
+		analyze(workers=None, seed=None, tolerance=None, energy_tolerance=None) -> VQEResult:
 			Analyzes the algorithm. This runs the algorithm many times (repetitions) meaning that it
-			can take a long time.
+			can take a long time. The repetitions can be run in parallel.
 	"""
 	def __init__(
 		self,
@@ -53,7 +67,10 @@ class VQEAlgorithm:
 		silent: bool = True,
 		repetitions: int = 10,
 		target_value: float = None,
-		max_iterations: int = 100
+		max_iterations: int = 100,
+		cache: MoleculeCache = None,
+		reference_energies: ReferenceEnergies = None,
+		initial_values=None
 	):
 		"""
 		Creates a VQEAlgorithm object.
@@ -80,6 +97,20 @@ class VQEAlgorithm:
 			max_iterations : int
 				The maximum iterations for the minimizing process. After this the algorithm is
 				forced to stop.
+			cache : MoleculeCache, optional
+				If given, the hamiltonian of the molecule is read from this cache so that it is
+				computed only once for the same molecule.
+			reference_energies : ReferenceEnergies, optional
+				If given, the FCI target value of the molecule is read from this store so that it
+				is computed only once for the same molecule.
+			initial_values : dict, float, str or callable, optional
+				The values the variables start from in every repetition: a value for each variable,
+				a value for all of them or 'zero'. A deterministic optimizer (see
+				QMOptimizer.deterministic) then takes the same steps in every repetition, so it is
+				run only once. A callable draws a random start for each repetition, it is called
+				with a numpy Generator for each variable, for example
+				lambda rng: rng.normal(scale=0.1). If None, each variable starts from a random value
+				between 0 and 2pi.
 		"""
 		if not molecule and not hamiltonian:
 			raise Exception('You have give to a molecule or a hamiltonian.')
@@ -94,6 +125,9 @@ class VQEAlgorithm:
 		self._repetitions = repetitions
 		self._target_value = target_value
 		self._max_iterations = max_iterations
+		self._cache = cache
+		self._reference_energies = reference_energies
+		self._initial_values = initial_values
 
 	@property
 	def circuit(self):
@@ -188,6 +222,33 @@ class VQEAlgorithm:
 	def max_iterations(self, max_iterations):
 		self._max_iterations = max_iterations
 
+	@property
+	def cache(self):
+		"""If given, the hamiltonian of the molecule is read from this cache."""
+		return self._cache
+
+	@cache.setter
+	def cache(self, cache):
+		self._cache = cache
+
+	@property
+	def reference_energies(self):
+		"""If given, the FCI target value of the molecule is read from this store."""
+		return self._reference_energies
+
+	@reference_energies.setter
+	def reference_energies(self, reference_energies):
+		self._reference_energies = reference_energies
+
+	@property
+	def initial_values(self):
+		"""The values the variables start from in every repetition."""
+		return self._initial_values
+
+	@initial_values.setter
+	def initial_values(self, initial_values):
+		self._initial_values = initial_values
+
 	def analyze_circuit(self) -> CircuitInfo:
 		"""
 		Analyzes only the circuit without running the algorithm.
@@ -198,11 +259,51 @@ class VQEAlgorithm:
 		"""
 		return CircuitInfo(self.circuit)
 
-	def analyze(self) -> Result:
+	def analyze(
+		self,
+		workers: int = None,
+		seed: int = None,
+		tolerance: float = None,
+		energy_tolerance: float = None,
+		min_repetitions: int = 5
+	) -> Result:
 		"""
 		Analyzes the algorithm. This runs the algorithm many times (repetitions) meaning that it
 		can take a long time.
 
+		The repetitions of a deterministic optimizer starting from fixed initial values would all
+		be the same, so it is run once and the result is used for every repetition. The timings
+		of the other repetitions are then empty.
+
+		The objective and the gradients the optimizer needs are compiled for the backend once, and
+		once in each worker process when run in parallel, and reused by all repetitions.
+
+		The time spent in the phases 'hamiltonian', 'objective', 'compile' and 'minimize' is
+		recorded in total and for each repetition, see VQEResult.timings. In parallel the time a
+		worker spends compiling is part of the first repetition it runs.
+
+		Parameters
+		----------
+			workers : int, optional
+				The amount of processes the repetitions are run in. They are run one after another
+				in this process if not given.
+			seed : int, optional
+				Seeds the random numbers of the repetitions, for example the random initial values
+				of the variables (see initial_values). Each repetition is seeded with its own seed
+				derived from this one, so the results are the same whether the repetitions are run
+				in parallel or not. Without a seed the repetitions are run in parallel with fresh
+				random seeds and in this process without seeding.
+			tolerance : float, optional
+				Run the repetitions sequentially, stopping as soon as the 95% confidence interval of
+				the success rate is at most this far from the success rate. Needs a target value or
+				a molecule. The repetitions are then a budget that is used only if needed, and the
+				reason of stopping and the intervals are recorded in VQEResult.stopping.
+			energy_tolerance : float, optional
+				Like tolerance, for the 95% confidence interval of the mean final energy. When both
+				are given, both intervals have to be narrow enough.
+			min_repetitions : int
+				The amount of repetitions run at least before stopping on a tolerance.
+
 		Returns
 		----------
 		A VQEResult object that stores information about the algorithm and the runs of it. The VQEResult
@@ -212,19 +313,36 @@ class VQEAlgorithm:
 			raise Exception('You have give to a molecule or a hamiltonian.')
 		if self._molecule and self._hamiltonian:
 			raise Exception('You have give to a molecule or a hamiltonian not both.')
-		if self._molecule:
-			objective = tq.ExpectationValue(H=self._molecule.make_hamiltonian(), U=self._circuit)
-		if self._hamiltonian:
-			objective = tq.ExpectationValue(H=self._hamiltonian, U=self._circuit)
-
-		results = [None] * self._repetitions
-		for i in range(self._repetitions):
-			results[i] = self._optimizer.minimize(
-				objective=objective,
-				backend=self._backend.backend,
-				silent=self._silent,
-				maxiter=self._max_iterations
-			)
+		timings = Timings()
+		with timings.phase('hamiltonian'):
+			if self._molecule and self._cache:
+				hamiltonian = self._cache.hamiltonian(self._molecule)
+			elif self._molecule:
+				hamiltonian = self._molecule.make_hamiltonian()
+			if self._hamiltonian:
+				hamiltonian = self._hamiltonian
+		with timings.phase('objective'):
+			objective = tq.ExpectationValue(H=hamiltonian, U=self._circuit)
+
+		stop = None
+		if tolerance is not None or energy_tolerance is not None:
+			stop = self._stopping_rule(tolerance, energy_tolerance, min_repetitions)
+		target_value = self._target_value if stop is None else stop.target_value
+
+		runs = self._repetitions
+		fixed_start = self._initial_values is not None and not callable(self._initial_values)
+		if fixed_start and self._optimizer.deterministic:
+			runs = 1
+		repetitions = self._run(objective, runs, workers, seed, stop)
+
+		results = [result for result, _ in repetitions]
+		repetition_timings = [repetition for _, repetition in repetitions]
+		stopping = None if stop is None else stop.report(results, runs < self._repetitions)
+		if runs < self._repetitions:
+			results = results * self._repetitions
+			repetition_timings += [{}] * (self._repetitions - runs)
+		for repetition in repetition_timings:
+			timings.update(repetition)
 		return Result(
 			self._circuit,
 			self._optimizer,
@@ -232,6 +350,165 @@ class VQEAlgorithm:
 			results,
 			molecule=self._molecule,
 			hamiltonian=self._hamiltonian,
-			target_value=self._target_value,
-			max_iterations=self._max_iterations
+			target_value=target_value,
+			max_iterations=self._max_iterations,
+			reference_energies=self._reference_energies,
+			timings={'total': timings.as_dict(), 'repetitions': repetition_timings},
+			stopping=stopping
+		)
+
+	def _stopping_rule(self, tolerance, energy_tolerance, min_repetitions):
+		"""The stopping rule of a sequential analyze."""
+		target_value = self._target_value
+		if tolerance is not None:
+			target_value = find_target_value(
+				self._target_value, self._molecule, self._reference_energies
+			)
+			if target_value is None:
+				raise ValueError('A tolerance on the success rate needs a target value.')
+		return _StoppingRule(target_value, tolerance, energy_tolerance, min_repetitions)
+
+	def _run(self, objective, runs: int, workers: int, seed: int, stop=None) -> list:
+		"""
+		Runs the repetitions of analyze, returns a list of (result, timings). If given, stop is
+		called with the results so far after each repetition, or after each batch of one
+		repetition per worker, and the remaining repetitions are not run once it returns True.
+		"""
+		parallel = workers is not None and workers > 1 and runs > 1
+		seeds = [None] * runs
+		if seed is not None or parallel:
+			# Forked workers share the random state of this process, so they are always seeded
+			seeds = np.random.SeedSequence(seed).generate_state(runs).tolist()
+		initial_values = [self._initial_values] * runs
+		if callable(self._initial_values):
+			# Drawn here, the distribution may not be picklable
+			variables = objective.extract_variables()
+			initial_values = [
+				{k: float(self._initial_values(rng)) for k in variables}
+				for rng in map(np.random.default_rng, seeds)
+			]
+		arguments = [
+			(self._optimizer, self._silent, self._max_iterations, v, s)
+			for v, s in zip(initial_values, seeds)
+		]
+		compile_arguments = (self._optimizer, objective, self._backend.backend)
+		repetitions = []
+		if parallel:
+			batches = [arguments]
+			if stop is not None:
+				batches = [arguments[i:i + workers] for i in range(0, runs, workers)]
+			with ProcessPoolExecutor(
+				max_workers=workers, initializer=_init_worker, initargs=compile_arguments
+			) as executor:
+				for batch in batches:
+					repetitions += executor.map(_run_repetition, *zip(*batch))
+					if stop is not None and stop([result for result, _ in repetitions]):
+						break
+			return repetitions
+		compiled, compile_timings = _compile(*compile_arguments)
+		for a in arguments:
+			repetitions.append(_run_repetition(*a, compiled, compile_timings))
+			compile_timings = None
+			if stop is not None and stop([result for result, _ in repetitions]):
+				break
+		return repetitions
+
+
+class _StoppingRule:
+	"""
+	Decides when the sequential analysis of VQEAlgorithm.analyze has run enough repetitions: when
+	the half widths of the 95% confidence intervals of the success rate and of the mean final
+	energy are within their tolerances.
+	"""
+	def __init__(self, target_value, tolerance, energy_tolerance, min_repetitions):
+		self.target_value = target_value
+		self.tolerance = tolerance
+		self.energy_tolerance = energy_tolerance
+		self.min_repetitions = max(min_repetitions, 2)
+		self.stopped = False
+
+	def intervals(self, results) -> tuple:
+		"""The confidence intervals of the success rate and the mean final energy, or None."""
+		energies = [result.history.energies[-1] for result in results]
+		success_rate = None
+		if self.tolerance is not None:
+			successes = sum(abs(e - self.target_value) <= CHEMICAL_ACCURACY for e in energies)
+			success_rate = success_rate_interval(successes, len(energies))
+		energy = None
+		if self.energy_tolerance is not None and len(energies) > 1:
+			energy = mean_interval(energies)
+		return success_rate, energy
+
+	def __call__(self, results) -> bool:
+		if len(results) < self.min_repetitions:
+			return False
+		success_rate, energy = self.intervals(results)
+		narrow = [
+			interval is None or (interval[1] - interval[0]) / 2 <= tolerance
+			for interval, tolerance in [(success_rate, self.tolerance), (energy, self.energy_tolerance)]
+		]
+		self.stopped = all(narrow)
+		return self.stopped
+
+	def report(self, results, deterministic: bool) -> dict:
+		"""The stopping reason and intervals recorded in VQEResult.stopping."""
+		reason = 'tolerance' if self.stopped else 'budget'
+		if deterministic:
+			reason = 'deterministic'
+		success_rate, energy = self.intervals(results)
+		return {
+			'reason': reason,
+			'repetitions': len(results),
+			'success_rate_interval': success_rate,
+			'energy_interval': energy
+		}
+
+
+# The compiled objective and the compile timings of a worker process, see _init_worker
+_worker = None
+
+
+def _compile(optimizer, objective, backend):
+	"""Compiles the objective for the repetitions, returns it with the time it took."""
+	timings = Timings()
+	with timings.phase('compile'):
+		compiled = optimizer.compile(objective, backend)
+	return compiled, timings.as_dict()
+
+
+def _init_worker(optimizer, objective, backend):
+	"""Compiles the objective once in a worker process, compiled objectives cannot be pickled."""
+	global _worker
+	_worker = _compile(optimizer, objective, backend)
+
+
+def _run_repetition(
+	optimizer,
+	silent,
+	max_iterations,
+	initial_values,
+	seed,
+	compiled=None,
+	compile_timings=None
+):
+	"""
+	Runs one repetition of VQEAlgorithm.analyze, in a worker process when run in parallel. The
+	compile timings are added to the timings of the repetition.
+	"""
+	global _worker
+	if compiled is None:
+		compiled, compile_timings = _worker
+		_worker = (compiled, None)
+	if seed is not None:
+		np.random.seed(seed)
+	repetition = Timings()
+	if compile_timings is not None:
+		repetition.update(compile_timings)
+	with repetition.phase('minimize'):
+		result = optimizer.minimize(
+			objective=compiled,
+			silent=silent,
+			maxiter=max_iterations,
+			initial_values=initial_values
 		)
+	return result, repetition.as_dict()
@@ -5,8 +5,75 @@ import numpy as np
 from tequila.circuit.circuit import QCircuit
 from quantmark.circuit import CircuitInfo
 from quantmark.decorators.cached import cached
+from quantmark.reference_energies import ReferenceEnergies
 
 CHEMICAL_ACCURACY = 1 / 627.5094740631
+# The 97.5th percentile of the standard normal distribution, for 95% confidence intervals
+Z_95 = 1.959963984540054
+
+
+def success_rate_interval(successes: int, runs: int, z: float = Z_95) -> tuple:
+	"""
+	The Wilson score confidence interval of a success rate. Unlike the normal approximation it
+	stays inside [0, 1] and does not collapse when all or none of the runs succeed.
+
+	Parameters
+	----------
+		successes : int
+			The amount of successful runs.
+		runs : int
+			The amount of runs.
+		z : float
+			The quantile of the standard normal distribution, 95% confidence by default.
+
+	Returns
+	----------
+	A tuple (lower, upper).
+	"""
+	p = successes / runs
+	denominator = 1 + z**2 / runs
+	center = (p + z**2 / (2 * runs)) / denominator
+	half_width = z * np.sqrt(p * (1 - p) / runs + z**2 / (4 * runs**2)) / denominator
+	return center - half_width, center + half_width
+
+
+def mean_interval(values, z: float = Z_95) -> tuple:
+	"""
+	The confidence interval of the mean of values with the normal approximation.
+
+	Parameters
+	----------
+		values : list
+			At least two values.
+		z : float
+			The quantile of the standard normal distribution, 95% confidence by default.
+
+	Returns
+	----------
+	A tuple (lower, upper).
+	"""
+	values = np.asarray(values, dtype=np.float64)
+	mean = values.mean()
+	half_width = z * values.std(ddof=1) / np.sqrt(len(values))
+	return mean - half_width, mean + half_width
+
+
+def find_target_value(
+	target_value: float = None,
+	molecule=None,
+	reference_energies: ReferenceEnergies = None
+) -> float:
+	"""
+	The value that the algorithm should reach: the target value if given, otherwise the FCI energy
+	of the molecule, read from the reference energies if given. None if there is neither.
+	"""
+	if target_value:
+		return target_value
+	if molecule and reference_energies is not None:
+		return reference_energies.fci(molecule)
+	if molecule:
+		return molecule.compute_energy(method='fci')
+	return None
 
 
 class VQEResult:
@@ -16,8 +83,21 @@ class VQEResult:
 
 	Attributes
 	----------
+		histories : ndarray
+			The energy histories of the runs as a matrix with a row per run, padded with the last
+			value of each run.
+		history_lengths : ndarray
+			The amount of iterations of each run.
+		final_values : ndarray
+			The value after the last minimizing iteration of each run.
 		average_history : List[float]
 			The average values after minimizing iterations.
+		median_history : List[float]
+			The median values after minimizing iterations.
+		std_history : List[float]
+			The standard deviation of the values after minimizing iterations.
+		convergence_iterations : ndarray
+			The iterations each run took to reach chemical accuracy.
 		accuracy_history : List[float]
 			The average accuracy (compared to target_value) after minimizing iterations.
 		value : float
@@ -55,9 +135,19 @@ class VQEResult:
 			The optimizer that was used.
 		iteration limit : int
 			After how many iterations the minimizer is stopped.
+		reference_energies : ReferenceEnergies
+			The store the FCI target value is read from.
+		timings : dict
+			The time spent in each phase of the analysis, in total and for each repetition.
+		stopping : dict
+			Why a sequential analysis stopped and the confidence intervals it reached.
 
 	Methods
 	----------
+		percentile_history(q) -> List[float]:
+			The q:th percentile of the values after minimizing iterations.
+		history_band(lower=25, upper=75) -> tuple:
+			Two percentile histories, for example to plot a band around the median.
 		__str__ : str
 			Prints a list of some interesting attributes (one per line).
 	"""
@@ -71,6 +161,9 @@ class VQEResult:
 		molecule=None,
 		hamiltonian=None,
 		target_value: float = None,
+		reference_energies: ReferenceEnergies = None,
+		timings: dict = None,
+		stopping: dict = None,
 	):
 		"""
 		Creates a VQEResult object. This should not be used anywhere else than in the
@@ -97,6 +190,13 @@ class VQEResult:
 			target_value:
 				A custom target value that the algorithm should reach. If none given and a molecule
 				is given, this is calulated with the FCI method.
+			reference_energies : ReferenceEnergies
+				If given, the FCI target value is read from this store and computed only if it is
+				not there yet.
+			timings : dict
+				The time spent in each phase of the analysis, recorded by VQEAlgorithm.analyze.
+			stopping : dict
+				Why a sequential analysis stopped, recorded by VQEAlgorithm.analyze.
 		"""
 		self._molecule = molecule
 		self._circuit = circuit
@@ -107,6 +207,11 @@ class VQEResult:
 		self._target_value = target_value
 		self._circuit_info = CircuitInfo(circuit)
 		self._user_set_max_iterations = max_iterations
+		self._reference_energies = reference_energies
+		self._timings = timings
+		self._stopping = stopping
+		self._histories = None
+		self._history_lengths = None
 
 	@property
 	@cached
@@ -115,27 +220,112 @@ class VQEResult:
 		The value that you hope the algorithm reaches. If None and the moleucule parameter
 		is not none, the FCI method is used to calculate a target value for analyzis.
 		"""
-		if self._target_value:
-			return self.target_value
-		if self._molecule:
-			return self._molecule.compute_energy(method='fci')
-		return None
+		return find_target_value(self._target_value, self._molecule, self._reference_energies)
+
+	@property
+	def histories(self) -> np.ndarray:
+		"""
+		The energy histories of the runs as a float64 matrix with a row per run. Runs that took
+		fewer iterations than the longest one are padded with their last value, so that a run
+		that has stopped keeps its final value in the statistics of the later iterations.
+		"""
+		if self._histories is None:
+			self._load_histories()
+		return self._histories
+
+	@property
+	def history_lengths(self) -> np.ndarray:
+		"""The amount of iterations of each run."""
+		if self._history_lengths is None:
+			self._load_histories()
+		return self._history_lengths
+
+	def _load_histories(self):
+		"""Reads the histories of the results into a padded matrix once."""
+		lengths = np.array([len(i.history.energies) for i in self._results], dtype=np.int64)
+		histories = np.empty((len(lengths), lengths.max()), dtype=np.float64)
+		for row, result in zip(histories, self._results):
+			energies = result.history.energies
+			row[:len(energies)] = energies
+			row[len(energies):] = energies[-1]
+		self._histories = histories
+		self._history_lengths = lengths
+
+	@property
+	def final_values(self) -> np.ndarray:
+		"""The value after the last minimizing iteration of each run."""
+		return self.histories[np.arange(len(self.history_lengths)), self.history_lengths - 1]
 
 	@property
 	@cached
 	def average_history(self) -> List[float]:
 		"""The average values after minimizing iterations."""
-		res = [i.history.energies.copy() for i in self._results]
-		longest_history = max([len(i) for i in res])
-
-		# Repeats last values to get a  matrix.
-		for index, value in enumerate(res):
-			target = value
-			target_lenght = len(target)
-			new_value = [target[target_lenght - 1]] * (longest_history - target_lenght)
-			res[index] = target + new_value
-		average_history = np.matrix(res).mean(0, dtype=np.float64).tolist()[0]
-		return average_history
+		return self.histories.mean(axis=0).tolist()
+
+	@property
+	@cached
+	def median_history(self) -> List[float]:
+		"""The median values after minimizing iterations."""
+		return np.median(self.histories, axis=0).tolist()
+
+	@property
+	@cached
+	def std_history(self) -> List[float]:
+		"""The standard deviation of the values after minimizing iterations."""
+		return self.histories.std(axis=0).tolist()
+
+	def percentile_history(self, q: float) -> List[float]:
+		"""
+		The q:th percentile of the values after minimizing iterations.
+
+		Parameters
+		----------
+			q : float
+				The percentile, between 0 and 100.
+
+		Returns
+		----------
+		A list with a value per iteration.
+		"""
+		return np.percentile(self.histories, q, axis=0).tolist()
+
+	def history_band(self, lower: float = 25, upper: float = 75) -> tuple:
+		"""
+		Two percentile histories, for example to plot a band around the median_history.
+
+		Parameters
+		----------
+			lower : float
+				The percentile of the lower edge of the band.
+			upper : float
+				The percentile of the upper edge of the band.
+
+		Returns
+		----------
+		A tuple (lower history, upper history).
+		"""
+		band = np.percentile(self.histories, [lower, upper], axis=0)
+		return band[0].tolist(), band[1].tolist()
+
+	@property
+	@cached
+	def convergence_iterations(self) -> np.ndarray:
+		"""
+		The amount of iterations each run took to reach chemical accuracy ('1 / 627.5094740631')
+		compared to the target_value, NaN for the runs that never reached it. None if there is no
+		target value.
+		"""
+		if not self.target_value:
+			return None
+		iterations = np.full(len(self.history_lengths), np.nan)
+		# In blocks of rows, so that the temporary arrays stay small for long histories
+		block = max(1, 2**24 // self.histories.shape[1])
+		for start in range(0, len(iterations), block):
+			histories = self.histories[start:start + block]
+			reached = np.abs(histories - self.target_value) <= CHEMICAL_ACCURACY
+			first = reached.argmax(axis=1)
+			iterations[start:start + block] = np.where(reached.any(axis=1), first + 1, np.nan)
+		return iterations
 
 	@property
 	def value(self) -> float:
@@ -146,14 +336,13 @@ class VQEResult:
 	@cached
 	def max_iterations(self) -> int:
 		"""The highest amount of iterations the minimizing process took during analyzing."""
-		return len(self.average_history)
+		return int(self.history_lengths.max())
 
 	@property
 	@cached
 	def average_iterations(self) -> float:
 		"""The average amount of iterations that the minimizing process takes."""
-		iteration_counts = [len(i.history.energies) for i in self._results]
-		return sum(iteration_counts) / len(iteration_counts)
+		return float(self.history_lengths.mean())
 
 	@property
 	@cached
@@ -161,7 +350,7 @@ class VQEResult:
 		"""The average accuracy (compared to target_value) after minimizing iterations."""
 		if not self.target_value:
 			return None
-		return [abs(i - self.target_value) for i in self.average_history]
+		return np.abs(np.asarray(self.average_history) - self.target_value).tolist()
 
 	@property
 	def accuracy(self) -> float:
@@ -199,12 +388,7 @@ class VQEResult:
 		"""
 		if not self.target_value:
 			return None
-		success = 0
-		for result in self._results:
-			value = result.history.energies[-1]
-			if abs(value - self.target_value) <= CHEMICAL_ACCURACY:
-				success += 1
-		return success / len(self._results)
+		return float(np.mean(np.abs(self.final_values - self.target_value) <= CHEMICAL_ACCURACY))
 
 	@property
 	def results(self) -> list:
@@ -231,6 +415,33 @@ class VQEResult:
 		"""The optimizer that was used."""
 		return self._optimizer
 
+	@property
+	def reference_energies(self):
+		"""The store the FCI target value is read from."""
+		return self._reference_energies
+
+	@property
+	def timings(self) -> dict:
+		"""
+		The time spent in each phase of the analysis. 'total' has the phases 'hamiltonian',
+		'objective', 'compile' and 'minimize' as {'seconds': float, 'count': int} dictionaries
+		and 'repetitions' the 'compile' and 'minimize' phases of each repetition. Compare the time
+		to solution of optimizers with these.
+		"""
+		return self._timings
+
+	@property
+	def stopping(self) -> dict:
+		"""
+		Why a sequential analysis (VQEAlgorithm.analyze with a tolerance) stopped: 'reason' is
+		'tolerance' when the confidence intervals got narrow enough, 'budget' when all the
+		repetitions were run first and 'deterministic' when the optimizer was run only once.
+		'repetitions' is the amount of repetitions run and 'success_rate_interval' and
+		'energy_interval' are the 95% confidence intervals of the success rate and of the mean
+		final energy, None when they were not used. None if the analysis was not sequential.
+		"""
+		return self._stopping
+
 	@property
 	def iteration_limit(self):
 		"""After how many iterations the minimizer is stopped."""
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+import tequila as tq
+from quantmark import molecule
+from quantmark.cache import MoleculeCache, encode_hamiltonian, decode_hamiltonian
+
+GEOMETRY = 'H 0.0 0.0 0.0\nH 0.0 0.0 0.7'
+
+
+class TestMoleculeCache(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.cache = MoleculeCache(self.directory.name)
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_hamiltonian_survives_encoding(self):
+		hamiltonian = tq.QubitHamiltonian.from_string('0.5*X(0)Z(2)-1.25*Y(1)+0.1')
+		paulis, coefficients = encode_hamiltonian(hamiltonian)
+		self.assertEqual(decode_hamiltonian(paulis, coefficients), hamiltonian)
+
+	def test_created_molecule_is_cached(self):
+		first = molecule.create(GEOMETRY, 'sto-3g', transformation='jordan-wigner', cache=self.cache)
+		second = molecule.create(GEOMETRY, 'sto-3g', transformation='jordan-wigner', cache=self.cache)
+		self.assertEqual(first.make_hamiltonian(), second.make_hamiltonian())
+		self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+	def test_hamiltonian_of_molecule_is_cached(self):
+		mol = tq.chemistry.Molecule(geometry=GEOMETRY, basis_set='sto-3g')
+		hamiltonian = self.cache.hamiltonian(mol)
+		self.assertEqual(self.cache.hamiltonian(mol), hamiltonian)
+		self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+		self.assertEqual(self.cache.stats()['entries'], 1)
+
+	def test_hamiltonian_of_created_molecule_is_cached(self):
+		for transformation in [None, 'jordan-wigner', 'BRAVYI_KITAEV']:
+			mol = molecule.create(
+				GEOMETRY, 'sto-3g', active_orbitals=[0, 1], transformation=transformation,
+				cache=self.cache
+			)
+			hamiltonian = self.cache.hamiltonian(mol)
+			self.assertEqual(hamiltonian, mol.make_hamiltonian())
+		# None is jordan-wigner, only the first and last molecules are computed
+		self.assertEqual((self.cache.hits, self.cache.misses), (4, 2))
+		self.assertEqual(self.cache.stats()['entries'], 2)
+
+	def test_entry_evicted_after_load_is_miss(self):
+		mol = tq.chemistry.Molecule(geometry=GEOMETRY, basis_set='sto-3g')
+		self.cache.hamiltonian(mol)
+		load = self.cache._load
+
+		def load_then_evict(path):
+			entry = load(path)
+			os.remove(path)  # by another process
+			return entry
+		self.cache._load = load_then_evict
+		self.cache.hamiltonian(mol)
+		self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+		self.assertEqual(self.cache.stats()['entries'], 1)
@@ -1,6 +1,7 @@
 import unittest
 import tequila as tq
 from quantmark import circuit
+from quantmark.exceptions.invalid_syntax_error import InvalidSyntaxError
 
 VALID_CIRCUIT_STRING = """
 			circuit:
@@ -81,3 +82,25 @@ class TestCircuit(unittest.TestCase):
 	def test_circuit_info_returns_right_parameter_count(self):
 		info = circuit.CircuitInfo(valid_circuit)
 		self.assertEqual(info.parameter_count, 2)
+
+	def test_circuit_from_string_reports_line_of_invalid_gate(self):
+		nonvalid_circuit = 'circuit:\nX(target=(1,))\nU(target=(1,), control=(0,))\n'
+		with self.assertRaisesRegex(InvalidSyntaxError, 'Line 3'):
+			circuit.circuit_from_string(nonvalid_circuit)
+
+	def test_parse_gates_reads_parameters_with_parentheses(self):
+		string = 'circuit:\nRz(target=(2,), control=(0, 1), parameter=f([(1, 0, 1, 0)]))'
+		gates = list(circuit.parse_gates(string))
+		self.assertEqual(gates[0].target, [2])
+		self.assertEqual(gates[0].control, [0, 1])
+		self.assertEqual(gates[0].parameter, 'f([(1, 0, 1, 0)])')
+
+	def test_parse_gates_rejects_malformed_parameters(self):
+		for parameter in ['1.2.3', '2a', 'a b', '', '=a']:
+			string = f'circuit:\nRz(target=(2,), parameter={parameter})'
+			with self.assertRaisesRegex(InvalidSyntaxError, 'Line 2'):
+				list(circuit.parse_gates(string))
+
+	def test_validate_returns_false_on_empty_circuit(self):
+		result = circuit.validate_circuit_syntax('circuit:\n')
+		self.assertEqual(result, False)
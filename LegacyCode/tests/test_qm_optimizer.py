@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import tequila as tq
+import quantmark as qm
+
+
+class TestQMOptimizer(unittest.TestCase):
+	def setUp(self) -> None:
+		self.objective = tq.ExpectationValue(
+			H=tq.paulis.Z(0) + tq.paulis.X(1),
+			U=tq.gates.Ry('a', 0) + tq.gates.Ry('b', 1)
+		)
+
+	def test_uses_gradient(self):
+		self.assertTrue(qm.QMOptimizer('scipy', 'BFGS').uses_gradient)
+		self.assertFalse(qm.QMOptimizer('scipy', 'NELDER-MEAD').uses_gradient)
+		self.assertTrue(qm.QMOptimizer('gd', 'adam').uses_gradient)
+
+	def test_deterministic(self):
+		self.assertTrue(qm.QMOptimizer('scipy', 'BFGS').deterministic)
+		self.assertTrue(qm.QMOptimizer('gd', 'adam').deterministic)
+		self.assertFalse(qm.QMOptimizer('scipy', 'BFGS', samples=100).deterministic)
+
+	def test_initial_values(self):
+		optimizer = qm.QMOptimizer('scipy', 'BFGS', maxiter=1)
+		for initial_values, expected in [(0.5, 0.5), ('zero', 0.0), ({'a': 1.0, 'b': 1.0}, 1.0)]:
+			result = optimizer.minimize(self.objective, initial_values=initial_values)
+			self.assertEqual(list(result.history.angles_evaluations[0].values()), [expected, expected])
+		self.assertRaises(ValueError, optimizer.minimize, self.objective, initial_values='one')
+
+	def test_compile_gradients_only_when_used(self):
+		compiled = qm.QMOptimizer('scipy', 'BFGS').compile(self.objective)
+		self.assertEqual(len(compiled.gradients), 2)
+		compiled = qm.QMOptimizer('scipy', 'COBYLA').compile(self.objective)
+		self.assertEqual(compiled.gradients, {})
+
+	def test_compiled_objective_rejects_positional_arguments(self):
+		optimizer = qm.QMOptimizer('scipy', 'BFGS', 100, 'extra')
+		compiled = optimizer.compile(self.objective)
+		self.assertRaises(ValueError, optimizer.minimize, compiled)
+
+	def test_compiled_objective_gives_same_result(self):
+		for module, method in [('scipy', 'BFGS'), ('scipy', 'COBYLA'), ('gd', 'adam')]:
+			optimizer = qm.QMOptimizer(module, method, maxiter=10)
+			compiled = optimizer.compile(self.objective)
+			for _ in range(2):
+				np.random.seed(5)
+				expected = optimizer.minimize(self.objective)
+				np.random.seed(5)
+				result = optimizer.minimize(compiled)
+				self.assertEqual(expected.history.energies, result.history.energies)
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import tequila as tq
+import quantmark.molecule
+from quantmark.reference_energies import ReferenceEnergies, molecule_key
+from quantmark.vqe.vqe_result import VQEResult
+
+GEOMETRY = 'H 0.0 0.0 0.0\nH 0.0 0.0 0.7'
+
+
+class TestReferenceEnergies(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.file = os.path.join(self.directory.name, 'fci.json')
+		self.store = ReferenceEnergies(self.file)
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def test_fci_is_computed_once(self):
+		molecule = tq.chemistry.Molecule(geometry=GEOMETRY, basis_set='sto-3g')
+		with mock.patch.object(molecule, 'compute_energy', return_value=-1.136) as compute:
+			self.store.fci(molecule)
+			self.assertEqual(ReferenceEnergies(self.file).fci(molecule), -1.136)
+		self.assertEqual(compute.call_count, 1)
+		self.assertEqual(molecule_key(molecule), 'sto-3g|null|H 0.0 0.0 0.0;H 0.0 0.0 0.7')
+
+	def test_compute_fills_store(self):
+		energies = self.store.compute([GEOMETRY, 'H 0 0 0\nH 0 0 0.75'], 'sto-3g', workers=2)
+		self.assertAlmostEqual(energies[0], -1.13619, places=4)
+		self.assertEqual(self.store.get('H 0 0 0\nH 0 0 0.7', 'sto-3g'), energies[0])
+
+	def test_compute_creates_molecules_only_for_missing_energies(self):
+		self.store.compute([GEOMETRY], 'sto-3g')
+		with mock.patch('quantmark.molecule.create', wraps=quantmark.molecule.create) as create:
+			energies = self.store.compute([GEOMETRY, 'H 0 0 0\nH 0 0 0.75'], 'sto-3g')
+		self.assertEqual(create.call_count, 1)
+		self.assertEqual(create.call_args[0][0], 'H 0 0 0\nH 0 0 0.75')
+		self.assertEqual(energies[0], self.store.get(GEOMETRY, 'sto-3g'))
+
+	def test_result_reads_target_value_from_store(self):
+		molecule = tq.chemistry.Molecule(geometry=GEOMETRY, basis_set='sto-3g')
+		self.store.compute([GEOMETRY], 'sto-3g')
+		circuit = tq.gates.Ry(angle='a', target=0)
+		result = VQEResult(
+			circuit, None, None, [], max_iterations=100,
+			molecule=molecule, reference_energies=self.store
+		)
+		with mock.patch.object(molecule, 'compute_energy') as compute:
+			self.assertEqual(result.target_value, self.store.get(GEOMETRY, 'sto-3g'))
+		compute.assert_not_called()
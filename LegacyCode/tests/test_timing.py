@@ -0,0 +1,26 @@
+import unittest
+from quantmark.timing import Timings
+
+
+class TestTimings(unittest.TestCase):
+	def test_phases_are_summed(self):
+		timings = Timings()
+		for _ in range(3):
+			with timings.phase('minimize'):
+				pass
+		self.assertEqual(timings.as_dict()['minimize']['count'], 3)
+
+	def test_phase_is_recorded_when_it_raises(self):
+		timings = Timings()
+		with self.assertRaises(ValueError):
+			with timings.phase('failing'):
+				raise ValueError()
+		self.assertEqual(timings.counts['failing'], 1)
+
+	def test_update(self):
+		timings = Timings()
+		timings.add('minimize', 1.5)
+		other = Timings()
+		other.update(timings)
+		other.update({'minimize': {'seconds': 0.5, 'count': 2}})
+		self.assertEqual(other.as_dict(), {'minimize': {'seconds': 2.0, 'count': 3}})
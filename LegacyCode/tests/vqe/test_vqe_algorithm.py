@@ -1,4 +1,5 @@
 import unittest
+import tequila as tq
 import quantmark as qm
 
 
@@ -63,3 +64,106 @@ class TestVQEAlgorithm(unittest.TestCase):
 			'Cannot set hamiltonian when there is a molecule.'
 			in str(context.exception)
 		)
+
+	def test_analyze_records_timings(self):
+		algorithm = qm.VQEAlgorithm(
+			circuit=tq.gates.Ry('a', 0),
+			hamiltonian=tq.paulis.Z(0),
+			repetitions=2
+		)
+		timings = algorithm.analyze().timings
+		self.assertEqual(timings['total']['minimize']['count'], 2)
+		self.assertEqual(
+			list(timings['total']), ['hamiltonian', 'objective', 'compile', 'minimize']
+		)
+		self.assertEqual(timings['total']['compile']['count'], 1)
+		self.assertIn('compile', timings['repetitions'][0])
+		self.assertNotIn('compile', timings['repetitions'][1])
+		self.assertEqual(len(timings['repetitions']), 2)
+		total = sum(r['minimize']['seconds'] for r in timings['repetitions'])
+		self.assertAlmostEqual(timings['total']['minimize']['seconds'], total)
+
+	def test_parallel_analyze_matches_serial(self):
+		algorithm = qm.VQEAlgorithm(
+			circuit=tq.gates.Ry('a', 0) + tq.gates.Ry('b', 1),
+			hamiltonian=tq.paulis.Z(0) + tq.paulis.X(1),
+			repetitions=3
+		)
+		serial = algorithm.analyze(seed=7)
+		parallel = algorithm.analyze(workers=2, seed=7)
+		self.assertEqual(len(parallel.results), 3)
+		for s, p in zip(serial.results, parallel.results):
+			self.assertEqual(s.history.energies, p.history.energies)
+		starts = [r.history.energies[0] for r in parallel.results]
+		self.assertEqual(len(set(starts)), 3)
+		self.assertEqual(parallel.timings['total']['minimize']['count'], 3)
+		self.assertIn(parallel.timings['total']['compile']['count'], [1, 2])
+		self.assertEqual(len(parallel.timings['repetitions']), 3)
+
+	def test_deterministic_repetitions_from_fixed_start_are_run_once(self):
+		algorithm = qm.VQEAlgorithm(
+			circuit=tq.gates.Ry('a', 0),
+			hamiltonian=tq.paulis.Z(0),
+			repetitions=3,
+			initial_values=0.5
+		)
+		result = algorithm.analyze(workers=2)
+		self.assertEqual(len(result.results), 3)
+		self.assertEqual(result.timings['total']['minimize']['count'], 1)
+		self.assertEqual(result.timings['repetitions'][1:], [{}, {}])
+		self.assertEqual(result.results[0].history.energy_evaluations[0], tq.simulate(
+			tq.ExpectationValue(H=tq.paulis.Z(0), U=tq.gates.Ry('a', 0)), {'a': 0.5}
+		))
+
+	def test_random_starts_from_distribution(self):
+		algorithm = qm.VQEAlgorithm(
+			circuit=tq.gates.Ry('a', 0) + tq.gates.Ry('b', 1),
+			hamiltonian=tq.paulis.Z(0) + tq.paulis.X(1),
+			repetitions=3,
+			initial_values=lambda rng: rng.normal(scale=0.1)
+		)
+		serial = algorithm.analyze(seed=11)
+		parallel = algorithm.analyze(workers=2, seed=11)
+		self.assertEqual(serial.timings['total']['minimize']['count'], 3)
+		starts = [r.history.angles_evaluations[0] for r in serial.results]
+		self.assertEqual(len({tuple(s.values()) for s in starts}), 3)
+		self.assertTrue(all(abs(v) < 1 for s in starts for v in s.values()))
+		for s, p in zip(serial.results, parallel.results):
+			self.assertEqual(s.history.energies, p.history.energies)
+
+	def test_sequential_analyze_stops_when_interval_is_narrow(self):
+		algorithm = qm.VQEAlgorithm(
+			circuit=tq.gates.Ry('a', 0),
+			hamiltonian=tq.paulis.Z(0),
+			repetitions=50
+		)
+		for workers, expected in [(None, 5), (2, 6)]:
+			result = algorithm.analyze(workers=workers, seed=1, energy_tolerance=1e-3)
+			self.assertEqual(result.stopping['reason'], 'tolerance')
+			self.assertEqual(result.stopping['repetitions'], expected)
+			self.assertEqual(len(result.results), expected)
+			lower, upper = result.stopping['energy_interval']
+			self.assertTrue(lower <= -1 + 1e-6 and upper - lower <= 2e-3)
+			self.assertIsNone(result.stopping['success_rate_interval'])
+
+	def test_sequential_analyze_stops_at_budget(self):
+		algorithm = qm.VQEAlgorithm(
+			circuit=tq.gates.Ry('a', 0),
+			hamiltonian=tq.paulis.Z(0),
+			repetitions=6,
+			target_value=-1.0
+		)
+		result = algorithm.analyze(seed=1, tolerance=0.01)
+		self.assertEqual(result.stopping['reason'], 'budget')
+		self.assertEqual(result.stopping['repetitions'], 6)
+		lower, upper = result.stopping['success_rate_interval']
+		self.assertTrue(lower < result.success_rate <= upper)
+
+	def test_success_rate_tolerance_needs_target_value(self):
+		algorithm = qm.VQEAlgorithm(
+			circuit=tq.gates.Ry('a', 0),
+			hamiltonian=tq.paulis.Z(0),
+			repetitions=2
+		)
+		with self.assertRaises(ValueError):
+			algorithm.analyze(tolerance=0.1)
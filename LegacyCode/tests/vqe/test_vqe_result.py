@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+import tequila as tq
+from types import SimpleNamespace
+from quantmark.vqe.vqe_result import VQEResult, success_rate_interval, mean_interval
+
+
+def mock_result(energies):
+	return SimpleNamespace(history=SimpleNamespace(energies=energies))
+
+
+class TestVQEResult(unittest.TestCase):
+	def setUp(self) -> None:
+		self.result = VQEResult(
+			tq.gates.Ry('a', 0),
+			None,
+			None,
+			[mock_result([0.0, -0.5, -1.0]), mock_result([0.0, -1.0005]), mock_result([1.0])],
+			max_iterations=10,
+			target_value=-1.0
+		)
+
+	def test_histories_are_padded_with_last_value(self):
+		self.assertEqual(
+			self.result.histories.tolist(),
+			[[0.0, -0.5, -1.0], [0.0, -1.0005, -1.0005], [1.0, 1.0, 1.0]]
+		)
+		self.assertEqual(self.result.history_lengths.tolist(), [3, 2, 1])
+		self.assertEqual(self.result.final_values.tolist(), [-1.0, -1.0005, 1.0])
+
+	def test_statistics(self):
+		self.assertTrue(np.allclose(self.result.average_history, [1 / 3, -0.5005 / 3, -1.0005 / 3]))
+		self.assertEqual(self.result.median_history, [0.0, -0.5, -1.0])
+		lower, upper = self.result.history_band(0, 100)
+		self.assertEqual(lower, [0.0, -1.0005, -1.0005])
+		self.assertEqual(upper, [1.0, 1.0, 1.0])
+		self.assertEqual(self.result.percentile_history(50), self.result.median_history)
+		self.assertAlmostEqual(self.result.std_history[0], np.std([0.0, 0.0, 1.0]))
+		self.assertEqual(self.result.max_iterations, 3)
+		self.assertEqual(self.result.average_iterations, 2.0)
+		self.assertAlmostEqual(self.result.success_rate, 2 / 3)
+		self.assertAlmostEqual(self.result.accuracy, abs(-1.0005 / 3 + 1.0))
+
+	def test_convergence_iterations(self):
+		iterations = self.result.convergence_iterations
+		self.assertEqual(iterations[:2].tolist(), [3.0, 2.0])
+		self.assertTrue(np.isnan(iterations[2]))
+
+	def test_success_rate_interval(self):
+		lower, upper = success_rate_interval(10, 10)
+		self.assertAlmostEqual(upper, 1.0)
+		self.assertAlmostEqual(lower, 10 / (10 + 1.959963984540054**2))
+		lower, upper = success_rate_interval(50, 100)
+		self.assertAlmostEqual(lower + upper, 1.0)
+		self.assertAlmostEqual(upper - lower, 0.1923, places=4)
+
+	def test_mean_interval(self):
+		lower, upper = mean_interval([1.0, 2.0, 3.0])
+		self.assertAlmostEqual((lower + upper) / 2, 2.0)
+		self.assertAlmostEqual(upper - 2.0, 1.959963984540054 / 3 ** 0.5)
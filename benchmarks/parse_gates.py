@@ -0,0 +1,96 @@
+"""Parse throughput of ansatz gate strings.
+
+Compares libmark.circuit.parse_gates with the split based parser that
+QleaderExperiment used before, and quantmark.circuit.parse_gates with
+the multiline regex validation and findall pass it replaced.
+
+    python benchmarks/parse_gates.py [n_gates ...]
+"""
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'LegacyCode')) # noqa
+from libmark.circuit import Gate, parse_gates  # noqa: E402
+from quantmark import circuit as legacy  # noqa: E402
+
+
+def make_gates(n, seed=0):
+    rng = random.Random(seed)
+    gates = []
+    for _ in range(n):
+        a, b = rng.sample(range(8), 2)
+        gates.append(rng.choice([
+            f'X(target=({a},), control=({b},))',
+            f'H(target=({a},))',
+            f'Ry(target=({a},), parameter={rng.uniform(0, 3)!r})',
+            f'Rz(target=({a},), parameter={rng.choice("abcdefghij")})',
+            f'SWAP(target=({a}, {b}))',
+        ]))
+    return gates
+
+
+def split_parse(gate):
+    name = gate.split('(', 1)[0]
+    parts = gate.split('target=(', 1)[1].split(')')[0].split(',')
+    if not parts[-1]:
+        parts = parts[:-1]
+    target = [int(n) for n in parts]
+    control = None
+    if 'control' in gate:
+        parts = gate.split('control=(', 1)[1].split(')')[0].split(',')
+        if not parts[-1]:
+            parts = parts[:-1]
+        control = [int(n) for n in parts]
+    parameter = None
+    if 'parameter' in gate:
+        parameter = gate.split("parameter=", 1)[1].split(')')[0]
+        try:
+            parameter = float(parameter)
+        except ValueError:
+            pass
+    return Gate(name=name, target=target, control=control,
+                parameter=parameter)
+
+
+def regex_parse(string):
+    if not legacy.circuit_pattern().match(string):
+        raise ValueError('Invalid circuit')
+    gate_regex = re.compile('|'.join([
+        legacy.NP_ONEQ_GATES_REGEX,
+        legacy.P_ONEQ_GATES_REGEX,
+        legacy.SWAP_GATE_REGEX
+    ]).join('()'))
+    return [legacy.gate_string_to_dict(g[0]) for g in gate_regex.findall(string)] # noqa
+
+
+def best_of(function, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(sizes):
+    print(f'{"gates":>8} {"parser":<28} {"seconds":>9} {"gates/s":>11}')
+    for n in sizes:
+        gates = make_gates(n)
+        string = 'circuit: \n' + '\n'.join(gates) + '\n'
+        cases = [
+            ('libmark split (old)', lambda: [split_parse(g) for g in gates]),
+            ('libmark parse_gates', lambda: list(parse_gates(gates))),
+            ('quantmark regex (old)', lambda: regex_parse(string)),
+            ('quantmark parse_gates', lambda: list(legacy.parse_gates(string))), # noqa
+        ]
+        for name, function in cases:
+            seconds = best_of(function)
+            print(f'{n:>8} {name:<28} {seconds:>9.4f} {n / seconds:>11.0f}')
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10**4, 10**5])
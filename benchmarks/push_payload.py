@@ -0,0 +1,48 @@
+"""Size and encoding time of QleaderResult.push payloads.
+
+Builds a result with large random Hamiltonians and compares the original
+double encoded payload with the single encoded, compressed ones.
+
+    python benchmarks/push_payload.py [n_runs] [n_terms]
+"""
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from libmark import payload  # noqa: E402
+
+
+def make_hamiltonian(n_terms, n_qubits=12, seed=0):
+    rng = random.Random(seed)
+    terms = []
+    for _ in range(n_terms):
+        qubits = sorted(rng.sample(range(n_qubits), rng.randint(1, 4)))
+        paulis = ''.join(f'{rng.choice("XYZ")}({q})' for q in qubits)
+        terms.append(f'{rng.uniform(-1, 1):+.16f}{paulis}')
+    return ''.join(terms)
+
+
+def make_result(n_runs, n_terms):
+    hamiltonian = make_hamiltonian(n_terms)
+    return {
+        "energies": [-7.8 + 0.01 * i for i in range(n_runs)],
+        "histories": [str({"energies": [-7.0, -7.5, -7.8]})] * n_runs,
+        "hamiltonian": [hamiltonian] * n_runs,
+        "optimizer": "BFGS",
+    }
+
+
+def main(n_runs=20, n_terms=5000):
+    result = make_result(n_runs, n_terms)
+    measured = payload.report(result)
+    reference = measured["double encoded"]
+    print(f'{n_runs} runs, {n_terms} Hamiltonian terms')
+    print(f'{"payload":<16} {"bytes":>12} {"ratio":>7} {"seconds":>9}')
+    for name, m in measured.items():
+        ratio = m["bytes"] / reference["bytes"]
+        print(f'{name:<16} {m["bytes"]:>12} {ratio:>7.3f} {m["seconds"]:>9.4f}') # noqa
+
+
+if __name__ == '__main__':
+    main(*[int(n) for n in sys.argv[1:]])
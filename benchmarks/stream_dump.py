@@ -0,0 +1,78 @@
+"""Peak memory and time of decoding experiment dumps.
+
+Compares json.loads of the whole response with libmark.jsonstream,
+reading the per-distance records one at a time, and ast.literal_eval
+with api.parse_ansatz for the ansatz entries.
+
+    python benchmarks/stream_dump.py [n_runs] [history_length]
+"""
+import os
+import ast
+import sys
+import json
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from libmark import jsonstream  # noqa: E402
+from libmark.api import parse_ansatz  # noqa: E402
+
+
+def make_dump(n_runs, history_length):
+    return {
+        "energies": [-7.8 + 0.01 * i for i in range(n_runs)],
+        "histories": [{"energies": [-7.0 - 1e-4 * j
+                                    for j in range(history_length)]}
+                      for _ in range(n_runs)],
+        "optimizer": "BFGS",
+    }
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, seconds
+
+
+def main(n_runs=200, history_length=2000):
+    data = json.dumps(make_dump(n_runs, history_length)).encode()
+
+    def chunks():
+        # Stands in for Response.iter_content, the response is not held
+        for i in range(0, len(data), jsonstream.CHUNK_SIZE):
+            yield data[i:i + jsonstream.CHUNK_SIZE]
+
+    def whole():
+        json.loads(b''.join(chunks()))
+
+    def streamed():
+        for key, value in jsonstream.fields(chunks(), ['histories']):
+            if key == 'histories':
+                for record in value:
+                    pass
+
+    print(f'{n_runs} runs, {history_length} energies each, {len(data)} bytes') # noqa
+    print(f'{"decoder":<16} {"peak bytes":>12} {"seconds":>9}')
+    for name, function in [('json.loads', whole), ('jsonstream', streamed)]:
+        peak, seconds = measure(function)
+        print(f'{name:<16} {peak:>12} {seconds:>9.4f}')
+    compare_ansatz_parsers()
+
+
+def compare_ansatz_parsers():
+    gates = [f'Ry(target=({q},), parameter=a{q})' for q in range(12)]
+    ansatz = [str(gates * 20)] * 1000
+    for name, parse in [('literal_eval', ast.literal_eval),
+                        ('parse_ansatz', parse_ansatz)]:
+        start = time.perf_counter()
+        for entry in ansatz:
+            parse(entry)
+        print(f'{name:<16} {"":>12} {time.perf_counter() - start:>9.4f}')
+
+
+if __name__ == '__main__':
+    main(*[int(n) for n in sys.argv[1:]])
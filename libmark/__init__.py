@@ -4,6 +4,10 @@ from .result import QleaderResult  # noqa: F401
 from .tracker import get_tracker  # noqa: F401
 from .api import get_distances  # noqa: F401
 from .api import get_experiment  # noqa: F401
+from .api import get_experiments  # noqa: F401
+from .api import get_data_many  # noqa: F401
 from .experiment import QleaderExperiment  # noqa: F401
 
 import os, sys; sys.path.append(os.path.dirname(os.path.realpath(__file__)))  # noqa
+from .cache import MoleculeCache  # noqa: F401
+from .reference import ReferenceEnergies  # noqa: F401
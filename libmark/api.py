@@ -1,38 +1,67 @@
-import requests
 import ast
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .client import get_client, RateLimiter
+from . import jsonstream
 from .experiment import QleaderExperiment
 
-# Use this (or wherever your local WebMark2 is running) while developing
-# url = 'http://localhost:8000/api/'
-url = 'https://ohtup-staging.cs.helsinki.fi/qleader/api/'
-
 
 def get_distances():
     """Get benchmark distances to include result in smallest variance leaderboards
 
     return list
     """
-    res = requests.get(f'{url}distances/')
+    res = get_client().get('distances/')
     return ast.literal_eval(res.content.decode('UTF-8'))
 
 
-def get_fci(basis_set):
-    """Get FCI values"""
+def get_fci(basis_set, store=None):
+    """Get FCI values
+
+    With a libmark.reference.ReferenceEnergies store the table is
+    downloaded only once and read from the store afterwards.
+    """
+    if store is not None and store.table(basis_set) is not None:
+        return store.table(basis_set)
     try:
-        res = requests.get(f'{url}fci/{basis_set}/')
-        return ast.literal_eval(res.content.decode('UTF-8'))
+        res = get_client().get(f'fci/{basis_set}/')
+        table = ast.literal_eval(res.content.decode('UTF-8'))
     except Exception:
         return 'Requested basis set not available.'
+    if store is not None:
+        store.import_table(basis_set, table)
+    return table
 
 
 def get_data(id, token):
     """Get a dump of all data available about an experiment"""
-    headers = {
-        'Authorization': f'Token {token}'
-    }
-    res = requests.get(f'{url}{id}/download/dump/', headers=headers)
-    return json.loads(res.content)
+    with _download(f'{id}/download/dump/', token) as res:
+        return jsonstream.load(res.iter_content(jsonstream.CHUNK_SIZE))
+
+
+def iter_data(id, token, streamed=()):
+    """Iterate over the fields of an experiment dump
+
+    Only the field being read is held in memory, so the memory used does
+    not grow with the size of the dump. The response is streamed to the
+    disk cache, or read from it, in chunks.
+
+    Parameters
+    ----------
+    id : int
+    token : str
+    streamed : collection of str
+        Fields of per-distance records, e.g. ['histories'], given as
+        generators over the records instead of lists. See
+        libmark.jsonstream.fields.
+
+    Yields
+    ----------
+    (field, value)
+    """
+    with _download(f'{id}/download/dump/', token) as res:
+        chunks = res.iter_content(jsonstream.CHUNK_SIZE)
+        yield from jsonstream.fields(chunks, streamed)
 
 
 def get_experiment(id, token):
@@ -40,11 +69,89 @@ def get_experiment(id, token):
 
     return QleaderExperiment
     """
+    res_dict = {}
+    with _download(f'{id}/download/experiment/', token) as res:
+        chunks = res.iter_content(jsonstream.CHUNK_SIZE)
+        for key, value in jsonstream.fields(chunks, streamed=['ansatz']):
+            if key == 'ansatz':
+                value = [parse_ansatz(a) for a in value]
+            res_dict[key] = value
+    return QleaderExperiment(**res_dict)
+
+
+def parse_ansatz(text):
+    """Parse an ansatz entry of an experiment, a list of gates as a string
+
+    The entries are Python reprs of lists of strings. Without escapes
+    and double quotes, the quotes of a repr are the only single quotes
+    in it and swapping them makes it JSON, which is much faster to
+    parse than with ast.literal_eval.
+
+    return list of str
+    """
+    if '"' not in text and '\\' not in text:
+        try:
+            return json.loads(text.replace("'", '"'))
+        except ValueError:
+            pass
+    return ast.literal_eval(text)
+
+
+def get_data_many(ids, token, concurrency=8, rate_limit=None):
+    """Get the data dumps of many experiments at the same time
+
+    Parameters
+    ----------
+    ids : list
+    token : str
+    concurrency : int
+        Number of downloads running at the same time
+    rate_limit : float, optional
+        Maximum number of requests started per second
+
+    Yields
+    ----------
+    (id, data) in the order the downloads finish. If a download fails,
+    data is the exception it raised.
+    """
+    yield from _download_many(get_data, ids, token, concurrency, rate_limit)
+
+
+def get_experiments(ids, token, concurrency=8, rate_limit=None):
+    """Get many experiments at the same time, see get_data_many
+
+    Yields
+    ----------
+    (id, QleaderExperiment) in the order the downloads finish. If a
+    download fails, the exception it raised is given instead.
+    """
+    yield from _download_many(get_experiment, ids, token, concurrency,
+                              rate_limit)
+
+
+def _download(path, token):
     headers = {
         'Authorization': f'Token {token}'
     }
-    res = requests.get(f'{url}{id}/download/experiment/', headers=headers)
-    res_dict = json.loads(res.content)
-    for i in range(len(res_dict['ansatz'])):
-        res_dict['ansatz'][i] = ast.literal_eval(res_dict['ansatz'][i])
-    return QleaderExperiment(**res_dict)
+    return get_client().get(path, headers=headers, stream=True)
+
+
+def _download_many(download, ids, token, concurrency, rate_limit):
+    limiter = RateLimiter(rate_limit)
+
+    def limited(id):
+        limiter.wait()
+        return download(id, token)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(limited, id): id for id in ids}
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+        finally:
+            # Stopped early, do not wait for the downloads not started
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,218 @@
+import os
+import hashlib
+import tempfile
+import numpy as np
+import tequila as tq
+from tequila.hamiltonian import PauliString
+
+# Bump when the layout of the cache entries changes
+CACHE_VERSION = 1
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'libmark')
+DEFAULT_MAX_BYTES = 512 * 1024**2
+
+# Pauli matrices are stored as small integers, 0 is the identity
+PAULI_CODES = {'X': 1, 'Y': 2, 'Z': 3}
+PAULI_NAMES = {code: name for name, code in PAULI_CODES.items()}
+
+
+class MoleculeCache():
+    """Content-addressed on-disk cache for molecular integrals and
+    qubit Hamiltonians.
+
+    Entries are keyed by geometry, basis set and transformation and stored
+    as compressed numpy archives. A hit rebuilds the molecule from the
+    stored integrals and the Hamiltonian from its Pauli string table, so
+    no quantum chemistry or fermion-to-qubit transformation is run.
+
+    ...
+
+    Methods
+    -------
+    get(geometry, basis_set, transformation, **kwargs)
+        Returns (molecule, hamiltonian), computing them on a miss
+    stats()
+        Returns hit and miss counts and the size of the cache
+    clear()
+        Removes every entry from the cache directory
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        """Initializes the cache.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Where the entries are stored. Defaults to $LIBMARK_CACHE_DIR
+            or ~/.cache/libmark.
+
+        max_bytes : int
+            When the entries take more space than this, the least
+            recently used ones are removed.
+        """
+        if directory is None:
+            directory = os.environ.get('LIBMARK_CACHE_DIR', DEFAULT_DIRECTORY)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Counted per process, workers of a process pool keep their own
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, geometry, basis_set, transformation, **kwargs):
+        """Content hash of the inputs that define a molecule"""
+        lines = [line.strip() for line in geometry.strip().splitlines()]
+        parts = [
+            str(CACHE_VERSION),
+            tq.__version__,
+            '\n'.join(lines),
+            str(basis_set).lower(),
+            str(transformation).lower().replace('-', '').replace('_', '')
+        ]
+        parts += [f'{k}={kwargs[k]!r}' for k in sorted(kwargs)]
+        return hashlib.sha256('\0'.join(parts).encode('UTF-8')).hexdigest()
+
+    def get(self, geometry, basis_set, transformation, **kwargs):
+        """Get a molecule and its qubit Hamiltonian
+
+        Extra keyword arguments are passed to tq.chemistry.Molecule
+        and are part of the key.
+
+        return (molecule, hamiltonian)
+        """
+        path = self._path(self.key(geometry, basis_set, transformation, **kwargs)) # noqa
+        entry = self._load(path)
+        if entry is not None and self._touch(path):
+            self.hits += 1
+            molecule = tq.chemistry.Molecule(
+                geometry=geometry,
+                basis_set=basis_set,
+                transformation=transformation,
+                backend='base',
+                one_body_integrals=entry['one_body_integrals'],
+                two_body_integrals=entry['two_body_integrals'],
+                nuclear_repulsion=float(entry['nuclear_repulsion']),
+                n_electrons=int(entry['n_electrons']),
+                **kwargs
+            )
+            return molecule, decode_hamiltonian(entry['paulis'], entry['coefficients']) # noqa
+
+        self.misses += 1
+        molecule = tq.chemistry.Molecule(geometry=geometry, basis_set=basis_set, transformation=transformation, **kwargs) # noqa
+        hamiltonian = molecule.make_hamiltonian()
+        paulis, coefficients = encode_hamiltonian(hamiltonian)
+        self._store(path, {
+            'one_body_integrals': molecule.molecule.one_body_integrals,
+            'two_body_integrals': molecule.molecule.two_body_integrals,
+            'nuclear_repulsion': molecule.molecule.nuclear_repulsion,
+            'n_electrons': molecule.molecule.n_electrons,
+            'paulis': paulis,
+            'coefficients': coefficients
+        })
+        return molecule, hamiltonian
+
+    def stats(self):
+        """Hit and miss counts of this process and the current size
+
+        return dict
+        """
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(size for _, _, size in entries)
+        }
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            os.remove(path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def _load(self, path):
+        try:
+            with np.load(path) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError):
+            # Missing, evicted by another process or partially written
+            return None
+
+    def _touch(self, path):
+        # Marks the entry as recently used for eviction. False if another
+        # process evicted it since it was loaded, which is taken as a miss
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _store(self, path, arrays):
+        # Write to a temporary file first so that readers never see
+        # a half written entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(tmp, path)
+        self._evict(keep=path)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self, keep=None):
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+def encode_hamiltonian(hamiltonian):
+    """Encode a QubitHamiltonian as a table of Pauli codes
+
+    return (paulis, coefficients)
+        paulis - uint8 array with a row per term and a column per qubit
+        coefficients - float64 array, complex128 if any is complex
+    """
+    strings = hamiltonian.paulistrings
+    n_qubits = max(hamiltonian.qubits) + 1 if hamiltonian.qubits else 0
+    paulis = np.zeros((len(strings), n_qubits), dtype=np.uint8)
+    coefficients = np.empty(len(strings), dtype=np.complex128)
+    for i, string in enumerate(strings):
+        for qubit, pauli in string.items():
+            paulis[i, qubit] = PAULI_CODES[pauli.upper()]
+        coefficients[i] = string.coeff
+    if not np.any(coefficients.imag):
+        coefficients = coefficients.real
+    return paulis, coefficients
+
+
+def decode_hamiltonian(paulis, coefficients):
+    """Inverse of encode_hamiltonian
+
+    return QubitHamiltonian
+    """
+    strings = []
+    for row, coeff in zip(paulis, coefficients.tolist()):
+        qubits = np.nonzero(row)[0]
+        data = {int(q): PAULI_NAMES[int(row[q])] for q in qubits}
+        strings.append(PauliString(data=data, coeff=coeff))
+    return tq.QubitHamiltonian.from_paulistrings(strings)
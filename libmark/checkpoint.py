@@ -0,0 +1,99 @@
+import os
+import pickle
+import hashlib
+import tempfile
+import tequila as tq
+
+# Bump when the layout of the checkpoint files changes
+CHECKPOINT_VERSION = 1
+
+
+class Checkpoint():
+    """Directory holding the result of every finished distance of an
+    experiment, so that an interrupted sweep can be resumed.
+
+    Each distance is pickled to its own file as soon as it finishes: the
+    result object returned by tq.minimize with its variables, history and
+    optimizer state (e.g. the scipy result), and the warm start report
+    entry. The files are named by a hash of everything that defines the
+    run of the distance, so one directory can be shared by experiments
+    and a changed experiment never picks up stale results. Failed
+    distances are not stored and run again on resume.
+
+    ...
+
+    Methods
+    -------
+    completed()
+        Returns the indices of the distances with a stored result
+    status()
+        Returns the completed and remaining distances
+    load(i)
+        Returns (result, report) of distance i
+    save(i, result, report=None)
+        Stores the result of distance i
+    """
+
+    def __init__(self, directory, exp):
+        """Initializes the checkpoint.
+
+        Parameters
+        ----------
+        directory : str
+        exp : QleaderExperiment
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.distances = list(exp.distances)
+        self.paths = [
+            os.path.join(directory, self.key(exp, i) + '.pickle')
+            for i in range(len(self.distances))
+        ]
+
+    @staticmethod
+    def key(exp, i):
+        """Content hash of the inputs that define distance i of exp"""
+        parts = [
+            str(CHECKPOINT_VERSION),
+            tq.__version__,
+            repr(exp.distances[i]),
+            str(exp.basis_set).lower(),
+            str(exp.transformation).lower(),
+            str(exp.optimizer).lower(),
+            '\n'.join(exp.ansatz[i])
+        ]
+        return hashlib.sha256('\0'.join(parts).encode('UTF-8')).hexdigest()
+
+    def completed(self):
+        # Only checks that the files exist, nothing is unpickled
+        return [i for i, path in enumerate(self.paths)
+                if os.path.exists(path)]
+
+    def status(self):
+        """Completed and remaining distances
+
+        return dict with lists 'completed' and 'remaining'
+        """
+        completed = set(self.completed())
+        return {
+            'completed': [R for i, R in enumerate(self.distances)
+                          if i in completed],
+            'remaining': [R for i, R in enumerate(self.distances)
+                          if i not in completed]
+        }
+
+    def load(self, i):
+        with open(self.paths[i], 'rb') as file:
+            entry = pickle.load(file)
+        return entry['result'], entry['report']
+
+    def save(self, i, result, report=None):
+        # Write to a temporary file first so that a crash never leaves
+        # a half written result that would be taken as completed
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump({'distance': self.distances[i], 'result': result,
+                         'report': report}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, self.paths[i])
@@ -0,0 +1,194 @@
+import re
+import typing
+import hashlib
+import numbers
+from collections import OrderedDict
+from dataclasses import dataclass
+import tequila as tq
+from tequila.objective.objective import Variable, FixedVariable
+
+# A gate parameter is a number or a variable name, which may carry an
+# argument list, e.g. f([(1, 0, 1, 0)])
+PARAMETER = (r'[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?'
+             r'|[A-Za-z_]\w*(?:\([\w\s,.+\-()\[\]]*\))?')
+
+# One gate of QCircuit.__str__, e.g.
+# Rz(target=(2,), control=(0, 1), parameter=f([(1, 0, 1, 0)]))
+GATE_PATTERN = re.compile(
+    r'\s*(\w+)\(target=\(([\d, ]*)\)'
+    r'(?:, control=\(([\d, ]*)\))?'
+    r'(?:, parameter=(' + PARAMETER + r'))?\)\s*\Z'
+)
+
+
+@dataclass
+class Gate:
+    name: str
+    target: typing.Tuple[int, ...]
+    control: typing.Tuple[int, ...] = None
+    parameter: typing.Union[str, float] = None
+
+
+def parse_gates(lines):
+    """Parse gates in the format of QCircuit.__str__
+
+    Each line is matched once against a precompiled pattern, so the
+    gates are streamed in linear time. Blank lines and the 'circuit:'
+    header are skipped.
+
+    Parameters
+    ----------
+    lines : str or iterable of str
+        The output of QCircuit.__str__ or one gate string per item
+
+    Yields
+    ----------
+    Gate
+
+    Raises
+    ----------
+    ValueError
+        if a line is not a gate, the message gives its line number
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    match_gate = GATE_PATTERN.match
+    # The same few qubit tuples appear on almost every line
+    qubits = {'': ()}
+    for number, line in enumerate(lines, 1):
+        match = match_gate(line)
+        if match is None:
+            if not line.strip() or line.strip() == 'circuit:':
+                continue
+            raise ValueError(f'Invalid gate on line {number}: {line!r}')
+        name, target, control, parameter = match.groups()
+        yield Gate(name, _cached_qubits(qubits, target, number),
+                   _cached_qubits(qubits, control, number),
+                   _parameter(parameter))
+
+
+def _cached_qubits(qubits, values, number):
+    if values is None:
+        return None
+    if values not in qubits:
+        qubits[values] = _qubits(values, number)
+    return qubits[values]
+
+
+def _parameter(parameter):
+    if parameter is None:
+        return None
+    try:
+        return float(parameter)
+    except ValueError:
+        return parameter
+
+
+def build_circuit(gates):
+    """Build a QCircuit from parsed gates in one step
+
+    The gates are collected into one list and the QCircuit and its
+    parameter map are created once, instead of growing the circuit
+    with += for every gate.
+
+    Parameters
+    ----------
+    gates : iterable of Gate
+        e.g. the output of parse_gates
+
+    return tequila.circuit.circuit.QCircuit
+    """
+    elementary = []
+    for gate in gates:
+        elementary += _tq_gate(gate).gates
+    return tq.QCircuit(gates=elementary)
+
+
+def _tq_gate(gate):
+    if gate.name in ['X', 'Y', 'Z', 'H']:
+        gate_method = getattr(tq.gates, gate.name)
+        return gate_method(target=gate.target, control=gate.control)
+    if gate.name in ['Rx', 'Ry', 'Rz']:
+        gate_method = getattr(tq.gates, gate.name)
+        return gate_method(gate.parameter, target=gate.target, control=gate.control) # noqa
+    if gate.name in ['Phase']:
+        return tq.gates.Phase(phi=gate.parameter, target=gate.target, control=gate.control) # noqa
+    if gate.name in ['SWAP']:
+        first, second = gate.target
+        return tq.gates.SWAP(first=first, second=second, control=gate.control) # noqa
+    raise ValueError(f'Gate of type {gate.name} is not supported.')
+
+
+def _qubits(values, number):
+    try:
+        return tuple(int(n) for n in values.split(',') if n.strip())
+    except ValueError:
+        raise ValueError(f'Invalid qubits on line {number}: {values!r}') from None # noqa
+
+
+def fingerprint(circuit):
+    """Structural fingerprint of a QCircuit
+
+    Two circuits have the same fingerprint when their gates have the same
+    types, names, targets, controls and generators, and their parameters
+    depend on the same variables (or have the same value when they are
+    not symbolic). Different values of the variables do not matter.
+
+    return str, or None if circuit is not a QCircuit
+    """
+    if not isinstance(circuit, tq.QCircuit):
+        return None
+    digest = hashlib.sha256()
+    for gate in circuit.gates:
+        fields = [type(gate).__name__]
+        for attribute, value in sorted(vars(gate).items()):
+            if attribute == '_parameter':
+                value = _parameter_fingerprint(value)
+            fields.append(f'{attribute}={value}')
+        digest.update('\0'.join(fields).encode('UTF-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def _parameter_fingerprint(parameter):
+    if isinstance(parameter, FixedVariable):
+        return repr(float(parameter))
+    if isinstance(parameter, Variable):
+        return f'Variable({parameter.name})'
+    if isinstance(parameter, numbers.Number):
+        return repr(parameter)
+    names = sorted(str(v) for v in parameter.extract_variables())
+    return f'{type(parameter).__name__}({",".join(names)})'
+
+
+class LRUCache():
+    """Mapping that keeps the 'maxsize' most recently used items"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        """return the value stored for key, or None"""
+        if key is None or key not in self._data:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key, value):
+        if key is None:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
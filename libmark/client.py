@@ -0,0 +1,154 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .http_cache import ResponseCache
+
+# Use this (or wherever your local WebMark2 is running) while developing
+# DEFAULT_URL = 'http://localhost:8000/api/'
+DEFAULT_URL = 'https://ohtup-staging.cs.helsinki.fi/qleader/api/'
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT = (10, 60)
+RETRY_STATUSES = [500, 502, 503, 504]
+
+
+class Client():
+    """HTTP client for the QuantMark API
+
+    Keeps one requests.Session, so connections are pooled and reused
+    (keep-alive) instead of opening a new TLS connection per request.
+    Every request has a timeout. Failed connections are retried for all
+    requests, and GET, HEAD and OPTIONS requests are also retried on 5xx
+    responses and read errors, waiting backoff_factor * 2**n seconds
+    between the attempts. POST requests are not retried once they have
+    been sent, so a result is never pushed twice.
+
+    ...
+
+    Methods
+    -------
+    get(path, **kwargs)
+        GET url + path, through the response cache if there is one
+    post(path, **kwargs)
+    options(path, **kwargs)
+        Send a request to url + path, kwargs are passed to requests
+    close()
+        Close the pooled connections
+    """
+
+    def __init__(self, url=None, timeout=DEFAULT_TIMEOUT, retries=3,
+                 backoff_factor=0.5, pool_maxsize=10, cache=None):
+        """Initializes the client.
+
+        Parameters
+        ----------
+        url : str, optional
+            Base URL of the API. Defaults to $LIBMARK_URL or DEFAULT_URL
+        timeout : float or (float, float)
+            Seconds to wait for the connection and for the response
+        retries : int
+            How many times a failed request is retried
+        backoff_factor : float
+            Base of the exponential wait between retries
+        pool_maxsize : int
+            Connections kept open, at least the number of threads
+            sending requests at the same time
+        cache : libmark.http_cache.ResponseCache, optional
+            Where GET responses are cached
+        """
+        if url is None:
+            url = os.environ.get('LIBMARK_URL', DEFAULT_URL)
+        self.url = url
+        self.timeout = timeout
+        self.cache = cache
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=pool_maxsize)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path='', **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, self.url + path, **kwargs)
+
+    def get(self, path='', **kwargs):
+        if self.cache is not None:
+            return self.cache.fetch(self, path, **kwargs)
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path='', **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def options(self, path='', **kwargs):
+        return self.request('OPTIONS', path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class RateLimiter():
+    """Spaces calls of wait() at least 1 / rate seconds apart
+
+    Can be shared by threads. With rate None, wait() returns at once.
+    """
+
+    def __init__(self, rate=None):
+        self.interval = 0 if not rate else 1 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(start - now)
+
+
+_client = None
+
+
+def get_client():
+    """return the Client shared by libmark.api and QleaderResult.push
+
+    Unless set_client is called, responses are cached only when
+    $LIBMARK_CACHE_DIR (or $LIBMARK_OFFLINE) is set, in a ResponseCache
+    with the default times to live.
+    """
+    global _client
+    if _client is None:
+        _client = Client(cache=_default_cache())
+    return _client
+
+
+def _default_cache():
+    env = os.environ
+    if env.get('LIBMARK_CACHE_DIR') or env.get('LIBMARK_OFFLINE'):
+        return ResponseCache()
+    return None
+
+
+def set_client(client):
+    """Use 'client', e.g. with another url or timeout, for all requests"""
+    global _client
+    _client = client
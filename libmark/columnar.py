@@ -0,0 +1,271 @@
+import json
+import numbers
+from collections.abc import Sequence
+import numpy as np
+
+# File layout:
+#   MAGIC, header length (uint64), JSON header, padding,
+#   buffers, each starting at a multiple of ALIGNMENT.
+# The header describes the columns and where their buffers are, so every
+# buffer can be read as a numpy array straight from a memory map.
+MAGIC = b'LMCOLv1\0'
+ALIGNMENT = 64
+
+FLOAT = '<f8'
+INT = '<i8'
+CODE = '<i4'
+BYTE = 'u1'
+
+
+class Ragged(Sequence):
+    """Sequence of variable length float64 arrays, e.g. energy histories
+
+    Stored as one values array and n + 1 offsets, item i is
+    values[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, values, offsets):
+        self.values = values
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError(i)
+        i %= n
+        return self._item(i, self.values[self.offsets[i]:self.offsets[i + 1]]) # noqa
+
+    def _item(self, i, values):
+        return values
+
+    def tolist(self):
+        return [self._to_list(item) for item in self]
+
+    def _to_list(self, item):
+        return item.tolist()
+
+
+class Strings(Ragged):
+    """Sequence of strings stored as UTF-8 bytes and offsets"""
+
+    def __init__(self, values, offsets, none=()):
+        super().__init__(values, offsets)
+        self.none = set(none)
+
+    def _item(self, i, values):
+        if i in self.none:
+            return None
+        return values.tobytes().decode('UTF-8')
+
+    def _to_list(self, item):
+        return item
+
+
+class Json(Strings):
+    """Sequence of values stored as JSON strings, decoded on access"""
+
+    def _item(self, i, values):
+        return json.loads(super()._item(i, values))
+
+
+class Coded(Ragged):
+    """Sequence of string lists, e.g. ansatz gates
+
+    Every distinct string is stored once in 'vocabulary' and the lists
+    are ragged int32 arrays of indices into it. An index of -1 is None.
+    """
+
+    def __init__(self, values, offsets, vocabulary):
+        super().__init__(values, offsets)
+        self.vocabulary = vocabulary
+
+    def _item(self, i, values):
+        if len(values) == 1 and values[0] == -1:
+            return None
+        return [self.vocabulary[code] for code in values.tolist()]
+
+    def _to_list(self, item):
+        return item
+
+
+def write(file, columns, meta):
+    """Write columns to 'file' in the columnar format
+
+    Parameters
+    ----------
+    file : str
+    columns : dict
+        name -> (kind, data), kind is one of 'array', 'ragged',
+        'strings', 'json' or 'coded', data is a list with an item per run
+    meta : dict
+        JSON serializable values stored in the header
+    """
+    buffers = []
+    header = {'meta': meta, 'columns': {}}
+    for name, (kind, data) in columns.items():
+        encoded = ENCODERS[kind](data)
+        column = {'kind': kind, 'length': len(data), 'buffers': {}}
+        for part, array in encoded.items():
+            if isinstance(array, np.ndarray):
+                column['buffers'][part] = {'dtype': array.dtype.str,
+                                           'count': int(array.size),
+                                           'index': len(buffers)}
+                buffers.append(array)
+            else:
+                column[part] = array
+        header['columns'][name] = column
+
+    # The offsets depend on the size of the header. Compute that size with
+    # placeholders at least as wide as any real offset, then pad to it.
+    described = [b for c in header['columns'].values()
+                 for b in c['buffers'].values()]
+    for buffer in described:
+        buffer['offset'] = 10**15
+    start = _aligned(len(MAGIC) + 8 + len(json.dumps(header).encode()))
+    offset = start
+    for buffer in described:
+        buffer['offset'] = offset
+        offset = _aligned(offset + buffers[buffer.pop('index')].nbytes)
+    encoded_header = json.dumps(header).encode()
+    encoded_header += b' ' * (start - len(MAGIC) - 8 - len(encoded_header))
+
+    with open(file, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(encoded_header)).tobytes())
+        f.write(encoded_header)
+        for array in buffers:
+            f.write(array.tobytes())
+            f.write(b'\0' * (_aligned(array.nbytes) - array.nbytes))
+
+
+def read(file, mmap=True):
+    """Read a file written by write
+
+    Parameters
+    ----------
+    file : str
+    mmap : bool
+        Memory-map the file instead of reading it into memory.
+        The arrays are then read-only views of the file.
+
+    return (columns, meta), columns maps the name of a column to a numpy
+    array or one of Ragged, Strings, Json and Coded
+    """
+    if mmap:
+        raw = np.memmap(file, dtype=np.uint8, mode='r')
+    else:
+        raw = np.fromfile(file, dtype=np.uint8)
+    if raw[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError(f'{file} is not a libmark columnar file')
+    size = int(raw[len(MAGIC):len(MAGIC) + 8].view('<u8')[0])
+    start = len(MAGIC) + 8
+    header = json.loads(raw[start:start + size].tobytes())
+
+    columns = {}
+    for name, column in header['columns'].items():
+        arrays = {}
+        for part, buffer in column['buffers'].items():
+            dtype = np.dtype(buffer['dtype'])
+            end = buffer['offset'] + buffer['count'] * dtype.itemsize
+            arrays[part] = raw[buffer['offset']:end].view(dtype)
+        columns[name] = DECODERS[column['kind']](column, **arrays)
+    return columns, header['meta']
+
+
+def column_kind(data):
+    """Pick the kind of column 'data' (a list with an item per run) fits"""
+    if all(_is_number(x) for x in data):
+        return 'array'
+    if all(isinstance(x, str) or x is None for x in data):
+        return 'strings'
+    if all(x is None or _is_string_list(x) for x in data):
+        return 'coded'
+    return 'json'
+
+
+def _is_number(x):
+    return isinstance(x, numbers.Real) and not isinstance(x, bool)
+
+
+def _is_string_list(x):
+    return isinstance(x, list) and all(isinstance(s, str) for s in x)
+
+
+def _aligned(n):
+    return -(-n // ALIGNMENT) * ALIGNMENT
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=INT)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _encode_array(data):
+    if all(isinstance(x, numbers.Integral) for x in data):
+        return {'values': np.asarray(data, dtype=INT)}
+    return {'values': np.asarray(data, dtype=FLOAT)}
+
+
+def _encode_ragged(data):
+    arrays = [np.asarray(x, dtype=FLOAT).ravel() for x in data]
+    values = np.concatenate(arrays) if arrays else np.zeros(0, FLOAT)
+    return {'values': values.astype(FLOAT),
+            'offsets': _offsets([len(x) for x in arrays])}
+
+
+def _encode_strings(data):
+    encoded = [b'' if x is None else x.encode('UTF-8') for x in data]
+    return {'values': np.frombuffer(b''.join(encoded), dtype=BYTE),
+            'offsets': _offsets([len(x) for x in encoded]),
+            'none': [i for i, x in enumerate(data) if x is None]}
+
+
+def _encode_json(data):
+    return _encode_strings([json.dumps(x) for x in data])
+
+
+def _encode_coded(data):
+    vocabulary = {}
+    codes = []
+    for strings in data:
+        if strings is None:
+            codes.append([-1])
+            continue
+        codes.append([vocabulary.setdefault(s, len(vocabulary))
+                      for s in strings])
+    vocabulary = list(vocabulary)
+    flat = [code for c in codes for code in c]
+    encoded = {'values': np.asarray(flat, dtype=CODE),
+               'offsets': _offsets([len(c) for c in codes])}
+    for part, array in _encode_strings(vocabulary).items():
+        encoded['vocabulary_' + part] = array
+    return encoded
+
+
+def _decode_coded(column, values, offsets, vocabulary_values,
+                  vocabulary_offsets):
+    vocabulary = Strings(vocabulary_values, vocabulary_offsets).tolist()
+    return Coded(values, offsets, vocabulary)
+
+
+ENCODERS = {
+    'array': _encode_array,
+    'ragged': _encode_ragged,
+    'strings': _encode_strings,
+    'json': _encode_json,
+    'coded': _encode_coded,
+}
+
+DECODERS = {
+    'array': lambda column, values: values,
+    'ragged': lambda column, values, offsets: Ragged(values, offsets),
+    'strings': lambda column, values, offsets: Strings(values, offsets, column['none']), # noqa
+    'json': lambda column, values, offsets: Json(values, offsets, column['none']), # noqa
+    'coded': _decode_coded,
+}
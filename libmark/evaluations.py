@@ -0,0 +1,93 @@
+import time
+import numbers
+import tequila as tq
+from tequila.optimizers.optimizer_scipy import OptimizerSciPy
+
+# These call the callback after every iteration
+SCIPY_METHODS = OptimizerSciPy.available_methods()
+
+
+def minimize(objective, method, callback=None, time_evaluations=False,
+             **kwargs):
+    """tq.minimize that also records the wall time of each iteration
+
+    The scipy optimizers call a callback after every iteration, which
+    gives the iteration times directly, and the objective is passed on
+    unchanged. The gradient descent optimizers of tequila take a
+    callback but never call it, so their iterations are timed only with
+    time_evaluations: the objective is wrapped and its evaluations are
+    timed instead, as they evaluate it exactly once at the start of
+    every iteration. Only calls with plain numbers are timed, the
+    gradient evaluates the wrapped objective with autograd boxes.
+
+    The wrapped objective is opaque to tequila, its gradient needs one
+    more expectation value than that of the objective, which makes the
+    optimization considerably slower.
+
+    Parameters
+    ----------
+    objective : tq.Objective
+    method : str
+        optimizer, e.g. "BFGS" or "ADAM"
+    callback : callable, optional
+        passed on to tq.minimize
+    time_evaluations : bool
+        wrap the objective to time the iterations of the optimizers
+        that do not call the callback, never done for the scipy ones
+    kwargs
+        passed on to tq.minimize
+
+    return result of tq.minimize with 'iteration_times', a list with
+    the seconds spent in each iteration, empty if they were not timed
+    """
+    evaluations = []
+    iterations = []
+
+    def stamp(*args, **kw):
+        iterations.append(time.perf_counter())
+        if callback is not None:
+            callback(*args, **kw)
+
+    if time_evaluations and method.upper() not in SCIPY_METHODS:
+        objective = _timed(objective, evaluations)
+    start = time.perf_counter()
+    result = tq.minimize(objective, method=method, callback=stamp, **kwargs)
+    end = time.perf_counter()
+    if iterations:
+        stamps = [start] + iterations
+    else:
+        stamps = evaluations + [end] if evaluations else []
+    result.iteration_times = [b - a for a, b in zip(stamps, stamps[1:])]
+    return result
+
+
+def _timed(objective, evaluations):
+    """objective that appends the time of each evaluation to 'evaluations'
+    """
+    transformation = objective.transformation
+
+    def timed(*args):
+        if all(isinstance(x, numbers.Number) for x in args):
+            evaluations.append(time.perf_counter())
+        return transformation(*args)
+
+    return tq.Objective(args=objective.args, transformation=timed)
+
+
+def count(run):
+    """Number of objective and gradient evaluations of a run
+
+    Read from what tequila records: the scipy result for the scipy
+    optimizers (njev is missing for those not using a gradient) and
+    the history for the others, which evaluate both once per
+    iteration.
+
+    return tuple (function evaluations, gradient evaluations)
+    """
+    scipy_result = getattr(run, 'scipy_result', None)
+    if scipy_result is not None:
+        return (int(scipy_result.get('nfev', 0)),
+                int(scipy_result.get('njev', 0) or 0))
+    history = run.history
+    return (len(getattr(history, 'energies', [])),
+            len(getattr(history, 'gradients', [])))
@@ -1,21 +1,12 @@
-import typing
-import tequila as tq
-from dataclasses import dataclass
-from tequila.circuit.circuit import QCircuit
-from .vqe import run
+from .circuit import build_circuit, parse_gates
+from .vqe import run, iterate
+from .checkpoint import Checkpoint
+from .timing import Timings
 
 # Heavily inspired by:
 # https://github.com/ohtu2021-kvantti/LibMark/blob/main/quantmark/circuit.py
 
 
-@dataclass
-class Gate:
-    name: str
-    target: typing.List[str]
-    control: typing.List[str] = None
-    parameter: typing.Union[str, float] = None
-
-
 class QleaderExperiment():
     """ An object which can be used to recreate a
     VQE result from the Quantmark website.
@@ -26,6 +17,10 @@ class QleaderExperiment():
     -------
     run_experiment()
         Runs the experiment and returns the results
+    iter_experiment()
+        Runs the experiment and yields the results as they finish
+    checkpoint_status(checkpoint_dir)
+        Returns the distances completed and remaining in a checkpoint
     build_circuits()
         Builds a tequila.circuit.circuit.QCircuit objects and returns them
     """
@@ -37,77 +32,106 @@ class QleaderExperiment():
         self.basis_set = kwargs['basis_set']
         self.optimizer = kwargs['optimizer']
         self.circuits = None
+        self.warm_start_report = None
+        # Summed over the distances run, each result has its own timings
+        self.timings = Timings()
 
     def build_circuits(self):
         """Builds QCircuit object from 'self.ansatz'"""
 
-        n = len(self.distances)
-        circuits = [QCircuit()]*n
-        for i in range(n):
-            for j in range(len(self.ansatz[i])):
-                gate = self.__create_gate(self.ansatz[i][j])
-                circuits[i] += self.__create_tq_gate(gate)
+        # Distances with the same ansatz share one circuit
+        built = {}
+        circuits = []
+        with self.timings.phase('build_circuits'):
+            for i in range(len(self.distances)):
+                ansatz = self.ansatz[i]
+                key = tuple(ansatz)
+                if key not in built:
+                    built[key] = build_circuit(parse_gates(ansatz))
+                circuits.append(built[key])
         self.circuits = circuits
         return circuits
 
-    def __create_gate(self, gate: str) -> Gate:
-        name = gate.split('(', 1)[0]
-
-        # Get target values
-        target_values = gate.split('target=(', 1)[1].split(')')[0]
-        parts = target_values.split(',')
-        # If last element is not int but ''
-        if not parts[-1]:
-            parts = parts[:-1]
-        target = [int(n) for n in parts]
-
-        # Get control values if available
-        control = None
-        if 'control' in gate:
-            control_values = gate.split('control=(', 1)[1].split(')')[0]
-            parts = control_values.split(',')
-            if not parts[-1]:
-                parts = parts[:-1]
-            control = [int(n) for n in parts]
-
-        # Get parameter if available
-        parameter = None
-        if 'parameter' in gate:
-            param_str = gate.split("parameter=", 1)[1].split(')')[0]
-            try:
-                parameter = float(param_str)
-            except ValueError:
-                parameter = param_str
-
-        return Gate(name=name,
-                    target=target,
-                    control=control,
-                    parameter=parameter)
-
-    def __create_tq_gate(self, gate: Gate) -> QCircuit:
-        if gate.name in ['X', 'Y', 'Z', 'H']:
-            gate_method = getattr(tq.gates, gate.name)
-            return gate_method(target=gate.target, control=gate.control) # noqa
-        if gate.name in ['Rx', 'Ry', 'Rz']:
-            gate_method = getattr(tq.gates, gate.name)
-            return gate_method(gate.parameter, target=gate.target, control=gate.control) # noqa
-        if gate.name in ['Phase']:
-            return tq.gates.Phase(phi=gate.parameter, target=gate.target, control=gate.control) # noqa
-        if gate.name in ['SWAP']:
-            first, second = gate.target
-            return tq.gates.SWAP(first=first, second=second, control=gate.control) # noqa
-        raise ValueError(f'Gate of type {gate.name} is not supported.')
-
-    def run_experiment(self):
+    def run_experiment(self, workers=None, warm_start=False, equilibrium=None,
+                       cache=None, checkpoint_dir=None):
         """
         Run experiment
 
+        Parameters
+        ----------
+        workers : int, optional
+            Number of processes the distances are spread over.
+            By default the distances are run one after another.
+        warm_start : bool
+            Start each distance from the optimized variables of the
+            nearest distance that has already finished. The iterations
+            used per distance, and how many fewer than the first distance
+            of the sweep, are stored in 'self.warm_start_report'.
+            Cannot be combined with workers.
+        equilibrium : float, optional
+            With warm_start, start from the distance closest to this one
+            and sweep outward from it.
+        cache : libmark.cache.MoleculeCache, optional
+            Read the Hamiltonians from this cache instead of running
+            the quantum chemistry again for known distances.
+        checkpoint_dir : str, optional
+            Store the result of each distance in this directory as soon
+            as it finishes. Running again with the same directory, e.g.
+            after a crash, loads the stored distances and runs only the
+            remaining ones. See checkpoint_status.
+
         Returns
         ----------
-        A list of tuples, (int, results)
+        A list of tuples, (int, results), in distance order
             int - distance
-            results - result object returned by tq.minimize
+            results - result object returned by tq.minimize, or the
+                      exception raised if the run at that distance failed.
+                      Its 'timings' attribute holds the time spent in each
+                      phase, summed over the distances in 'self.timings'.
+        """
+        if self.circuits is None:
+            self.build_circuits()
+        return run(self, workers=workers, warm_start=warm_start,
+                   equilibrium=equilibrium, cache=cache,
+                   checkpoint_dir=checkpoint_dir)
+
+    def iter_experiment(self, workers=None, warm_start=False,
+                        equilibrium=None, cache=None, order='distance',
+                        checkpoint_dir=None):
+        """
+        Run experiment, yielding the result of each distance when it is done
+
+        The results can be stored, e.g. added to a tracker, or inspected
+        while the sweep goes on, and are not kept once they are yielded.
+        Stopping the iteration early cancels the distances not started.
+
+        Parameters
+        ----------
+        Those of run_experiment and
+
+        order : str
+            'distance' (default) yields the results in distance order,
+            'completion' as soon as each one finishes. They differ with
+            workers, or with warm_start and equilibrium.
+
+        Yields
+        ----------
+        tuples (int, results), see run_experiment
         """
         if self.circuits is None:
             self.build_circuits()
-        return run(self)
+        return iterate(self, workers=workers, warm_start=warm_start,
+                       equilibrium=equilibrium, cache=cache, order=order,
+                       checkpoint_dir=checkpoint_dir)
+
+    def checkpoint_status(self, checkpoint_dir):
+        """
+        Distances of this experiment stored in a checkpoint directory
+
+        Only checks which files exist, nothing is loaded or run.
+
+        Returns
+        ----------
+        dict with lists 'completed' and 'remaining' of distances
+        """
+        return Checkpoint(checkpoint_dir, self).status()
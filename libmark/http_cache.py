@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'libmark', 'http') # noqa
+
+# Seconds a response stays fresh, by the first pattern found in its path.
+# None is forever: an experiment never changes once it is on the server.
+DEFAULT_TTLS = [
+    (r'distances/$', 24 * 3600),
+    (r'fci/', 24 * 3600),
+    (r'download/experiment/$', None),
+    (r'download/dump/$', 3600),
+]
+
+# Describe the body as it was sent, not the decoded content that is stored
+DECODED_HEADERS = ['content-encoding', 'content-length', 'transfer-encoding']
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseCache():
+    """On-disk cache of GET responses from the QuantMark API
+
+    A response is served from the disk while it is fresh (see ttls).
+    After that it is revalidated with If-None-Match / If-Modified-Since,
+    so an unchanged response costs a 304 without a body. In offline mode,
+    or when the server cannot be reached, stored responses are served
+    however old they are.
+
+    Responses are keyed by URL and Authorization header, so users with
+    different tokens do not share private experiments.
+
+    ...
+
+    Methods
+    -------
+    fetch(client, path, **kwargs)
+        GET client.url + path through the cache
+    clear()
+        Removes every stored response
+    """
+
+    def __init__(self, directory=None, ttls=None, offline=None):
+        """Initializes the cache.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Where the responses are stored. Defaults to
+            $LIBMARK_CACHE_DIR/http or ~/.cache/libmark/http.
+        ttls : list of (str, float), optional
+            (regex, seconds) pairs, the first regex found in the path of
+            a request gives its time to live. None is forever and paths
+            matching no regex are always revalidated.
+        offline : bool, optional
+            Never contact the server. Defaults to True if $LIBMARK_OFFLINE
+            is set.
+        """
+        if directory is None:
+            base = os.environ.get('LIBMARK_CACHE_DIR')
+            directory = os.path.join(base, 'http') if base else DEFAULT_DIRECTORY # noqa
+        if offline is None:
+            offline = bool(os.environ.get('LIBMARK_OFFLINE'))
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ttls = [(re.compile(p), t) for p, t in (ttls or DEFAULT_TTLS)]
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def fetch(self, client, path='', **kwargs):
+        """GET a response through the cache
+
+        With stream=True the body is copied to the disk in chunks and
+        read back from there, so it is never held in memory as a whole.
+
+        return requests.Response
+        """
+        headers = dict(kwargs.pop('headers', None) or {})
+        stream = kwargs.get('stream', False)
+        file = self._path(client.url + path, headers.get('Authorization'))
+        entry = self._load(file)
+
+        if self.offline or (entry is not None and self._fresh(path, entry)):
+            return self._cached(client.url + path, entry, stream)
+        if entry is not None:
+            headers.update(_validators(entry[0]))
+        try:
+            response = client.request('GET', path, headers=headers, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if entry is None:
+                raise
+            self.hits += 1  # stale, but better than nothing
+            return self._response(entry, stream)
+
+        if response.status_code == 304 and entry is not None:
+            return self._revalidated(file, response, entry, stream)
+        if entry is not None:
+            entry[1].close()
+        self.misses += 1
+        if response.status_code != 200:
+            return response
+        return self._stored(file, client.url + path, response, stream)
+
+    def _cached(self, url, entry, stream):
+        """Serve a stored response, offline or while it is fresh"""
+        if entry is None:
+            raise requests.ConnectionError(
+                f'{url} is not cached and libmark is offline'
+            )
+        self.hits += 1
+        return self._response(entry, stream)
+
+    def _revalidated(self, file, response, entry, stream):
+        """Serve the stored response the server answered 304 to"""
+        response.close()
+        self.revalidated += 1
+        meta, body = entry
+        meta['stored'] = time.time()
+        with body:
+            chunks = iter(lambda: body.read(CHUNK_SIZE), b'')
+            self._store(file, meta, chunks)
+        return self._response(self._load(file), stream)
+
+    def _stored(self, file, url, response, stream):
+        """Store a 200 response and return it"""
+        meta = {
+            'url': url,
+            'stored': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() not in DECODED_HEADERS}
+        }
+        if not stream:
+            self._store(file, meta, [response.content])
+            return response
+        with response:
+            self._store(file, meta, response.iter_content(CHUNK_SIZE))
+        return self._response(self._load(file), stream)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.response'):
+                os.remove(os.path.join(self.directory, name))
+
+    def _ttl(self, path):
+        for pattern, ttl in self.ttls:
+            if pattern.search(path):
+                return ttl
+        return 0
+
+    def _fresh(self, path, entry):
+        ttl = self._ttl(path)
+        return ttl is None or time.time() - entry[0]['stored'] < ttl
+
+    def _path(self, url, authorization):
+        key = hashlib.sha256(f'{url}\0{authorization}'.encode('UTF-8'))
+        return os.path.join(self.directory, key.hexdigest() + '.response')
+
+    def _load(self, file):
+        """return (meta, body) of a stored response or None
+
+        body is the open file, positioned at the start of the body
+        """
+        try:
+            f = open(file, 'rb')
+        except OSError:
+            return None
+        try:
+            return json.loads(f.readline()), f
+        except ValueError:
+            f.close()
+            return None
+
+    def _store(self, file, meta, chunks):
+        # A temporary file is used so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json.dumps(meta).encode('UTF-8') + b'\n')
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, file)
+
+    def _response(self, entry, stream=False):
+        meta, body = entry
+        response = requests.Response()
+        response.status_code = 200
+        response.url = meta['url']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        if stream:
+            response.raw = body  # closed with the response
+        else:
+            with body:
+                response._content = body.read()
+        return response
+
+
+def _validators(meta):
+    """Conditional request headers of a stored response"""
+    headers = {}
+    if meta['etag']:
+        headers['If-None-Match'] = meta['etag']
+    if meta['last_modified']:
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers
@@ -0,0 +1,162 @@
+import os
+import json
+from collections.abc import Sequence
+
+JOURNAL_VERSION = 1
+
+
+class Journal():
+    """Append-only JSON-Lines file with a record per VQE run
+
+    The first line is a header, e.g. the class and optimizer of the
+    result, and every other line holds the columns of one run. A record
+    is written and synced to disk as soon as its last column is
+    appended, so a crash loses at most the run in progress. Opening an
+    existing journal drops a partially written last line and resumes
+    after the complete records.
+
+    ...
+
+    Methods
+    -------
+    column(name)
+        Returns a JournalColumn, a lazy view of one column
+    rows()
+        Iterates over the records as dicts
+    read_columns(names)
+        Reads several columns in one pass over the file
+    discard()
+        Drops the columns staged for the current run
+    """
+
+    def __init__(self, file, columns, header, meta=None):
+        """Opens or creates the journal
+
+        Parameters
+        ----------
+        file : str
+        columns : list of str
+            Names of the columns every record has
+        header : dict
+            Written as the first line of a new journal. An existing
+            journal must have the same header.
+        meta : callable, optional
+            Returns a dict that is added to each record, e.g. values
+            that are the same for every run but only known after it
+        """
+        self.file = file
+        self.columns = list(columns)
+        self.meta = meta
+        self.header = dict(header, journal=JOURNAL_VERSION)
+        self._offsets = []
+        self._staged = {}
+        self._last = None
+        if os.path.isfile(file) and os.path.getsize(file) > 0:
+            self._recover()
+        else:
+            with open(file, 'wb'):
+                pass
+            self._append(self.header)
+
+    def _recover(self):
+        with open(self.file, 'rb+') as f:
+            header = f.readline()
+            if not header.endswith(b'\n') or json.loads(header) != self.header: # noqa
+                raise ValueError(f'{self.file} is not a journal of this result') # noqa
+            offset = f.tell()
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # interrupted while writing
+                self._offsets.append(offset)
+                self._last = line
+                offset += len(line)
+            f.truncate(offset)
+
+    def _append(self, record):
+        line = json.dumps(record, default=_to_list).encode('UTF-8') + b'\n'
+        # Opened per record, a run takes far longer than this
+        with open(self.file, 'ab') as f:
+            offset = f.tell()
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        return offset, line
+
+    def last_record(self):
+        """return the last complete record or None"""
+        return None if self._last is None else json.loads(self._last)
+
+    def column(self, name):
+        return JournalColumn(self, name)
+
+    def stage(self, name, value):
+        """Add a column of the current run, write it when it is complete"""
+        self._staged[name] = value
+        if len(self._staged) < len(self.columns):
+            return
+        record = dict(self.meta() if self.meta else {}, **self._staged)
+        self._staged = {}
+        offset, self._last = self._append(record)
+        self._offsets.append(offset)
+
+    def discard(self):
+        """Drop the staged columns of a run that was not completed"""
+        self._staged = {}
+
+    def read(self, index):
+        """return record 'index' as a dict"""
+        with open(self.file, 'rb') as f:
+            f.seek(self._offsets[index])
+            return json.loads(f.readline())
+
+    def rows(self):
+        """Iterate over the records in one pass over the file"""
+        with open(self.file, 'rb') as f:
+            f.seek(self._offsets[0] if self._offsets else 0)
+            for _ in range(len(self)):
+                yield json.loads(f.readline())
+
+    def read_columns(self, names):
+        """return {name: list} of the columns, reading each record once"""
+        columns = {name: [] for name in names}
+        for row in self.rows():
+            for name in names:
+                columns[name].append(row[name])
+        return columns
+
+    def __len__(self):
+        return len(self._offsets)
+
+
+class JournalColumn(Sequence):
+    """List-like view of one column of a Journal, read from disk on access"""
+
+    def __init__(self, journal, name):
+        self.journal = journal
+        self.name = name
+
+    def __len__(self):
+        return len(self.journal)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return self.journal.read(i % len(self))[self.name]
+
+    def __iter__(self):
+        for row in self.journal.rows():
+            yield row[self.name]
+
+    def append(self, value):
+        self.journal.stage(self.name, value)
+
+    def tolist(self):
+        return list(self)
+
+
+def _to_list(value):
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
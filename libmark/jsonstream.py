@@ -0,0 +1,158 @@
+import re
+import json
+import codecs
+
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+DECODER = json.JSONDecoder()
+
+
+def load(chunks):
+    """Decode a JSON document given as an iterable of bytes
+
+    Like json.loads, but the encoded document is never held in memory
+    as a whole, only the chunk being decoded.
+    """
+    reader = _Reader(chunks)
+    value = reader.value()
+    reader.end()
+    return value
+
+
+def fields(chunks, streamed=()):
+    """Iterate over the fields of a JSON object given as bytes chunks
+
+    Each field is decoded when it is reached, so only one field is in
+    memory at a time. Fields named in 'streamed' are decoded one item at
+    a time if they are arrays: their value is a generator over the items,
+    which reads the stream as it is consumed. Like the groups of
+    itertools.groupby, it must be consumed before the next field is
+    requested, the items left are skipped.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        e.g. requests.Response.iter_content(CHUNK_SIZE)
+    streamed : collection of str
+
+    Yields
+    ----------
+    (str, value)
+    """
+    reader = _Reader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        reader.end()
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError(f'Expected a key, got {key!r}')
+        reader.expect(':')
+        if key in streamed and reader.peek() == '[':
+            items = _items(reader)
+            yield key, items
+            for _ in items:
+                pass
+        else:
+            yield key, reader.value()
+        if reader.peek() == '}':
+            reader.pos += 1
+            break
+        reader.expect(',')
+    reader.end()
+
+
+def _items(reader):
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == ']':
+            reader.pos += 1
+            return
+        reader.expect(',')
+
+
+class _Reader():
+    """Text buffer over the bytes chunks holding only what is not decoded"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('UTF-8')()
+        self._done = False
+        self.buffer = ''
+        self.pos = 0
+
+    def _more(self, size=1):
+        """Read until at least 'size' characters are added
+
+        return False at the end of the stream
+        """
+        read = [self.buffer[self.pos:]]
+        added = 0
+        while added < size and not self._done:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                text = self._decoder.decode(b'', final=True)
+                self._done = True
+            else:
+                text = self._decoder.decode(chunk)
+            read.append(text)
+            added += len(text)
+        self.buffer = ''.join(read)
+        self.pos = 0
+        return added > 0
+
+    def peek(self):
+        """return the next character that is not whitespace"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._more():
+                raise json.JSONDecodeError('Unexpected end of data',
+                                           self.buffer, self.pos)
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f'Expected {char!r}, found {found!r}', # noqa
+                                       self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # The value continues in the next chunks. The buffer at
+                # least doubles each time, so a large value is decoded
+                # a bounded number of times.
+                if not self._more(len(self.buffer) - self.pos):
+                    raise
+                continue
+            # A number cut by the end of the buffer may continue, e.g. 1.|25
+            if _number(value) and self.buffer[end:end + 1] in '.eE+-' \
+                    and self._more():
+                continue
+            self.pos = end
+            return value
+
+    def end(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                raise json.JSONDecodeError('Extra data', self.buffer,
+                                           self.pos)
+            if not self._more():
+                return
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,178 @@
+import os
+import json
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from . import payload
+from .client import Client, get_client
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.local', 'share', 'libmark', 'outbox') # noqa
+
+
+class Outbox():
+    """Durable local queue of results waiting to be pushed
+
+    Results are spooled as JSON files named by the hash of their content
+    in 'pending/'. A result that has been accepted by the server is moved
+    to 'sent/' together with the response, so the same result is never
+    pushed twice: spooling or sending it again returns the stored
+    response. Every upload also carries the hash as an Idempotency-Key
+    header, for servers that deduplicate requests themselves.
+
+    Results can be spooled on a node without network access and the
+    directory flushed later from another node, e.g. with
+    'python push.py flush'. Every entry records the URL of the server it
+    was meant for, the url of get_client() when it was spooled, and is
+    pushed there.
+
+    ...
+
+    Methods
+    -------
+    put(result, token, compression=None)
+        Spools a result dict, returns its key
+    send(result, token, compression=None)
+        Pushes a result now, spooling it if the server cannot be reached
+    flush(concurrency=4, keys=None)
+        Pushes every pending result, or only those with the given keys
+    pending()
+        Returns the keys of the results waiting to be pushed
+    response(key)
+        Returns the server response to a pushed result or None
+    """
+
+    def __init__(self, directory=None):
+        """Initializes the outbox.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Defaults to $LIBMARK_OUTBOX or ~/.local/share/libmark/outbox
+        """
+        if directory is None:
+            directory = os.environ.get('LIBMARK_OUTBOX', DEFAULT_DIRECTORY)
+        self.directory = directory
+        for state in ['pending', 'sent']:
+            os.makedirs(os.path.join(directory, state), exist_ok=True)
+
+    @staticmethod
+    def key(result):
+        """Content hash of a result dict"""
+        encoded = json.dumps(result, sort_keys=True, default=_to_list)
+        return hashlib.sha256(encoded.encode('UTF-8')).hexdigest()
+
+    def put(self, result, token, compression=None):
+        """Spool a result to be pushed by flush()
+
+        Parameters
+        ----------
+        result : dict
+            e.g. returned by QleaderResult.get_result_dict()
+        token : str
+            Value of the Authorization header, e.g. 'Token ...'. No
+            header is sent if it is empty.
+        compression : str, optional
+            See QleaderResult.push
+
+        return str, the key of the result
+        """
+        key = self.key(result)
+        if self.response(key) is None:
+            entry = {'url': get_client().url, 'token': token,
+                     'compression': compression, 'result': result}
+            self._write(self._path('pending', key), entry)
+        return key
+
+    def send(self, result, token, compression=None):
+        """Push a result now, at most once
+
+        If the server cannot be reached the result is spooled and the
+        error raised, flush() pushes it later.
+
+        return the server response as returned by QleaderResult.push
+        """
+        return self._upload(self.put(result, token, compression))
+
+    def flush(self, concurrency=4, keys=None):
+        """Push every pending result
+
+        Parameters
+        ----------
+        concurrency : int
+            Number of uploads running at the same time
+        keys : list of str, optional
+            Push only these results, e.g. returned by put()
+
+        return list of (key, response), response is the exception raised
+        if the upload failed, the result then stays pending
+        """
+        keys = self.pending() if keys is None else list(keys)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(self._upload, key) for key in keys]
+        flushed = []
+        for key, future in zip(keys, futures):
+            try:
+                flushed.append((key, future.result()))
+            except Exception as e:
+                flushed.append((key, e))
+        return flushed
+
+    def pending(self):
+        names = os.listdir(os.path.join(self.directory, 'pending'))
+        return sorted(n[:-len('.json')] for n in names if n.endswith('.json')) # noqa
+
+    def response(self, key):
+        try:
+            with open(self._path('sent', key), 'r') as f:
+                return json.load(f)['response']
+        except (OSError, ValueError):
+            return None
+
+    def _upload(self, key):
+        stored = self.response(key)
+        if stored is not None:  # pushed by an earlier, interrupted flush
+            self._remove(self._path('pending', key))
+            return stored
+        with open(self._path('pending', key), 'r') as f:
+            entry = json.load(f)
+        headers = {'Idempotency-Key': key}
+        if entry['token']:
+            headers['Authorization'] = entry['token']
+        client = get_client()
+        url = entry.get('url', client.url)
+        if url == client.url:
+            response = payload.post(entry['result'], headers, entry['compression']) # noqa
+        else:
+            # Spooled for another server than the one in use now
+            with Client(url) as client:
+                response = payload.post(entry['result'], headers, entry['compression'], client=client) # noqa
+        response.raise_for_status()
+        data = response.json()
+        # Recorded as sent before the pending file is removed, so a crash
+        # in between leaves a result that is skipped, not pushed again
+        self._write(self._path('sent', key), {'response': data})
+        self._remove(self._path('pending', key))
+        return data
+
+    def _path(self, state, key):
+        return os.path.join(self.directory, state, key + '.json')
+
+    def _write(self, path, data):
+        # mkstemp creates the file readable only by the owner, as it holds
+        # the token, and readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, default=_to_list)
+        os.replace(tmp, path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _to_list(value):
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
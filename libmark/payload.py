@@ -0,0 +1,140 @@
+import json
+import time
+import zlib
+from .client import get_client
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+def post(result, headers, compression=None, default=None, client=None):
+    """Send a result dict to the server, see QleaderResult.push
+
+    The result is sent with 'client', by default get_client().
+
+    return requests.Response
+    """
+    client = client or get_client()
+    headers = dict(headers)
+    if compression is None:
+        return client.post(
+            json=json.dumps(result, indent=4, default=default),
+            headers=headers
+        )
+
+    if compression == "auto":
+        options = client.options(headers=headers)
+        compression = negotiate(options.headers.get('Accept-Encoding', ''))
+    headers['Content-Type'] = 'application/json'
+    if compression is not None:
+        headers['Content-Encoding'] = compression
+    body = encode(result, compression, default=default)
+    return client.post(data=body, headers=headers)
+
+
+def encode(result, compression=None, default=None, chunk_size=CHUNK_SIZE):
+    """Encode a result dict as JSON once and compress it on the fly
+
+    The JSON is produced piece by piece and compressed in chunks of about
+    chunk_size bytes, so the whole payload is never held in memory.
+    The generator can be given to requests as data, which then sends
+    it with chunked transfer encoding.
+
+    Parameters
+    ----------
+    result : dict
+    compression : str, optional
+        "gzip", "zstd" (needs the zstandard package) or None
+    default : callable, optional
+        Passed to json, called for values json cannot encode
+
+    Yields
+    ----------
+    bytes
+    """
+    compress, flush = _compressor(compression)
+    buffered = []
+    size = 0
+    for piece in json.JSONEncoder(default=default).iterencode(result):
+        buffered.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            data = compress(''.join(buffered).encode('UTF-8'))
+            buffered, size = [], 0
+            if data:
+                yield data
+    data = compress(''.join(buffered).encode('UTF-8')) + flush()
+    if data:
+        yield data
+
+
+def negotiate(accept_encoding):
+    """Pick the compression for a request body
+
+    Parameters
+    ----------
+    accept_encoding : str
+        Accept-Encoding header of a server response, with which a server
+        lists the codings it accepts in requests (RFC 7694)
+
+    return "zstd", "gzip" or None
+    """
+    accepted = {}
+    for item in accept_encoding.split(','):
+        coding, *parameters = [p.strip() for p in item.split(';')]
+        q = 1.0
+        for parameter in parameters:
+            if parameter.startswith('q='):
+                try:
+                    q = float(parameter[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    supported = ['zstd', 'gzip'] if zstandard is not None else ['gzip']
+    candidates = [c for c in supported if accepted.get(c, 0) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda c: accepted[c])
+
+
+def report(result, default=None):
+    """Compare the size and encoding time of the ways to push a result
+
+    "double encoded" is the original push payload, the indented JSON
+    string of the result encoded as JSON again.
+
+    return dict, name -> {"bytes": int, "seconds": float}
+    """
+    def double_encoded():
+        yield json.dumps(json.dumps(result, indent=4, default=default)).encode('UTF-8') # noqa
+
+    ways = {"double encoded": double_encoded,
+            "json": lambda: encode(result, None, default),
+            "gzip": lambda: encode(result, "gzip", default)}
+    if zstandard is not None:
+        ways["zstd"] = lambda: encode(result, "zstd", default)
+    measured = {}
+    for name, payload in ways.items():
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in payload())
+        measured[name] = {"bytes": size,
+                          "seconds": time.perf_counter() - start}
+    return measured
+
+
+def _compressor(compression):
+    if compression is None:
+        return (lambda data: data), (lambda: b'')
+    if compression == 'gzip':
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        return compressor.compress, compressor.flush
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError('zstd compression needs the zstandard package')
+        compressor = zstandard.ZstdCompressor().compressobj()
+        return compressor.compress, compressor.flush
+    raise ValueError(f'Unknown compression {compression}')
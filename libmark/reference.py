@@ -0,0 +1,136 @@
+import os
+import ast
+import json
+import tempfile
+import tequila as tq
+from concurrent.futures import ProcessPoolExecutor
+from .vqe import H2_geometry
+
+DEFAULT_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'libmark', 'fci.json') # noqa
+
+
+class ReferenceEnergies():
+    """Local store of FCI reference energies.
+
+    Energies are keyed by geometry, basis set and active space and kept in
+    a JSON file, so each reference energy is computed or downloaded once.
+
+    ...
+
+    Methods
+    -------
+    get(geometry, basis_set, active_orbitals=None)
+        Returns a stored energy or None
+    fci(molecule)
+        Returns the FCI energy of a molecule, computing it on a miss
+    compute(distances, basis_set, workers=None)
+        Computes the FCI energies of H2 for a list of distances
+    import_table(basis_set, table)
+        Stores a table returned by libmark.api.get_fci
+    table(basis_set)
+        Returns an imported table or None
+    """
+
+    def __init__(self, file=None):
+        """Initializes the store.
+
+        Parameters
+        ----------
+        file : str, optional
+            JSON file the energies are kept in.
+            Defaults to $LIBMARK_FCI_FILE or ~/.cache/libmark/fci.json
+        """
+        if file is None:
+            file = os.environ.get('LIBMARK_FCI_FILE', DEFAULT_FILE)
+        self.file = file
+        self.energies = {}
+        self.tables = {}
+        if os.path.isfile(file):
+            with open(file, 'r') as f:
+                data = json.load(f)
+            self.energies = data['energies']
+            self.tables = data['tables']
+
+    @staticmethod
+    def key(geometry, basis_set, active_orbitals=None):
+        # Coordinates are compared as numbers, '1' and '1.0' are the same
+        atoms = []
+        for line in geometry.strip().splitlines():
+            atom, *coordinates = line.split()
+            atoms.append(' '.join([atom] + [repr(float(c)) for c in coordinates])) # noqa
+        return '|'.join([
+            str(basis_set).lower(),
+            json.dumps(active_orbitals, sort_keys=True),
+            ';'.join(atoms)
+        ])
+
+    def get(self, geometry, basis_set, active_orbitals=None):
+        return self.energies.get(self.key(geometry, basis_set, active_orbitals)) # noqa
+
+    def fci(self, molecule):
+        """FCI energy of a tequila molecule, computed only if not stored"""
+        active_orbitals = None
+        if molecule.active_space is not None:
+            active_orbitals = list(molecule.active_space.active_orbitals)
+        key = self.key(molecule.parameters.geometry,
+                       molecule.parameters.basis_set,
+                       active_orbitals)
+        if key not in self.energies:
+            self.energies[key] = molecule.compute_energy(method='fci')
+            self.save()
+        return self.energies[key]
+
+    def compute(self, distances, basis_set, workers=None):
+        """Compute the missing FCI energies of H2 at the given distances
+
+        The energies are computed in a process pool when workers is given.
+
+        return list of energies in distance order
+        """
+        missing = [d for d in distances if self.get(H2_geometry(d), basis_set) is None] # noqa
+        if workers is not None and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                energies = list(executor.map(
+                    _h2_fci, missing, [basis_set]*len(missing)
+                ))
+        else:
+            energies = [_h2_fci(d, basis_set) for d in missing]
+        for d, energy in zip(missing, energies):
+            self.energies[self.key(H2_geometry(d), basis_set)] = energy
+        if missing:
+            self.save()
+        return [self.get(H2_geometry(d), basis_set) for d in distances]
+
+    def import_table(self, basis_set, table):
+        """Store the table returned by libmark.api.get_fci
+
+        The table can be a dict {distance: energy} or a list of
+        (distance, energy) pairs. Each row is also stored as the
+        reference energy of H2 at that distance.
+        """
+        rows = table.items() if isinstance(table, dict) else table
+        rows = [[float(d), float(e)] for d, e in rows]
+        for d, energy in rows:
+            self.energies[self.key(H2_geometry(d), basis_set)] = energy
+        # Kept as a literal so the table reads back exactly as imported
+        self.tables[str(basis_set).lower()] = repr(table)
+        self.save()
+
+    def table(self, basis_set):
+        table = self.tables.get(str(basis_set).lower())
+        if table is None:
+            return None
+        return ast.literal_eval(table)
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.file))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'energies': self.energies, 'tables': self.tables}, f)
+        os.replace(tmp, self.file)
+
+
+def _h2_fci(R, basis_set):
+    molecule = tq.chemistry.Molecule(geometry=H2_geometry(R), basis_set=basis_set) # noqa
+    return molecule.compute_energy(method='fci')
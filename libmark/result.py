@@ -1,14 +1,16 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from tequila.circuit.compiler import Compiler
 from datetime import datetime
 import tequila as tq
-import requests
 import json
-
-
-# Use this (or wherever your local WebMark2 is running) while developing
-# url = 'http://localhost:8000/api/'
-url = 'https://ohtup-staging.cs.helsinki.fi/qleader/api/'
+from .circuit import fingerprint, LRUCache
+from . import columnar
+from . import payload
+from .journal import Journal, JournalColumn
+from .outbox import Outbox
+from .timing import Timings
+from . import evaluations
 
 DEFAULT_COMPILER_ARGUMENTS = {
     "multitarget": True,
@@ -32,6 +34,13 @@ DEFAULT_COMPILER_ARGUMENTS = {
     "ch_gate": True
 }
 
+# Analysis of ansatz structures seen before, keyed by circuit.fingerprint.
+# Values are (fermionic depth, result of extract_gates).
+compiled_ansatz = LRUCache(maxsize=64)
+
+# Attributes named differently from their key in get_result_dict
+RESULT_ATTRIBUTES = {"molecule": "molecules"}
+
 
 class QleaderResult(ABC):
     """QleaderResult object for collecting data about a set of VQE runs.
@@ -40,15 +49,29 @@ class QleaderResult(ABC):
 
     Methods
     -------
+    minimize(objective, **kwargs)
+        tq.minimize with this optimizer, timing each iteration
     add_run(run, molecule, hamiltonian, ansatz)
         Add a VQE run to the result object
+    join()
+        Wait for deferred gate extraction to finish
     push()
         Push results to the server
     save()
-        Saves the results to a JSON file
+        Saves the results to a JSON or a columnar binary file
+    load(file)
+        Loads results saved in the columnar format
     """
 
-    def __init__(self, optimizer, token):
+    # Attributes with a value per run, subclasses add their own
+    run_columns = ["energies", "variables", "histories", "molecules",
+                   "geometries", "hamiltonian", "qubits", "elementary_depth",
+                   "fermionic_depth", "ansatz", "single_qubit",
+                   "double_qubit", "history_energies", "variable_names",
+                   "variable_values", "run_timings", "iteration_times"]
+
+    def __init__(self, optimizer, token, deferred=False, workers=None,
+                 journal=None):
         """Initializes the QleaderResult object.
 
         Parameters
@@ -60,54 +83,78 @@ class QleaderResult(ABC):
 
         token : str
             Authorization token from the Quantmark website.
+
+        deferred : bool
+            If True, add_run only queues the ansatz and the gates are
+            extracted in a process pool while the VQE runs continue.
+            They are collected by join(), which get_result_dict(),
+            push() and save() call.
+
+        workers : int, optional
+            Size of the process pool used when deferred.
+
+        journal : str, optional
+            JSON-Lines file that each run is written to as soon as it
+            is added. The run columns (see run_columns) are then lazy
+            views of the file instead of lists in memory. If the file
+            exists, the runs in it are kept and new runs are appended,
+            so an interrupted campaign can be resumed. Cannot be
+            combined with deferred.
         """
+        if journal is not None and deferred:
+            raise ValueError("journal cannot be combined with deferred")
 
         self.compiler = Compiler(**DEFAULT_COMPILER_ARGUMENTS)
         self.token = f'Token {token}'
-        self.energies = []
-        self.variables = []
-        self.histories = []
-        self.molecules = []
-        self.geometries = []
-        self.hamiltonian = []
-        self.qubits = []
-        self.elementary_depth = []
-        self.fermionic_depth = []
-        self.ansatz = []
-        self.single_qubit = []
-        self.double_qubit = []
+        for column in self.run_columns:
+            setattr(self, column, [])
         self.optimizer = optimizer
         self.tqversion = tq.__version__
         self.basis_set = None
         self.transformation = None
+        self.deferred = deferred
+        self.workers = workers
+        self._executor = None
+        self._pending = []
+        self._futures = {}
+        # Time spent in add_run, join, push and save, see libmark.timing.
+        # 'run_timings' has the phases of each run.
+        self.timings = Timings()
+        self.journal = None
+        if journal is not None:
+            self._open_journal(journal)
+
+    def _open_journal(self, file):
+        self.journal = Journal(
+            file, self.run_columns,
+            header={"class": type(self).__name__, "optimizer": self.optimizer},
+            meta=lambda: {"basis_set": self.basis_set,
+                          "transformation": self.transformation}
+        )
+        for column in self.run_columns:
+            setattr(self, column, self.journal.column(column))
+        last = self.journal.last_record()
+        if last is not None:
+            self.basis_set = last["basis_set"]
+            self.transformation = last["transformation"]
 
-    # This operation takes some time to execute
-    # TODO extract every run vs. extract all at once afterwards?
+    # This operation takes some time to execute, see 'deferred'
     def extract_gates(self, ansatz):
-        try:
-            circuit = self.compiler(ansatz)
-        except Exception:
-            circuit = ansatz
-            print("Warning: could not extract gates from ansatz, \
-                   the experiment will not be automatically reproducible!")
-        counts = self.gate_qubit_counts(circuit)
-
-        return (str(circuit).split('\n')[1:-1],
-                circuit.depth, counts[0], counts[1])
-
-    # Same possible problem as above
+        return extract_gates(self.compiler, ansatz)
+
     def gate_qubit_counts(self, circuit):
-        if not isinstance(circuit, tq.QCircuit):
-            return [0, 0]
-
-        counts = [0, 0]
-        for gate in circuit.gates:
-            qubits = len(gate.target) + len(gate.control)
-            if qubits == 1:
-                counts[0] += 1
-            elif qubits == 2:
-                counts[1] += 1
-        return counts
+        return gate_qubit_counts(circuit)
+
+    def minimize(self, objective, **kwargs):
+        """Minimize the objective with the optimizer of the result
+
+        Takes the arguments of tq.minimize, the result records the wall
+        time of every iteration that add_run stores in
+        'iteration_times'. The gradient descent optimizers are timed
+        only with time_evaluations=True, which slows them down. See
+        libmark.evaluations.minimize.
+        """
+        return evaluations.minimize(objective, self.optimizer, **kwargs)
 
     def add_run(self, run, molecule, hamiltonian, ansatz):
         """Add VQE run to the Results
@@ -123,8 +170,18 @@ class QleaderResult(ABC):
         ansatz : tequila.circuit.circuit.QCircuit
             object returned by molecule.make_uccsd_ansatz()
         """
-        elem_ansatz = self.extract_gates(ansatz)
+        with self.timings.phase("add_run"):
+            try:
+                self._add_run(run, molecule, hamiltonian, ansatz)
+            finally:
+                # A run that failed partway must not leak into the next one
+                if self.journal is not None:
+                    self.journal.discard()
 
+    def _add_run(self, run, molecule, hamiltonian, ansatz):
+        # Phases timed by libmark.vqe.run_distance, if it made the run
+        run_timings = Timings()
+        run_timings.update(getattr(run, "timings", {}))
         self.energies.append(run.energy)
         self.variables.append(str(run.variables).replace('\n', ' '))
         self.histories.append(str(run.history.__dict__))
@@ -132,41 +189,235 @@ class QleaderResult(ABC):
         self.geometries.append(molecule.parameters.get_geometry())
         self.hamiltonian.append(str(hamiltonian))
         self.qubits.append(len(hamiltonian.qubits))  # the number of qubits
-        self.fermionic_depth.append(ansatz.depth)  # Ansatz gate depth
-        self.elementary_depth.append(elem_ansatz[1])
-        self.ansatz.append([str(gate) for gate in elem_ansatz[0]])
-        self.single_qubit.append(elem_ansatz[2])
-        self.double_qubit.append(elem_ansatz[3])
+        # Numeric copies of the history and variables for the binary format
+        self.history_energies.append(getattr(run.history, 'energies', []))
+        variables = dict(run.variables) if hasattr(run.variables, 'items') else {} # noqa
+        self.variable_names.append([str(k) for k in variables])
+        self.variable_values.append(list(variables.values()))
+        # Recorded by minimize, seconds per iteration
+        self.iteration_times.append(list(getattr(run, 'iteration_times', [])))
+        # Ansatzes with the same structure compile to the same gates
+        key = fingerprint(ansatz)
+        cached = compiled_ansatz.get(key)
+        if cached is None:
+            fermionic_depth = ansatz.depth
+        else:
+            fermionic_depth, elem_ansatz = cached
+        self.fermionic_depth.append(fermionic_depth)  # Ansatz gate depth
         self.basis_set = molecule.parameters.basis_set
         self.transformation = str(molecule.transformation)
 
+        if cached is not None:
+            self._add_gates(elem_ansatz)
+        elif self.deferred:
+            future = self._futures.get(key)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers) # noqa
+                future = self._executor.submit(extract_gates, self.compiler, ansatz) # noqa
+                if key is not None:
+                    self._futures[key] = future
+            self._pending.append((len(self.ansatz), key, fermionic_depth, future)) # noqa
+            self._add_gates((None, None, None, None))
+        else:
+            with run_timings.phase("extract_gates"):
+                elem_ansatz = self.extract_gates(ansatz)
+            compiled_ansatz.put(key, (fermionic_depth, elem_ansatz))
+            self._add_gates(elem_ansatz)
+        self.timings.update(run_timings)
+        self.run_timings.append(run_timings.as_dict())
+
+    def _add_gates(self, elem_ansatz, index=None):
+        gates = None
+        if elem_ansatz[0] is not None:
+            gates = [str(gate) for gate in elem_ansatz[0]]
+        columns = [self.ansatz, self.elementary_depth,
+                   self.single_qubit, self.double_qubit]
+        values = [gates, elem_ansatz[1], elem_ansatz[2], elem_ansatz[3]]
+        for column, value in zip(columns, values):
+            if index is None:
+                column.append(value)
+            else:
+                column[index] = value
+
+    def join(self):
+        """Wait for the deferred gate extractions and store their results"""
+        if not self._pending:
+            return
+        with self.timings.phase("join"):
+            self._join()
+
+    def _join(self):
+        for index, key, fermionic_depth, future in self._pending:
+            elem_ansatz = future.result()
+            compiled_ansatz.put(key, (fermionic_depth, elem_ansatz))
+            self._add_gates(elem_ansatz, index)
+        self._pending = []
+        self._futures = {}
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     @abstractmethod
     def get_result_dict(self):
+        """Implementations should call self.join() first and return
+        self._read_journal(result)"""
         pass
 
-    def push(self):
-        """Send Results to server"""
-        result = self.get_result_dict()
-        headers = {
-            'Authorization': self.token
-        }
-        response = requests.post(
-                        url, json=json.dumps(result, indent=4), headers=headers
-                    )
-        return response.json()
-
-    def save(self, file=""):
-        """Save data locally for testing and verification"""
+    def _read_journal(self, result):
+        """Replace the journal columns of result with lists
+
+        Every record is read once for all the columns, not once per
+        column.
+        """
+        keys = {key: value.name for key, value in result.items()
+                if isinstance(value, JournalColumn)}
+        if not keys:
+            return result
+        columns = self.journal.read_columns(set(keys.values()))
+        return dict(result, **{key: columns[name]
+                               for key, name in keys.items()})
+
+    def push(self, compression=None, deferred=False, outbox=None,
+             timings=False):
+        """Send Results to server
+
+        Parameters
+        ----------
+        compression : str, optional
+            By default the result is sent as an indented JSON string
+            inside a JSON body. With "gzip" or "zstd" it is encoded as
+            JSON once, compressed and streamed, which the server has to
+            accept. "auto" asks the server which of them it accepts
+            (Accept-Encoding of an OPTIONS response) and sends
+            uncompressed JSON if it accepts neither.
+            See libmark.payload.report for the difference in size.
+        deferred : bool
+            Spool the result to the outbox instead of sending it, e.g. on
+            a node without network access. Send it later with
+            outbox.flush() or 'python push.py flush'. Returns the key of
+            the spooled result.
+        outbox : libmark.outbox.Outbox, optional
+            Send the result through the outbox: it is sent at most once
+            and spooled if the server cannot be reached. Deferred pushes
+            use Outbox() if this is not given.
+        timings : bool
+            Include the time spent in each phase, per run and in total,
+            under the key "timings". See timing_report().
+        """
+        self.join()
+        with self.timings.phase("serialize"):
+            result = self.get_result_dict()
+        if timings:
+            result = dict(result, timings=self.timing_report())
+        with self.timings.phase("push"):
+            if deferred:
+                outbox = outbox or Outbox()
+                return outbox.put(result, self.token, compression)
+            if outbox is not None:
+                return outbox.send(result, self.token, compression)
+            headers = {
+                'Authorization': self.token
+            }
+            response = payload.post(result, headers, compression, _to_list)
+            return response.json()
+
+    def timing_report(self):
+        """Time spent in each phase
+
+        The phases of a run made by libmark.vqe are 'molecule',
+        'hamiltonian', 'objective' and 'minimize', followed by
+        'extract_gates' in add_run. The result itself times 'add_run'
+        (which includes extract_gates), 'join', 'serialize', 'push' and
+        'write'.
+
+        return dict with "runs", a dict per run, and "total", both
+        {phase: {"seconds": float, "count": int}}
+        """
+        return {"runs": _as_list(self.run_timings),
+                "total": self.timings.as_dict()}
+
+    def save(self, file="", format="json"):
+        """Save data locally for testing and verification
+
+        Parameters
+        ----------
+        file : str, optional
+            Defaults to a name made of the optimizer, transformation
+            and time
+        format : str
+            "json" for an indented JSON file or "columnar" for a binary
+            file that QleaderResult.load reads back. The columnar file
+            stores numbers as arrays, energy histories and variables as
+            ragged float64 arrays and ansatz gates as integer codes.
+        """
+        if format not in ["json", "columnar"]:
+            raise ValueError(f"Unknown format {format}")
         if not file:
             now = datetime.now()
+            extension = ".json" if format == "json" else ".qlr"
             file = self.optimizer + " " + \
-                self.transformation + " " + str(now) + ".json"
-        output = open(file, 'w')
-        result = self.get_result_dict()
-        output.write(json.dumps(result, indent=4))
-        output.close()
+                self.transformation + " " + str(now) + extension
+        self.join()
+        # With a journal every run is on disk already, this only converts it
+        with self.timings.phase("serialize"):
+            result = self.get_result_dict()
+        with self.timings.phase("write"):
+            if format == "columnar":
+                self._save_columnar(file, result)
+                return
+            output = open(file, 'w')
+            output.write(json.dumps(result, indent=4, default=_to_list))
+            output.close()
         return
 
+    def _save_columnar(self, file, result):
+        meta = {"class": type(self).__name__}
+        columns = {}
+        for key, value in result.items():
+            value = _as_list(value)
+            if not isinstance(value, list):
+                meta[key] = value
+            elif key == "ansatz":
+                columns[key] = ("coded", value)
+            else:
+                columns[key] = (columnar.column_kind(value), value)
+        numeric = {"history_energies": "ragged",
+                   "variable_names": "coded",
+                   "variable_values": "ragged",
+                   "iteration_times": "ragged"}
+        values = self._read_journal({key: getattr(self, key)
+                                     for key in numeric})
+        for key, kind in numeric.items():
+            columns[key] = (kind, _as_list(values[key]))
+        columnar.write(file, columns, meta)
+
+    @classmethod
+    def load(cls, file, token="", mmap=True):
+        """Load a result saved with save(format="columnar")
+
+        Parameters
+        ----------
+        file : str
+        token : str
+            Authorization token, needed only to push the result again
+        mmap : bool
+            Memory-map the file, so only the parts that are used are read
+
+        Returns
+        ----------
+        A QleaderResult of the class that saved the file. Numeric
+        columns are numpy arrays, the others read-only sequences that
+        decode an item when it is accessed. The result can be saved and
+        pushed but no more runs can be added to it.
+        """
+        columns, meta = columnar.read(file, mmap=mmap)
+        classes = {c.__name__: c for c in QleaderResult.__subclasses__()}
+        result = classes[meta.pop("class")](meta["optimizer"], token)
+        for key, value in list(meta.items()) + list(columns.items()):
+            setattr(result, RESULT_ATTRIBUTES.get(key, key), value)
+        return result
+
     def __str__(self):
         return f"""Collected: {len(self.energies)} results,
             {len(self.hamiltonian)} hamiltonians,
@@ -174,3 +425,45 @@ class QleaderResult(ABC):
             {len(self.molecules)} molecules,
             with optimizer: {self.optimizer},
             Tequila: {self.tqversion}"""
+
+
+def _to_list(value):
+    """json.dumps default for the columns of a loaded result"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _as_list(value):
+    return value.tolist() if hasattr(value, "tolist") else value
+
+
+def extract_gates(compiler, ansatz):
+    """Compile the ansatz into elementary gates
+
+    return (gates, depth, single qubit count, double qubit count)
+    """
+    try:
+        circuit = compiler(ansatz)
+    except Exception:
+        circuit = ansatz
+        print("Warning: could not extract gates from ansatz, \
+               the experiment will not be automatically reproducible!")
+    counts = gate_qubit_counts(circuit)
+
+    return (str(circuit).split('\n')[1:-1],
+            circuit.depth, counts[0], counts[1])
+
+
+def gate_qubit_counts(circuit):
+    if not isinstance(circuit, tq.QCircuit):
+        return [0, 0]
+
+    counts = [0, 0]
+    for gate in circuit.gates:
+        qubits = len(gate.target) + len(gate.control)
+        if qubits == 1:
+            counts[0] += 1
+        elif qubits == 2:
+            counts[1] += 1
+    return counts
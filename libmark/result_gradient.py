@@ -1,21 +1,28 @@
 from .result import QleaderResult
+from .evaluations import count
 
 
 class QleaderResultGradient(QleaderResult):
-    def __init__(self, optimizer, token):
-        super().__init__(optimizer, token)
-        self.moments = []
+    run_columns = QleaderResult.run_columns + [
+        "moments", "function_evaluations", "gradient_evaluations"]
 
-    def add_run(self, run, molecule, hamiltonian, ansatz):
-        super().add_run(run, molecule, hamiltonian, ansatz)
+    def _add_run(self, run, molecule, hamiltonian, ansatz):
+        super()._add_run(run, molecule, hamiltonian, ansatz)
         self.moments.append(str(run.moments))
+        function_evaluations, gradient_evaluations = count(run)
+        self.function_evaluations.append(function_evaluations)
+        self.gradient_evaluations.append(gradient_evaluations)
 
     def get_result_dict(self):
+        self.join()
         result = {
             "energies": self.energies,
             "variables": self.variables,
             "histories": self.histories,
             "moments": self.moments,
+            "function_evaluations": self.function_evaluations,
+            "gradient_evaluations": self.gradient_evaluations,
+            "iteration_times": self.iteration_times,
             "hamiltonian": self.hamiltonian,
             "ansatz": self.ansatz,
             "single_qubit": self.single_qubit,
@@ -30,4 +37,4 @@ class QleaderResultGradient(QleaderResult):
             "basis_set": self.basis_set,
             "transformation": self.transformation
         }
-        return result
+        return self._read_journal(result)
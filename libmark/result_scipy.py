@@ -1,10 +1,10 @@
 from .result import QleaderResult
+from .evaluations import count
 
 
 class QleaderResultScipy(QleaderResult):
-    def __init__(self, optimizer, token):
-        super().__init__(optimizer, token)
-        self.scipy_results = []
+    run_columns = QleaderResult.run_columns + [
+        "scipy_results", "function_evaluations", "gradient_evaluations"]
 
     def make_scipy_result_dict(self, scipy_result):
         scipy_result_dict = {}
@@ -12,17 +12,24 @@ class QleaderResultScipy(QleaderResult):
             scipy_result_dict[key] = str(scipy_result.get(key))
         return scipy_result_dict
 
-    def add_run(self, run, molecule, hamiltonian, ansatz):
-        super().add_run(run, molecule, hamiltonian, ansatz)
+    def _add_run(self, run, molecule, hamiltonian, ansatz):
+        super()._add_run(run, molecule, hamiltonian, ansatz)
         self.scipy_results.append(str(
             self.make_scipy_result_dict(run.scipy_result)
         ))
+        function_evaluations, gradient_evaluations = count(run)
+        self.function_evaluations.append(function_evaluations)
+        self.gradient_evaluations.append(gradient_evaluations)
 
     def get_result_dict(self):
+        self.join()
         result = {"energies": self.energies,
                   "variables": self.variables,
                   "histories": self.histories,
                   "scipy_results": self.scipy_results,
+                  "function_evaluations": self.function_evaluations,
+                  "gradient_evaluations": self.gradient_evaluations,
+                  "iteration_times": self.iteration_times,
                   "hamiltonian": self.hamiltonian,
                   "ansatz": self.ansatz,
                   "single_qubit": self.single_qubit,
@@ -37,4 +44,4 @@ class QleaderResultScipy(QleaderResult):
                   "basis_set": self.basis_set,
                   "transformation": self.transformation
                   }
-        return result
+        return self._read_journal(result)
@@ -0,0 +1,58 @@
+import time
+from contextlib import contextmanager
+
+
+class Timings():
+    """Wall time spent in the named phases of a pipeline
+
+    A phase is timed with time.perf_counter each time it is entered, and
+    the seconds and the number of calls are summed per name. Cheap enough
+    to be always on: a phase costs about a microsecond.
+
+    ...
+
+    Methods
+    -------
+    phase(name)
+        Context manager that adds the time spent in it to 'name'
+    update(timings)
+        Adds the phases of another Timings or of a dict from as_dict()
+    as_dict()
+        Returns {name: {"seconds": float, "count": int}}
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.counts = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds, count=1):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + count
+
+    def update(self, timings):
+        if isinstance(timings, Timings):
+            timings = timings.as_dict()
+        for name, phase in timings.items():
+            self.add(name, phase["seconds"], phase["count"])
+
+    def as_dict(self):
+        return {name: {"seconds": self.seconds[name],
+                       "count": self.counts[name]}
+                for name in self.seconds}
+
+    def __str__(self):
+        total = sum(self.seconds.values())
+        lines = []
+        for name in sorted(self.seconds, key=self.seconds.get, reverse=True): # noqa
+            share = self.seconds[name] / total if total else 0.0
+            lines.append(f"{name:<16} {self.seconds[name]:>10.4f} s "
+                         f"{share:>6.1%} {self.counts[name]:>6}x")
+        return "\n".join(lines)
@@ -8,12 +8,15 @@ gradient_optimizers = [
     ]
 
 
-def get_tracker(optimizer, token):
-    """Returns a QleaderResult object based on the optimizer specified"""
+def get_tracker(optimizer, token, **kwargs):
+    """Returns a QleaderResult object based on the optimizer specified
+
+    Keyword arguments are passed to the QleaderResult, e.g. deferred=True
+    """
     if optimizer.upper() in scipy_optimizers:
-        return QleaderResultScipy(optimizer, token)
+        return QleaderResultScipy(optimizer, token, **kwargs)
     elif optimizer.upper() in gradient_optimizers:
-        return QleaderResultGradient(optimizer, token)
+        return QleaderResultGradient(optimizer, token, **kwargs)
     else:
         raise ValueError(f"{optimizer.upper()} not supported.")
 
@@ -1,24 +1,258 @@
+import logging
 import tequila as tq
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .checkpoint import Checkpoint
+from .timing import Timings
 
+logger = logging.getLogger(__name__)
 
-def run(exp):
-    print('Running experiment...')
-    print('Creating molecules...')
-    molecules = [create_H2(d, exp.basis_set, exp.transformation) for d in exp.distances] # noqa
 
-    results = []
-    for i in range(len(exp.distances)):
-        print(f'Running... {i+1}/{len(exp.distances)}')
-        H = molecules[i].make_hamiltonian()
-        U = exp.circuits[i]
+def run(exp, workers=None, warm_start=False, equilibrium=None, cache=None,
+        checkpoint_dir=None):
+    """Run the experiment for every distance
+
+    Parameters
+    ----------
+    exp : QleaderExperiment
+        experiment with built circuits
+    workers : int, optional
+        number of worker processes, distances are run
+        one after another in this process when not given
+    warm_start : bool
+        start each distance from the optimized variables of the
+        nearest already finished distance, see _iter_continuation
+    equilibrium : float, optional
+        with warm_start, sweep outward starting from the distance
+        closest to this one instead of in the given order
+    cache : MoleculeCache, optional
+        on-disk cache the molecules and Hamiltonians are read from
+    checkpoint_dir : str, optional
+        directory every finished distance is stored in, distances
+        already stored there are loaded instead of run again,
+        see libmark.checkpoint.Checkpoint
+
+    return list of tuples (distance, result), in distance order.
+    If a distance fails, its result is the raised exception.
+    """
+    return list(iterate(exp, workers, warm_start, equilibrium, cache,
+                        checkpoint_dir=checkpoint_dir))
+
+
+def iterate(exp, workers=None, warm_start=False, equilibrium=None,
+            cache=None, order='distance', checkpoint_dir=None):
+    """Run the experiment, yielding each distance as soon as it is done
+
+    Takes the parameters of run and
+
+    order : str
+        'distance' yields the results in distance order, holding back
+        those that finish before an earlier distance. 'completion'
+        yields every result as soon as it finishes.
+
+    Closing the generator early cancels the distances not yet started.
+
+    return generator of tuples (distance, result)
+    """
+    if order not in ['distance', 'completion']:
+        raise ValueError(f'Unknown order {order}, use "distance" or "completion".') # noqa
+    if warm_start and workers is not None and workers > 1:
+        raise ValueError('warm_start runs the distances in sequence and cannot be used with workers.') # noqa
+    checkpoint = None
+    completed = []
+    if checkpoint_dir is not None:
+        checkpoint = Checkpoint(checkpoint_dir, exp)
+        completed = checkpoint.completed()
+    remaining = [i for i in range(len(exp.distances)) if i not in completed]
+    if completed:
+        logger.info('Resuming, %d/%d distances completed', len(completed), len(exp.distances)) # noqa
+
+    if warm_start:
+        exp.warm_start_report = [None]*len(exp.distances)
+        finished = _iter_continuation(exp, equilibrium, cache, exp.warm_start_report, checkpoint) # noqa
+    else:
+        if workers is not None and workers > 1:
+            finished = _iter_parallel(exp, workers, cache, remaining)
+        else:
+            finished = _iter_serial(exp, cache, remaining)
+        if checkpoint is not None:
+            finished = chain(_iter_completed(checkpoint, completed),
+                             _iter_saved(checkpoint, finished))
+    if order == 'distance':
+        finished = _in_order(finished)
+    return _with_distances(exp, finished, completed)
+
+
+def _with_distances(exp, finished, loaded=()):
+    logger.info('Running experiment...')
+    for i, result in finished:
+        # Results loaded from a checkpoint were timed by an earlier run
+        if i not in loaded:
+            exp.timings.update(getattr(result, 'timings', {}))
+        yield exp.distances[i], result
+    logger.info('Done')
+
+
+def _in_order(finished):
+    """Reorder (index, result) pairs by index"""
+    waiting = {}
+    next_index = 0
+    for i, result in finished:
+        waiting[i] = result
+        while next_index in waiting:
+            yield next_index, waiting.pop(next_index)
+            next_index += 1
+
+
+def _iter_completed(checkpoint, completed):
+    for i in completed:
+        yield i, checkpoint.load(i)[0]
+
+
+def _iter_saved(checkpoint, finished):
+    for i, result in finished:
+        if not isinstance(result, Exception):
+            checkpoint.save(i, result)
+        yield i, result
+
+
+def _iter_serial(exp, cache, indices):
+    for step, i in enumerate(indices):
+        logger.info('Running... %d/%d', step+1, len(indices))
+        try:
+            result = run_distance(exp.distances[i], exp.basis_set, exp.transformation, exp.circuits[i], exp.optimizer, cache=cache) # noqa
+        except Exception as e:
+            result = _failed(exp.distances[i], e)
+        yield i, result
+
+
+def _iter_parallel(exp, workers, cache, indices):
+    n = len(indices)
+    logger.info('Running %d distances on %d workers...', n, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_distance, exp.distances[i], exp.basis_set, exp.transformation, exp.circuits[i], exp.optimizer, cache=cache): i # noqa
+            for i in indices
+        }
+        try:
+            for done, future in enumerate(as_completed(futures)):
+                i = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = _failed(exp.distances[i], e)
+                logger.info('Finished... %d/%d', done+1, n)
+                yield i, result
+        finally:
+            # Stopped early, do not wait for the distances not started
+            for future in futures:
+                future.cancel()
+
+
+def _iter_continuation(exp, equilibrium, cache, report, checkpoint=None):
+    """Run the distances in sequence, seeding each with the variables of
+    the nearest finished distance.
+
+    The first distance is started from zeros like in the other paths.
+
+    Fills 'report' with a dict with 'distance', 'seed_distance',
+    'iterations' and 'iterations_vs_first' for every distance as it
+    finishes (None for failed distances). 'iterations_vs_first' is the
+    iteration count of the first distance of the sweep minus that of
+    this one. It is a relative count between different geometries, not
+    what warm start saved at this distance, and can be negative.
+
+    Distances stored in the checkpoint are loaded instead of run, and
+    seed their neighbours like distances run now.
+
+    return generator of (index, result) in sweep order
+    """
+    n = len(exp.distances)
+    order = list(range(n))
+    if equilibrium is not None:
+        order.sort(key=lambda i: abs(exp.distances[i] - equilibrium))
+
+    completed = [] if checkpoint is None else checkpoint.completed()
+    # Only the variables are kept for seeding, the results are yielded
+    variables = {}
+    reference_iterations = None
+    for step, i in enumerate(order):
+        R = exp.distances[i]
+        seed = None
+        if i in completed:
+            result, report[i] = checkpoint.load(i)
+        else:
+            logger.info('Running... %d/%d', step+1, n)
+            U = exp.circuits[i]
+            initial_values = None
+            if variables:
+                seed = min(variables, key=lambda j: abs(exp.distances[j] - R)) # noqa
+                seed_variables = variables[seed]
+                initial_values = {k: seed_variables.get(k, 0.0) for k in U.extract_variables()} # noqa
+            try:
+                result = run_distance(R, exp.basis_set, exp.transformation, U, exp.optimizer, initial_values, cache) # noqa
+            except Exception as e:
+                yield i, _failed(R, e)
+                continue
+        variables[i] = result.variables
+
+        iterations = len(result.history.energies)
+        if reference_iterations is None:
+            reference_iterations = iterations
+        # Missing for distances run now and for those stored by a sweep
+        # without warm start
+        if report[i] is None:
+            report[i] = {
+                'distance': R,
+                'seed_distance': None if seed is None else exp.distances[seed], # noqa
+                'iterations': iterations,
+                'iterations_vs_first': reference_iterations - iterations
+            }
+            if checkpoint is not None:
+                checkpoint.save(i, result, report[i])
+        yield i, result
+
+
+def _failed(R, e):
+    logger.warning('Run at distance %s failed: %r', R, e)
+    return e
+
+
+def run_distance(R, basis_set, transformation, U, optimizer, initial_values=None, cache=None): # noqa
+    """Minimize the energy of H2 at bond distance R with ansatz U
+
+    initial_values defaults to zero for every variable of U.
+    With a cache the Hamiltonian is read from it when available.
+
+    The wall time of the phases, 'molecule', 'hamiltonian' (only
+    'hamiltonian' with a cache), 'objective' and 'minimize', is stored
+    in the 'timings' attribute of the result, see libmark.timing.
+
+    return result object returned by tq.minimize
+    """
+    timings = Timings()
+    if cache is None:
+        with timings.phase('molecule'):
+            molecule = create_H2(R, basis_set, transformation)
+        with timings.phase('hamiltonian'):
+            H = molecule.make_hamiltonian()
+    else:
+        with timings.phase('hamiltonian'):
+            H = cache.get(H2_geometry(R), basis_set, transformation)[1]
+    with timings.phase('objective'):
         E = tq.ExpectationValue(H=H, U=U)
+    variables = initial_values
+    if variables is None:
         variables = {k: 0.0 for k in U.extract_variables()}
-        result = tq.minimize(objective=E, method=exp.optimizer, initial_values=variables, silent=True) # noqa
-        results.append(result)
-    print('Done')
-    return list(zip(exp.distances, results))
+    with timings.phase('minimize'):
+        result = tq.minimize(E, method=optimizer, initial_values=variables, silent=True) # noqa
+    result.timings = timings.as_dict()
+    return result
 
 
 def create_H2(R, basis_set, transformation):
-    geometry = f'H 0.0 0.0 0.0\nH 0.0 0.0 {R}'
-    return tq.chemistry.Molecule(geometry=geometry, basis_set=basis_set, transformation=transformation) # noqa
+    return tq.chemistry.Molecule(geometry=H2_geometry(R), basis_set=basis_set, transformation=transformation) # noqa
+
+
+def H2_geometry(R):
+    return f'H 0.0 0.0 0.0\nH 0.0 0.0 {R}'
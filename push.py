@@ -1,15 +1,35 @@
 #!/usr/bin/python
 
-import sys
-import requests
-
-url = 'http://0.0.0.0:8000/api/'
-# url = 'https://ohtup-staging.cs.helsinki.fi/qleader/api/'
-
-if len(sys.argv) == 2:
-    file = open(sys.argv[1], "r")
-    struct = file.read()
-    response = requests.post(url, json=struct)
-    print(response)
-else:
-    print("You forgot the file!")
+import json
+import argparse
+from libmark.client import Client, set_client
+from libmark.outbox import Outbox
+
+# The server is $LIBMARK_URL, or libmark.client.DEFAULT_URL, unless --url
+# is given, e.g. --url http://0.0.0.0:8000/api/ while developing
+
+parser = argparse.ArgumentParser(
+    description='Push saved results, or the outbox with "flush"'
+)
+parser.add_argument('files', nargs='+', metavar='FILE',
+                    help='results saved with QleaderResult.save, or flush')
+parser.add_argument('--token', default='',
+                    help='Authorization header, e.g. "Token ..."')
+parser.add_argument('--url', help='defaults to $LIBMARK_URL')
+parser.add_argument('--outbox', help='defaults to $LIBMARK_OUTBOX')
+parser.add_argument('--concurrency', type=int, default=4)
+args = parser.parse_args()
+
+if args.url is not None:
+    set_client(Client(args.url))
+outbox = Outbox(args.outbox)
+keys = None
+if args.files != ['flush']:
+    # Only the given files, other pending results wait for "flush"
+    keys = []
+    for file in args.files:
+        with open(file, "r") as f:
+            keys.append(outbox.put(json.load(f), args.token))
+
+for key, response in outbox.flush(args.concurrency, keys):
+    print(key, response)
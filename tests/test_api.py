@@ -0,0 +1,101 @@
+import os
+import sys
+import ast
+import json
+import time
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from libmark import api
+from libmark.client import Client, get_client, set_client
+from libmark.experiment import QleaderExperiment
+
+DELAY = 0.1
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers like the QuantMark API after DELAY seconds"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(DELAY)
+        id, _, kind = self.path.strip('/').split('/')[1:4]
+        if id == 'missing':
+            body = b'not json'
+        elif kind == 'experiment':
+            body = json.dumps(self.server.experiment).encode()
+        else:
+            body = json.dumps({'id': id, 'energies': [-1.1, -1.2]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class testApi(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(sys.path[0], 'tests/test_data.txt'), 'r') as file: # noqa
+            experiment = ast.literal_eval(file.read())
+        experiment['ansatz'] = [str(a) for a in experiment['ansatz']]
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.experiment = experiment
+        threading.Thread(target=self.server.serve_forever, daemon=True).start() # noqa
+        self.previous = get_client()
+        set_client(Client(f'http://127.0.0.1:{self.server.server_port}/api/')) # noqa
+
+    def tearDown(self):
+        get_client().close()
+        set_client(self.previous)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_data_many_is_faster_than_serial(self):
+        ids = list(range(8))
+        start = time.perf_counter()
+        serial = [api.get_data(id, 'token') for id in ids]
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = dict(api.get_data_many(ids, 'token', concurrency=8))
+        concurrent_time = time.perf_counter() - start
+
+        self.assertEqual([results[id] for id in ids], serial)
+        self.assertLess(concurrent_time, serial_time / 2)
+
+    def test_get_experiments(self):
+        results = list(api.get_experiments(['1', 'missing'], 'token'))
+        results = dict(results)
+        self.assertIsInstance(results['1'], QleaderExperiment)
+        self.assertEqual(results['1'].distances[0], 0.5)
+        self.assertIsInstance(results['missing'], Exception)
+
+    def test_rate_limit(self):
+        start = time.perf_counter()
+        list(api.get_data_many(range(5), 'token', concurrency=5,
+                               rate_limit=20))
+        # 5 requests at 20 per second start over at least 0.2 seconds
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2 + DELAY)
+
+    def test_closing_early_cancels_pending_downloads(self):
+        start = time.perf_counter()
+        downloads = api.get_data_many(range(20), 'token', concurrency=1)
+        next(downloads)
+        downloads.close()
+        # At most the download in progress is waited for, not all 20
+        self.assertLess(time.perf_counter() - start, 5 * DELAY)
+
+    def test_iter_data_streams_records(self):
+        fields = api.iter_data('1', 'token', streamed=['energies'])
+        self.assertEqual(next(fields), ('id', '1'))
+        key, energies = next(fields)
+        self.assertEqual((key, next(energies)), ('energies', -1.1))
+        self.assertRaises(StopIteration, next, fields)
+
+    def test_parse_ansatz(self):
+        for gates in [[], ['H(target=(0,))', 'Ry(target=(1,), parameter=a)'],
+                      ["Rx(target=(0,), parameter=a')"], ['X\\"']]:
+            self.assertEqual(api.parse_ansatz(str(gates)), gates)
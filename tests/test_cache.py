@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+import tequila as tq
+from libmark.cache import MoleculeCache, encode_hamiltonian, decode_hamiltonian # noqa
+
+GEOMETRY = 'H 0.0 0.0 0.0\nH 0.0 0.0 0.7'
+
+
+class testMoleculeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = MoleculeCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hamiltonian_round_trip(self):
+        H = tq.QubitHamiltonian.from_string('0.5*X(0)Z(2)-1.25*Y(1)+0.1')
+        paulis, coefficients = encode_hamiltonian(H)
+        self.assertEqual(paulis.shape, (3, 3))
+        self.assertEqual(decode_hamiltonian(paulis, coefficients), H)
+
+    def test_second_get_is_hit(self):
+        molecule, H = self.cache.get(GEOMETRY, 'sto-3g', 'jordan-wigner')
+        cached_molecule, cached_H = self.cache.get(GEOMETRY, 'sto-3g', 'jordan-wigner') # noqa
+        self.assertEqual(H, cached_H)
+        self.assertEqual(molecule.parameters.get_geometry(),
+                         cached_molecule.parameters.get_geometry())
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['entries'], 1)
+
+    def test_key_depends_on_inputs(self):
+        key = self.cache.key(GEOMETRY, 'sto-3g', 'jordan-wigner')
+        self.assertEqual(key, self.cache.key(' ' + GEOMETRY + '\n', 'STO-3G', 'JordanWigner')) # noqa
+        self.assertNotEqual(key, self.cache.key(GEOMETRY, '6-31g', 'jordan-wigner')) # noqa
+        self.assertNotEqual(key, self.cache.key(GEOMETRY, 'sto-3g', 'bravyi-kitaev')) # noqa
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.get(GEOMETRY, 'sto-3g', 'jordan-wigner')
+        self.cache.max_bytes = self.cache.stats()['bytes']
+        first = self.cache._path(self.cache.key(GEOMETRY, 'sto-3g', 'jordan-wigner')) # noqa
+        os.utime(first, (0, 0))
+        self.cache.get(GEOMETRY, 'sto-3g', 'bravyi-kitaev')
+        self.assertFalse(os.path.exists(first))
+        self.assertEqual(self.cache.stats()['entries'], 1)
+
+    def test_entry_evicted_after_load_is_miss(self):
+        self.cache.get(GEOMETRY, 'sto-3g', 'jordan-wigner')
+        load = self.cache._load
+
+        def load_then_evict(path):
+            entry = load(path)
+            os.remove(path)  # by another process
+            return entry
+        self.cache._load = load_then_evict
+        self.cache.get(GEOMETRY, 'sto-3g', 'jordan-wigner')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (0, 2))
+        self.assertEqual(stats['entries'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
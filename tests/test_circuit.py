@@ -0,0 +1,79 @@
+import unittest
+import tequila as tq
+from libmark.circuit import fingerprint, parse_gates, Gate, LRUCache
+from libmark.result import compiled_ansatz
+from libmark.tracker import get_tracker
+from tests.test_result_scipy import mockScipyRun, mockMolecule
+
+
+class testCircuit(unittest.TestCase):
+
+    def test_fingerprint_ignores_variable_values(self):
+        U = tq.gates.Ry('a', 0) + tq.gates.X(target=1, control=0)
+        V = tq.gates.Ry('a', 0) + tq.gates.X(target=1, control=0)
+        self.assertEqual(fingerprint(U), fingerprint(V))
+
+    def test_fingerprint_distinguishes_structure(self):
+        U = tq.gates.Ry('a', 0) + tq.gates.X(target=1, control=0)
+        others = [
+            tq.gates.Ry('b', 0) + tq.gates.X(target=1, control=0),
+            tq.gates.Rx('a', 0) + tq.gates.X(target=1, control=0),
+            tq.gates.Ry('a', 1) + tq.gates.X(target=0, control=1),
+            tq.gates.Ry(0.5, 0) + tq.gates.X(target=1, control=0),
+            tq.gates.X(target=1, control=0) + tq.gates.Ry('a', 0),
+        ]
+        for V in others:
+            self.assertNotEqual(fingerprint(U), fingerprint(V))
+
+    def test_fingerprint_of_non_circuit(self):
+        self.assertEqual(fingerprint('ansatz'), None)
+
+    def test_parse_gates(self):
+        lines = ['X(target=(1,), control=(0,))',
+                 'Rz(target=(2,), parameter=f([(1, 0, 1, 0)]))',
+                 'Ry(target=(0,), parameter=-1.5)',
+                 'SWAP(target=(1, 2), control=())']
+        self.assertEqual(list(parse_gates(lines)), [
+            Gate('X', (1,), (0,)),
+            Gate('Rz', (2,), None, 'f([(1, 0, 1, 0)])'),
+            Gate('Ry', (0,), None, -1.5),
+            Gate('SWAP', (1, 2), ()),
+        ])
+
+    def test_parse_gates_reads_circuit_string(self):
+        U = tq.gates.Ry('a', 0) + tq.gates.X(target=1, control=0)
+        gates = list(parse_gates(str(U)))
+        self.assertEqual([g.name for g in gates], ['Ry', 'X'])
+
+    def test_parse_gates_reports_line_of_invalid_gate(self):
+        lines = ['X(target=(1,))', 'X(target=(1,)']
+        with self.assertRaisesRegex(ValueError, 'line 2'):
+            list(parse_gates(lines))
+
+    def test_parse_gates_rejects_malformed_parameters(self):
+        for parameter in ['1.2.3', '2a', 'a b', '', '=a']:
+            line = f'Rz(target=(2,), parameter={parameter})'
+            with self.assertRaisesRegex(ValueError, 'line 1'):
+                list(parse_gates([line]))
+
+    def test_lru_cache_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_repeated_add_run_hits_cache(self):
+        compiled_ansatz.clear()
+        hits = compiled_ansatz.hits
+        runs = get_tracker('Nelder-Mead', "token")
+        for i in range(3):
+            U = tq.gates.Ry('a', 0) + tq.gates.X(target=1, control=0)
+            runs.add_run(mockScipyRun(), mockMolecule(), tq.paulis.Z(0), U)
+        self.assertEqual(compiled_ansatz.hits - hits, 2)
+        self.assertEqual(runs.ansatz[0], runs.ansatz[2])
+        self.assertEqual(runs.double_qubit, [1, 1, 1])
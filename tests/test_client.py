@@ -0,0 +1,74 @@
+import json
+import socket
+import requests
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from libmark.client import Client
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 503 to the first 'failures' requests, then 200"""
+    protocol_version = 'HTTP/1.1'
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        server = self.server
+        server.requests.append((self.command, self.path))
+        server.connections.add(self.client_address)
+        status = 503 if len(server.requests) <= server.failures else 200
+        body = json.dumps({'path': self.path}).encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = respond
+    do_POST = respond
+
+    def log_message(self, *args):
+        pass
+
+
+class testClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), FlakyHandler)
+        self.server.requests = []
+        self.server.connections = set()
+        self.server.failures = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start() # noqa
+        url = f'http://127.0.0.1:{self.server.server_port}/api/'
+        self.client = Client(url, timeout=5, retries=3, backoff_factor=0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_is_retried_on_server_error(self):
+        self.server.failures = 2
+        response = self.client.get('distances/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'path': '/api/distances/'})
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_post_is_not_retried_on_server_error(self):
+        self.server.failures = 1
+        response = self.client.post(json='{}')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_connection_is_reused(self):
+        for _ in range(3):
+            self.client.get('distances/')
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_unreachable_server_raises(self):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        client = Client(f'http://127.0.0.1:{port}/', retries=1,
+                        backoff_factor=0)
+        self.assertRaises(requests.ConnectionError, client.get)
@@ -0,0 +1,63 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+from libmark import columnar
+
+
+class testColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, 'columns.qlr')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_and_read(self, columns, mmap=True):
+        columnar.write(self.file, columns, {'optimizer': 'BFGS'})
+        return columnar.read(self.file, mmap=mmap)
+
+    def test_columns_read_back(self):
+        columns = {
+            'depth': ('array', [3, 4, 5]),
+            'energies': ('array', [-1.1, -1.0, -0.9]),
+            'histories': ('ragged', [[0.5, -1.1], [], [0.1, 0.2, -0.9]]),
+            'molecules': ('strings', ['H2', None, 'Hæ']),
+            'geometries': ('json', [[['H', [0, 0, 0]]], None, {'a': 1}]),
+            'ansatz': ('coded', [['X(target=(0,))', 'H(target=(1,))'], None,
+                                 ['H(target=(1,))']]),
+        }
+        for mmap in [True, False]:
+            read, meta = self.write_and_read(columns, mmap)
+            self.assertEqual(meta, {'optimizer': 'BFGS'})
+            self.assertEqual(read['depth'].dtype, np.int64)
+            for name, (kind, data) in columns.items():
+                self.assertEqual(read[name].tolist(), data)
+            self.assertEqual(read['ansatz'].vocabulary,
+                             ['X(target=(0,))', 'H(target=(1,))'])
+
+    def test_buffers_are_aligned(self):
+        read, _ = self.write_and_read({
+            'molecules': ('strings', ['H2', 'LiH']),
+            'energies': ('array', [-1.1, -7.8]),
+        })
+        for array in [read['energies'], read['molecules'].offsets]:
+            self.assertEqual(array.ctypes.data % columnar.ALIGNMENT, 0)
+        self.assertEqual(read['energies'][1], -7.8)
+
+    def test_ragged_negative_index(self):
+        read, _ = self.write_and_read({'h': ('ragged', [[1.0], [2.0, 3.0]])})
+        self.assertEqual(read['h'][-1].tolist(), [2.0, 3.0])
+        self.assertRaises(IndexError, read['h'].__getitem__, 2)
+
+    def test_not_a_columnar_file(self):
+        with open(self.file, 'w') as f:
+            f.write('{"energies": []}')
+        self.assertRaises(ValueError, columnar.read, self.file)
+
+    def test_column_kind(self):
+        self.assertEqual(columnar.column_kind([1, 2.5]), 'array')
+        self.assertEqual(columnar.column_kind(['a', None]), 'strings')
+        self.assertEqual(columnar.column_kind([['a'], None]), 'coded')
+        self.assertEqual(columnar.column_kind([(0.6,), 'a']), 'json')
@@ -1,5 +1,9 @@
 import unittest
 import ast, os, sys  # noqa
+import tempfile
+from unittest import mock
+from libmark import vqe
+from libmark.cache import MoleculeCache
 from libmark.experiment import QleaderExperiment
 
 
@@ -12,4 +16,128 @@ class testExperiment(unittest.TestCase):
     def test_vqe_run_success(self):
         result = self.experiment.run_experiment()
         self.assertEqual(result[0][0], 0.5)
-        self.assertEqual(round(result[0][1].energy, 3), 1.058)
+        self.assertEqual(round(result[0][1].energy, 3), -1.043)
+
+    def test_phases_are_timed_per_distance(self):
+        self.experiment.distances = self.experiment.distances[:2]
+        result = self.experiment.run_experiment(workers=2)
+        phases = ['molecule', 'hamiltonian', 'objective', 'minimize']
+        self.assertEqual(list(result[0][1].timings), phases)
+        timings = self.experiment.timings.as_dict()
+        self.assertEqual(timings['minimize']['count'], 2)
+        self.assertEqual(timings['build_circuits']['count'], 1)
+
+    def test_parallel_run_matches_serial(self):
+        serial = self.experiment.run_experiment()
+        parallel = self.experiment.run_experiment(workers=2)
+        self.assertEqual([r[0] for r in parallel], self.experiment.distances)
+        for s, p in zip(serial, parallel):
+            self.assertEqual(s[1].energy, p[1].energy)
+            self.assertEqual(s[1].history.energies, p[1].history.energies)
+
+    def test_failed_distance_does_not_stop_sweep(self):
+        self.experiment.distances[1] = 'not a distance'
+        result = self.experiment.run_experiment(workers=2)
+        self.assertEqual(len(result), len(self.experiment.distances))
+        self.assertIsInstance(result[1][1], Exception)
+        self.assertEqual(round(result[0][1].energy, 3), -1.043)
+
+    def test_warm_start_sweeps_outward_from_equilibrium(self):
+        result = self.experiment.run_experiment(warm_start=True, equilibrium=1.0) # noqa
+        self.assertEqual([r[0] for r in result], self.experiment.distances)
+        report = self.experiment.warm_start_report
+        self.assertIsNone(report[1]['seed_distance'])
+        self.assertEqual(report[1]['iterations_vs_first'], 0)
+        self.assertEqual(report[0]['seed_distance'], 1.0)
+        self.assertEqual(report[2]['seed_distance'], 1.0)
+        self.assertEqual(report[3]['seed_distance'], 1.5)
+        for i in range(4):
+            self.assertEqual(report[i]['iterations'],
+                             len(result[i][1].history.energies))
+
+    def test_iter_experiment_yields_in_completion_order(self):
+        results = self.experiment.iter_experiment(warm_start=True,
+                                                  equilibrium=1.0,
+                                                  order='completion')
+        distance, result = next(results)
+        self.assertEqual(distance, 1.0)
+        self.assertEqual(self.experiment.warm_start_report[1]['iterations'],
+                         len(result.history.energies))
+        self.assertIsNone(self.experiment.warm_start_report[0])
+        sweep = [self.experiment.distances[i] for i in [0, 2, 3]]
+        self.assertEqual([r[0] for r in results], sweep)
+
+    def test_iter_experiment_in_distance_order(self):
+        self.experiment.distances = self.experiment.distances[:2]
+        serial = self.experiment.run_experiment()
+        with self.assertLogs('libmark.vqe', 'INFO') as logs:
+            iterated = list(self.experiment.iter_experiment(workers=2))
+        self.assertEqual([r[0] for r in iterated], self.experiment.distances)
+        self.assertEqual(serial[1][1].energy, iterated[1][1].energy)
+        self.assertIn('INFO:libmark.vqe:Done', logs.output)
+
+    def test_unknown_order(self):
+        self.assertRaises(ValueError, self.experiment.iter_experiment,
+                          order='random')
+
+    def test_warm_start_cannot_run_on_workers(self):
+        self.assertRaises(ValueError, self.experiment.run_experiment,
+                          workers=2, warm_start=True)
+
+    def test_cached_run_matches_uncached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = MoleculeCache(directory)
+            self.experiment.distances = self.experiment.distances[:2]
+            result = self.experiment.run_experiment()
+            self.experiment.run_experiment(cache=cache)
+            cached = self.experiment.run_experiment(cache=cache)
+            self.assertEqual(cache.stats()['hits'], 2)
+            self.assertEqual(result[1][1].energy, cached[1][1].energy)
+
+    def test_checkpoint_resumes_after_interruption(self):
+        self.experiment.distances = self.experiment.distances[:3]
+        with tempfile.TemporaryDirectory() as directory:
+            results = self.experiment.iter_experiment(checkpoint_dir=directory) # noqa
+            first = next(results)
+            results.close()  # interrupted
+            status = self.experiment.checkpoint_status(directory)
+            self.assertEqual(status['completed'], [0.5])
+            self.assertEqual(status['remaining'], [1.0, 1.5])
+
+            with mock.patch.object(vqe, 'run_distance',
+                                   wraps=vqe.run_distance) as run_distance:
+                resumed = self.experiment.run_experiment(checkpoint_dir=directory) # noqa
+            self.assertEqual(run_distance.call_count, 2)
+            # The loaded distance is not timed again
+            timings = self.experiment.timings.as_dict()
+            self.assertEqual(timings['minimize']['count'], 3)
+            self.assertEqual(resumed[0][1].energy, first[1].energy)
+            self.assertEqual(resumed[0][1].history.energies,
+                             first[1].history.energies)
+            status = self.experiment.checkpoint_status(directory)
+            self.assertEqual(status['remaining'], [])
+
+    def test_warm_start_resumes_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = self.experiment.iter_experiment(warm_start=True,
+                                                      equilibrium=1.0,
+                                                      checkpoint_dir=directory) # noqa
+            next(results)
+            next(results)
+            results.close()
+            report = list(self.experiment.warm_start_report)
+            resumed = self.experiment.run_experiment(warm_start=True,
+                                                     equilibrium=1.0,
+                                                     checkpoint_dir=directory) # noqa
+            self.assertEqual(self.experiment.warm_start_report[:2],
+                             report[:2])
+            self.assertEqual(self.experiment.warm_start_report[3]['seed_distance'], 1.5) # noqa
+            self.assertEqual(len(resumed), 4)
+
+    def test_distances_with_same_ansatz_share_circuit(self):
+        self.experiment.ansatz[2] = self.experiment.ansatz[2][:-1]
+        circuits = self.experiment.build_circuits()
+        self.assertIs(circuits[0], circuits[1])
+        self.assertIs(circuits[0], circuits[3])
+        self.assertIsNot(circuits[0], circuits[2])
+        self.assertEqual(len(circuits[0].gates), len(self.experiment.ansatz[0])) # noqa
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import threading
+import unittest
+import requests
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from libmark import api
+from libmark.client import Client, get_client, set_client
+from libmark.http_cache import ResponseCache
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """Serves a fixed body with an ETag and answers 304 when it matches"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'[0.5, 0.75, 1.0]'
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class testResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start() # noqa
+        self.url = f'http://127.0.0.1:{self.server.server_port}/api/'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def client(self, **kwargs):
+        cache = ResponseCache(self.directory.name, **kwargs)
+        return Client(self.url, retries=0, cache=cache)
+
+    def test_fresh_response_is_served_from_disk(self):
+        self.client().get('distances/')
+        client = self.client()
+        response = client.get('distances/')
+        self.assertEqual(response.json(), [0.5, 0.75, 1.0])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(client.cache.hits, 1)
+
+    def test_stale_response_is_revalidated(self):
+        client = self.client(ttls=[('distances/', 0)])
+        client.get('distances/')
+        response = client.get('distances/')
+        self.assertEqual(response.content, b'[0.5, 0.75, 1.0]')
+        self.assertEqual(self.server.requests[1]['If-None-Match'], '"v1"')
+        self.assertEqual(client.cache.revalidated, 1)
+
+    def test_streamed_response_is_read_from_disk(self):
+        client = self.client(ttls=[('distances/', 0)])
+
+        def read():
+            with client.get('distances/', stream=True) as response:
+                return b''.join(response.iter_content(4))
+
+        self.assertEqual(read(), b'[0.5, 0.75, 1.0]')
+        self.assertEqual(read(), b'[0.5, 0.75, 1.0]')
+        self.assertEqual(client.cache.revalidated, 1)
+        client.cache.offline = True
+        self.assertEqual(read(), b'[0.5, 0.75, 1.0]')
+        self.assertEqual(client.cache.hits, 1)
+
+    def test_tokens_are_cached_separately(self):
+        client = self.client()
+        client.get('1/download/dump/', headers={'Authorization': 'Token a'})
+        client.get('1/download/dump/', headers={'Authorization': 'Token b'})
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_offline_serves_stale_responses(self):
+        self.client(ttls=[('distances/', 0)]).get('distances/')
+        client = self.client(offline=True)
+        self.assertEqual(client.get('distances/').json(), [0.5, 0.75, 1.0])
+        self.assertRaises(requests.ConnectionError, client.get, 'fci/sto-3g/')
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_unreachable_server_serves_stale_response(self):
+        client = self.client(ttls=[('distances/', 0)])
+        client.get('distances/')
+        client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertEqual(client.get('distances/').json(), [0.5, 0.75, 1.0])
+        self.assertRaises(requests.ConnectionError, client.get, 'fci/sto-3g/')
+        # For tearDown
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start() # noqa
+
+    def test_api_uses_the_cache(self):
+        previous = get_client()
+        set_client(self.client())
+        try:
+            self.assertEqual(api.get_distances(), api.get_distances())
+        finally:
+            set_client(previous)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_shared_client_caches_only_when_asked(self):
+        previous = get_client()
+        try:
+            with mock.patch.dict(os.environ):
+                os.environ.pop('LIBMARK_CACHE_DIR', None)
+                os.environ.pop('LIBMARK_OFFLINE', None)
+                set_client(None)
+                self.assertIsNone(get_client().cache)
+                os.environ['LIBMARK_CACHE_DIR'] = self.directory.name
+                set_client(None)
+                cache = get_client().cache
+            self.assertEqual(cache.directory,
+                             os.path.join(self.directory.name, 'http'))
+        finally:
+            set_client(previous)
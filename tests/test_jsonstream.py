@@ -0,0 +1,63 @@
+import json
+import unittest
+import tracemalloc
+from libmark import jsonstream
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class testJsonStream(unittest.TestCase):
+
+    def setUp(self):
+        self.document = {'energies': [-1.25e-3, 7, 123456789, True, None],
+                         'name': 'H₂ ✓ "quoted"',
+                         'histories': [{'energies': [1.5, 2.0]}, []],
+                         'empty': []}
+        self.data = json.dumps(self.document).encode()
+
+    def test_load_any_chunk_size(self):
+        for size in range(1, 16):
+            chunks = split(self.data, size)
+            self.assertEqual(jsonstream.load(chunks), self.document)
+
+    def test_streamed_fields(self):
+        for size in [1, 3, 1024]:
+            fields = jsonstream.fields(split(self.data, size),
+                                       streamed=['histories', 'empty'])
+            decoded = {}
+            for key, value in fields:
+                if key in ['histories', 'empty']:
+                    value = list(value)
+                decoded[key] = value
+            self.assertEqual(decoded, self.document)
+
+    def test_unread_records_are_skipped(self):
+        fields = jsonstream.fields([self.data], streamed=['energies'])
+        self.assertEqual([key for key, _ in fields], list(self.document))
+
+    def test_invalid(self):
+        for data in [b'{"a": 1', b'[1, 2] 3', b'{"a" 1}', b'not json']:
+            self.assertRaises(ValueError, jsonstream.load, split(data, 2))
+        self.assertRaises(ValueError, list, jsonstream.fields([b'[1]']))
+
+    def test_memory_does_not_grow_with_size(self):
+        def dump(records):
+            yield b'{"id": 1, "histories": ['
+            for i in range(records):
+                yield (b', ' if i else b'') + json.dumps(
+                    {'energies': [-1.1] * 100}).encode()
+            yield b']}'
+
+        peaks = []
+        for records in [100, 2000]:
+            tracemalloc.start()
+            for key, value in jsonstream.fields(dump(records),
+                                                streamed=['histories']):
+                if key == 'histories':
+                    for record in value:
+                        pass
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.assertLess(peaks[1], 2 * peaks[0])
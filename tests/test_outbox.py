@@ -0,0 +1,81 @@
+import json
+import tempfile
+import unittest
+from unittest import mock
+import requests
+from libmark.client import Client, get_client
+from libmark.outbox import Outbox
+from libmark.tracker import get_tracker
+from tests.test_result_scipy import mockScipyRun, mockMolecule
+from tests.test_result_scipy import mockHamiltonian, mockAnsatz
+
+
+class testOutbox(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.outbox = Outbox(self.directory.name)
+        self.runs = get_tracker('Nelder-Mead', "token")
+        self.runs.add_run(mockScipyRun(), mockMolecule(), mockHamiltonian(),
+                          mockAnsatz())
+        self.response = mock.Mock()
+        self.response.json.return_value = {'id': 1}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def post(self, **kwargs):
+        return mock.patch.object(get_client(), 'post', **kwargs)
+
+    def test_deferred_push_is_sent_by_flush(self):
+        with self.post(return_value=self.response) as post:
+            key = self.runs.push(deferred=True, outbox=self.outbox)
+            post.assert_not_called()
+            self.assertEqual(self.outbox.pending(), [key])
+            self.assertEqual(self.outbox.flush(), [(key, {'id': 1})])
+        self.assertEqual(self.outbox.pending(), [])
+        headers = post.call_args[1]['headers']
+        self.assertEqual(headers['Authorization'], 'Token token')
+        self.assertEqual(headers['Idempotency-Key'], key)
+        sent = json.loads(post.call_args[1]['json'])
+        self.assertEqual(sent['hamiltonian'], ['this is a Hamiltonian'])
+
+    def test_same_result_is_sent_once(self):
+        with self.post(return_value=self.response) as post:
+            self.assertEqual(self.runs.push(outbox=self.outbox), {'id': 1})
+            self.assertEqual(self.runs.push(outbox=self.outbox), {'id': 1})
+            self.runs.push(deferred=True, outbox=self.outbox)
+            self.assertEqual(self.outbox.flush(), [])
+        self.assertEqual(post.call_count, 1)
+
+    def test_failed_push_stays_pending(self):
+        error = requests.ConnectionError('unreachable')
+        with self.post(side_effect=error):
+            self.assertRaises(requests.ConnectionError, self.runs.push,
+                              outbox=self.outbox)
+            key, = self.outbox.pending()
+            self.assertEqual(self.outbox.flush(), [(key, error)])
+        self.assertEqual(self.outbox.pending(), [key])
+        with self.post(return_value=self.response):
+            self.assertEqual(self.outbox.flush(), [(key, {'id': 1})])
+        self.assertEqual(self.outbox.response(key), {'id': 1})
+
+    def test_flush_only_given_keys(self):
+        with self.post(return_value=self.response) as post:
+            first = self.outbox.put({'energies': [1]}, '')
+            second = self.outbox.put({'energies': [2]}, '')
+            self.assertEqual(self.outbox.flush(keys=[second]),
+                             [(second, {'id': 1})])
+        self.assertEqual(self.outbox.pending(), [first])
+        headers = post.call_args[1]['headers']
+        self.assertNotIn('Authorization', headers)
+
+    def test_result_is_sent_to_the_url_it_was_spooled_for(self):
+        with mock.patch.object(get_client(), 'url', 'http://first/api/'):
+            key = self.outbox.put({'energies': [1]}, 'Token token')
+        with mock.patch.object(Client, 'post', autospec=True,
+                               return_value=self.response) as post:
+            self.assertEqual(self.outbox.flush(), [(key, {'id': 1})])
+        client = post.call_args[0][0]
+        self.assertIsNot(client, get_client())
+        self.assertEqual(client.url, 'http://first/api/')
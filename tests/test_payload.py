@@ -0,0 +1,73 @@
+import json
+import zlib
+import unittest
+from unittest import mock
+from libmark import payload
+from libmark.client import get_client
+from libmark.tracker import get_tracker
+from tests.test_result_scipy import mockScipyRun, mockMolecule
+from tests.test_result_scipy import mockHamiltonian, mockAnsatz
+
+
+class testPayload(unittest.TestCase):
+
+    def setUp(self):
+        self.result = {'energies': [-1.1] * 1000,
+                       'hamiltonian': ['+0.5Z(0)Z(1)'] * 1000,
+                       'optimizer': 'BFGS'}
+
+    def test_gzip_decodes_to_single_encoded_json(self):
+        chunks = list(payload.encode(self.result, 'gzip', chunk_size=1024))
+        self.assertGreater(len(chunks), 1)
+        decoded = zlib.decompress(b''.join(chunks), 16 + zlib.MAX_WBITS)
+        self.assertEqual(json.loads(decoded), self.result)
+
+    def test_uncompressed(self):
+        data = b''.join(payload.encode(self.result))
+        self.assertEqual(data, json.dumps(self.result).encode())
+
+    def test_unknown_compression(self):
+        self.assertRaises(ValueError, list, payload.encode({}, 'brotli'))
+
+    def test_negotiate(self):
+        self.assertEqual(payload.negotiate('gzip, deflate'), 'gzip')
+        self.assertEqual(payload.negotiate('gzip;q=0, identity'), None)
+        self.assertEqual(payload.negotiate(''), None)
+
+    def test_report_compares_with_double_encoding(self):
+        measured = payload.report(self.result)
+        self.assertLess(measured['gzip']['bytes'],
+                        measured['json']['bytes'])
+        self.assertLess(measured['json']['bytes'],
+                        measured['double encoded']['bytes'])
+
+    def test_push_compressed(self):
+        runs = get_tracker('Nelder-Mead', "token")
+        runs.add_run(mockScipyRun(), mockMolecule(), mockHamiltonian(),
+                     mockAnsatz())
+        response = mock.Mock()
+        response.json.return_value = {'id': 1}
+        with mock.patch.object(get_client(), 'post',
+                               return_value=response) as post:
+            self.assertEqual(runs.push(compression='gzip'), {'id': 1})
+        headers = post.call_args[1]['headers']
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        body = b''.join(post.call_args[1]['data'])
+        decoded = json.loads(zlib.decompress(body, 16 + zlib.MAX_WBITS))
+        self.assertEqual(decoded['hamiltonian'], ['this is a Hamiltonian'])
+
+    def test_push_with_timings(self):
+        runs = get_tracker('Nelder-Mead', "token")
+        run = mockScipyRun()
+        run.timings = {'minimize': {'seconds': 2.0, 'count': 1}}
+        runs.add_run(run, mockMolecule(), mockHamiltonian(), mockAnsatz())
+        response = mock.Mock()
+        response.json.return_value = {'id': 1}
+        with mock.patch.object(get_client(), 'post',
+                               return_value=response) as post:
+            runs.push(timings=True)
+        timings = json.loads(post.call_args[1]['json'])['timings']
+        self.assertEqual(timings['runs'][0]['minimize']['seconds'], 2.0)
+        self.assertIn('extract_gates', timings['runs'][0])
+        self.assertIn('add_run', timings['total'])
+        self.assertIn('serialize', runs.timings.as_dict())
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from libmark import api
+from libmark.client import get_client
+from libmark.reference import ReferenceEnergies
+from libmark.vqe import H2_geometry
+
+
+class testReferenceEnergies(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, 'fci.json')
+        self.store = ReferenceEnergies(self.file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_imported_table_is_reloaded(self):
+        self.store.import_table('sto-3g', [[0.5, -1.05], [1, -1.10]])
+        store = ReferenceEnergies(self.file)
+        self.assertEqual(store.table('STO-3G'), [[0.5, -1.05], [1, -1.10]])
+        self.assertEqual(store.get(H2_geometry(1.0), 'sto-3g'), -1.10)
+        self.assertIsNone(store.table('6-31g'))
+
+    def test_get_fci_downloads_once(self):
+        response = mock.Mock(content=b'{0.5: -1.05, 0.75: -1.137}')
+        with mock.patch.object(get_client(), 'get', return_value=response) as get: # noqa
+            first = api.get_fci('sto-3g', store=self.store)
+            second = api.get_fci('sto-3g', store=self.store)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(self.store.get(H2_geometry(0.75), 'sto-3g'), -1.137)
+
+    def test_compute_in_parallel(self):
+        energies = self.store.compute([0.7, 0.75], 'sto-3g', workers=2)
+        self.assertAlmostEqual(energies[0], -1.13619, places=4)
+        self.assertEqual(energies, ReferenceEnergies(self.file).compute([0.7, 0.75], 'sto-3g')) # noqa
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
+from unittest import mock
 import pathlib as pl
+import tequila as tq
 from libmark.tracker import get_tracker
 
 
@@ -48,6 +50,29 @@ class testResultGradient(unittest.TestCase):
             self.assertEqual("energies", testStr)
             f.unlink()
 
+    def test_evaluation_counters(self):
+        runs = get_tracker('ADAM', "token")
+        E = tq.ExpectationValue(H=tq.paulis.Z(0) + 0.5*tq.paulis.X(1),
+                                U=tq.gates.Ry('a', 0) + tq.gates.Ry('b', 1))
+        run = runs.minimize(E, initial_values={'a': 0.1, 'b': 0.1},
+                            maxiter=5, silent=True, time_evaluations=True)
+        runs.add_run(run, mockMolecule(), self.H, self.U)
+        result = runs.get_result_dict()
+        self.assertEqual(result["function_evaluations"], [5])
+        self.assertEqual(result["gradient_evaluations"], [5])
+        times = result["iteration_times"][0]
+        self.assertEqual(len(times), 5)
+        self.assertTrue(all(t > 0 for t in times))
+
+    def test_iterations_are_not_timed_by_default(self):
+        runs = get_tracker('ADAM', "token")
+        E = tq.ExpectationValue(H=tq.paulis.Z(0), U=tq.gates.Ry('a', 0))
+        with mock.patch.object(tq, 'minimize', wraps=tq.minimize) as minimize: # noqa
+            run = runs.minimize(E, initial_values={'a': 0.1}, maxiter=2,
+                                silent=True)
+        self.assertIs(minimize.call_args[0][0], E)
+        self.assertEqual(run.iteration_times, [])
+
 
 '''Below are mocked classes. They could be
 replaced with actual python mocks later.'''
@@ -1,6 +1,13 @@
+import os
 import unittest
+from unittest import mock
+import json
+import tempfile
 import pathlib as pl
+import tequila as tq
 from libmark.tracker import get_tracker
+from libmark.result import compiled_ansatz, QleaderResult
+from libmark.result_scipy import QleaderResultScipy
 
 
 class testResultScipy(unittest.TestCase):
@@ -48,6 +55,112 @@ class testResultScipy(unittest.TestCase):
             self.assertEqual("energies", testStr)
             f.unlink()
 
+    def test_save_columnar_and_load(self):
+        mol = [mockMolecule(), mockMolecule()]
+        runs = self.mock_vqe(mol, 'Nelder-Mead')
+        runs.save("testfile.qlr", format="columnar")
+        loaded = QleaderResult.load("testfile.qlr", mmap=False)
+        pl.Path("testfile.qlr").unlink()
+
+        def as_json(result):
+            return json.loads(json.dumps(result.get_result_dict(),
+                                         default=lambda v: v.tolist()))
+        self.assertIsInstance(loaded, QleaderResultScipy)
+        self.assertEqual(as_json(runs), as_json(loaded))
+        self.assertEqual(loaded.qubits.tolist(), [3, 3])
+
+    def test_save_unknown_format(self):
+        runs = self.mock_vqe([mockMolecule()], 'Nelder-Mead')
+        self.assertRaises(ValueError, runs.save, "testfile", format="xml")
+
+    def test_journal_matches_in_memory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = os.path.join(directory, 'runs.jsonl')
+            runs = get_tracker('Nelder-Mead', "token", journal=journal)
+            in_memory = get_tracker('Nelder-Mead', "token")
+            for result in [runs, in_memory]:
+                for molecule in [mockMolecule(), mockMolecule()]:
+                    result.add_run(self.run, molecule, self.H, self.U)
+            self.assertEqual(len(runs.energies), 2)
+            self.assertEqual(runs.hamiltonian[1], "this is a Hamiltonian")
+            with open(journal) as f:
+                self.assertEqual(len(f.readlines()), 3)
+            self.assertEqual(
+                json.dumps(runs.get_result_dict(), default=list),
+                json.dumps(in_memory.get_result_dict(), default=list))
+
+    def test_journal_resumes_after_interruption(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = os.path.join(directory, 'runs.jsonl')
+            runs = get_tracker('Nelder-Mead', "token", journal=journal)
+            runs.add_run(self.run, mockMolecule(), self.H, self.U)
+            with open(journal, 'a') as f:
+                f.write('{"energies": [0.6')  # crashed while writing
+            resumed = get_tracker('Nelder-Mead', "token", journal=journal)
+            self.assertEqual(len(resumed.energies), 1)
+            self.assertEqual(resumed.basis_set, 'mockedBasisSet')
+            resumed.add_run(self.run, mockMolecule(), self.H, self.U)
+            self.assertEqual(len(resumed.molecules), 2)
+            self.assertRaises(ValueError, get_tracker, 'BFGS', "token",
+                              journal=journal)
+
+    def test_journal_drops_columns_of_failed_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = os.path.join(directory, 'runs.jsonl')
+            runs = get_tracker('Nelder-Mead', "token", journal=journal)
+            failing = mockScipyRun()
+            failing.energy = -1.0
+            failing.scipy_result = None  # fails after the common columns
+            self.assertRaises(AttributeError, runs.add_run, failing,
+                              mockMolecule(), self.H, self.U)
+            runs.add_run(self.run, mockMolecule(), self.H, self.U)
+            self.assertEqual(len(runs.energies), 1)
+            self.assertEqual(runs.energies[0], list(self.run.energy))
+
+    def test_journal_cannot_be_deferred(self):
+        self.assertRaises(ValueError, get_tracker, 'Nelder-Mead', "token",
+                          journal='runs.jsonl', deferred=True)
+
+    def test_deferred_gates_match_immediate(self):
+        compiled_ansatz.clear()
+        U = tq.gates.Ry('a', 0) + tq.gates.X(target=1, control=0)
+        immediate = get_tracker('Nelder-Mead', "token")
+        deferred = get_tracker('Nelder-Mead', "token", deferred=True)
+        for runs in [deferred, immediate]:
+            for molecule in [mockMolecule(), mockMolecule()]:
+                runs.add_run(self.run, molecule, self.H, U)
+        self.assertEqual(deferred.ansatz[0], None)
+        self.assertEqual(immediate.get_result_dict(),
+                         deferred.get_result_dict())
+        self.assertEqual(deferred.single_qubit, [1, 1])
+        self.assertEqual(deferred.double_qubit, [1, 1])
+
+    def test_evaluation_counters(self):
+        runs = get_tracker('BFGS', "token")
+        E = tq.ExpectationValue(H=tq.paulis.Z(0) + 0.5*tq.paulis.X(1),
+                                U=tq.gates.Ry('a', 0) + tq.gates.Ry('b', 1))
+        with mock.patch.object(tq, 'minimize', wraps=tq.minimize) as minimize: # noqa
+            run = runs.minimize(E, initial_values={'a': 0.1, 'b': 0.1},
+                                silent=True, time_evaluations=True)
+        # Timed through the callback, the objective is not wrapped
+        self.assertIs(minimize.call_args[0][0], E)
+        runs.add_run(run, mockMolecule(), self.H, self.U)
+        result = runs.get_result_dict()
+        self.assertEqual(result["function_evaluations"],
+                         [run.scipy_result.nfev])
+        self.assertEqual(result["gradient_evaluations"],
+                         [run.scipy_result.njev])
+        times = result["iteration_times"][0]
+        self.assertEqual(len(times), run.scipy_result.nit)
+        self.assertTrue(all(t > 0 for t in times))
+
+        runs.save("testfile.qlr", format="columnar")
+        loaded = QleaderResult.load("testfile.qlr", mmap=False)
+        pl.Path("testfile.qlr").unlink()
+        self.assertEqual(loaded.iteration_times[0].tolist(), times)
+        self.assertEqual(loaded.function_evaluations.tolist(),
+                         result["function_evaluations"])
+
 
 '''
 Below are mocked classes. They could be
@@ -0,0 +1,32 @@
+import time
+import unittest
+from libmark.timing import Timings
+
+
+class testTimings(unittest.TestCase):
+
+    def test_phases_are_summed(self):
+        timings = Timings()
+        for _ in range(2):
+            with timings.phase('sleep'):
+                time.sleep(0.01)
+        phase = timings.as_dict()['sleep']
+        self.assertEqual(phase['count'], 2)
+        self.assertGreaterEqual(phase['seconds'], 0.02)
+
+    def test_phase_is_recorded_when_it_raises(self):
+        timings = Timings()
+        with self.assertRaises(ValueError):
+            with timings.phase('failing'):
+                raise ValueError()
+        self.assertEqual(timings.counts['failing'], 1)
+
+    def test_update(self):
+        timings = Timings()
+        timings.add('minimize', 1.5)
+        other = Timings()
+        other.update(timings)
+        other.update({'minimize': {'seconds': 0.5, 'count': 2}})
+        self.assertEqual(other.as_dict(),
+                         {'minimize': {'seconds': 2.0, 'count': 3}})
+        self.assertIn('minimize', str(other))